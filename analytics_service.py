@@ -0,0 +1,281 @@
+"""
+Analytics Service for Event Management System
+Compute dashboard statistics with SQL aggregates instead of loading rows
+"""
+
+from datetime import date
+from sqlalchemy import event, func, extract, select, true
+from models import db, Event, Guest, Booking, EventRollup
+from rollup_service import count_if
+from cache import TTLCache
+
+
+def _sum(column):
+    """SUM that returns 0 instead of NULL for an empty table"""
+    return func.coalesce(func.sum(column), 0)
+
+
+class AnalyticsService:
+    """Aggregate queries behind the analytics dashboard
+
+    Guest and booking figures are read from the event_rollups table,
+    so every query here is O(events) rather than O(guests).
+    """
+
+    def __init__(self):
+        """Initialize the dashboard summary cache"""
+        self.dashboard_cache = TTLCache(ttl=30)
+
+    def init_app(self, app):
+        """
+        Configure the cache TTL and invalidate it on writes
+
+        Any committed flush that touches events, guests or bookings
+        clears the cached dashboard summary.
+        """
+        self.dashboard_cache.ttl = app.config.get('DASHBOARD_CACHE_TTL', 30)
+        event.listen(db.session, 'after_flush', self._mark_dirty)
+        event.listen(db.session, 'after_commit', self._invalidate_if_dirty)
+        event.listen(db.session, 'after_rollback', self._clear_dirty)
+
+    def invalidate(self):
+        """Drop cached summaries (call after writes that bypass the ORM)"""
+        self.dashboard_cache.invalidate()
+
+    def cache_stats(self):
+        """Hit/miss counters of the analytics caches"""
+        return {'dashboard': self.dashboard_cache.stats()}
+
+    def get_dashboard_summary(self):
+        """
+        Dashboard counters, served from the TTL cache when possible
+
+        Returns:
+            dict: total_events, upcoming_events, total_guests,
+                  total_bookings, total_budget and rsvp_stats
+        """
+        today = date.today()
+        return self.dashboard_cache.get_or_set(
+            ('dashboard', today), lambda: self._query_dashboard_summary(today)
+        )
+
+    def _query_dashboard_summary(self, today):
+        """All dashboard counters in a single round trip"""
+        event_totals = select(
+            func.count(Event.id).label('total_events'),
+            count_if(Event.event_date >= today).label('upcoming_events'),
+            func.coalesce(func.sum(Event.budget), 0).label('total_budget'),
+        ).subquery()
+
+        guest_totals = select(
+            _sum(EventRollup.total_guests).label('total_guests'),
+            _sum(EventRollup.total_bookings).label('total_bookings'),
+            _sum(EventRollup.rsvp_accepted).label('accepted'),
+            _sum(EventRollup.rsvp_pending).label('pending'),
+            _sum(EventRollup.rsvp_declined).label('declined'),
+        ).subquery()
+
+        row = db.session.execute(
+            select(event_totals, guest_totals).select_from(event_totals.join(guest_totals, true()))
+        ).one()
+
+        return {
+            'total_events': row.total_events,
+            'upcoming_events': int(row.upcoming_events),
+            'total_guests': int(row.total_guests),
+            'total_bookings': int(row.total_bookings),
+            'total_budget': float(row.total_budget),
+            'rsvp_stats': {
+                'accepted': int(row.accepted),
+                'pending': int(row.pending),
+                'declined': int(row.declined)
+            }
+        }
+
+    # ---- cache invalidation hooks ----
+
+    @staticmethod
+    def _mark_dirty(session, flush_context):
+        tracked = (Event, Guest, Booking)
+        if any(isinstance(obj, tracked) for obj in (*session.new, *session.dirty, *session.deleted)):
+            session.info['analytics_dirty'] = True
+
+    def _invalidate_if_dirty(self, session):
+        if session.info.pop('analytics_dirty', False):
+            self.invalidate()
+
+    @staticmethod
+    def _clear_dirty(session):
+        session.info.pop('analytics_dirty', None)
+
+    def get_stats(self):
+        """
+        Overall totals for the analytics dashboard
+
+        Returns:
+            dict: Same keys the analytics template expects
+        """
+        totals = db.session.query(
+            _sum(EventRollup.total_guests),
+            _sum(EventRollup.checked_in),
+            _sum(EventRollup.rsvp_accepted),
+            _sum(EventRollup.rsvp_declined),
+            _sum(EventRollup.rsvp_pending),
+            _sum(EventRollup.total_bookings),
+            _sum(EventRollup.total_cost),
+        ).one()
+
+        event_totals = db.session.query(
+            func.count(Event.id),
+            _sum(Event.budget),
+        ).one()
+
+        return {
+            'total_events': event_totals[0],
+            'total_guests': int(totals[0]),
+            'total_bookings': int(totals[5]),
+            'checked_in_count': int(totals[1]),
+            'rsvp_accepted': int(totals[2]),
+            'rsvp_declined': int(totals[3]),
+            'rsvp_pending': int(totals[4]),
+            'total_budget': float(event_totals[1]),
+            'total_actual_cost': float(totals[6])
+        }
+
+    def get_event_stats(self):
+        """
+        Per-event guest, check-in and RSVP counts
+
+        Returns:
+            list: One dict per event, ordered by event id
+        """
+        rows = db.session.query(
+            Event.name,
+            Event.budget,
+            func.coalesce(EventRollup.total_guests, 0),
+            func.coalesce(EventRollup.checked_in, 0),
+            func.coalesce(EventRollup.rsvp_accepted, 0),
+            func.coalesce(EventRollup.total_cost, 0),
+        ).outerjoin(
+            EventRollup, EventRollup.event_id == Event.id
+        ).order_by(Event.id).all()
+
+        event_stats = []
+        for name, budget, guest_count, checked_in, accepted, actual_cost in rows:
+            event_stats.append({
+                'name': name,
+                'guest_count': int(guest_count),
+                'checked_in': int(checked_in),
+                'accepted': int(accepted),
+                'budget': float(budget) if budget else 0,
+                'actual_cost': float(actual_cost)
+            })
+        return event_stats
+
+    def get_monthly_events(self):
+        """
+        Number of events per month
+
+        Returns:
+            dict: 'YYYY-MM' -> event count
+        """
+        year = extract('year', Event.event_date)
+        month = extract('month', Event.event_date)
+        rows = db.session.query(
+            year, month, func.count(Event.id)
+        ).filter(
+            Event.event_date.isnot(None)
+        ).group_by(year, month).order_by(year, month).all()
+
+        return {f"{int(y):04d}-{int(m):02d}": count for y, m, count in rows}
+
+    @staticmethod
+    def _filter_events(query, event_id_column, event_ids=None, since=None):
+        """
+        Restrict a query to a set of events
+
+        Args:
+            query: Query to filter
+            event_id_column: Column holding the event id in the query
+            event_ids (list): Only include these event ids (optional)
+            since (date): Only include events on or after this date (optional)
+        """
+        if event_ids:
+            query = query.filter(event_id_column.in_(event_ids))
+        if since:
+            if event_id_column is not Event.id:
+                query = query.join(Event, Event.id == event_id_column)
+            query = query.filter(Event.event_date >= since)
+        return query
+
+    def get_guest_breakdown(self, event_ids=None, since=None):
+        """
+        RSVP and check-in distribution in one aggregate query
+
+        Returns:
+            tuple: (rsvp dict, checkin dict)
+        """
+        query = db.session.query(
+            _sum(EventRollup.total_guests),
+            _sum(EventRollup.rsvp_accepted),
+            _sum(EventRollup.rsvp_declined),
+            _sum(EventRollup.rsvp_pending),
+            _sum(EventRollup.checked_in),
+        )
+        total, accepted, declined, pending, checked_in = self._filter_events(
+            query, EventRollup.event_id, event_ids, since
+        ).one()
+
+        rsvp = {
+            'accepted': int(accepted),
+            'declined': int(declined),
+            'pending': int(pending)
+        }
+        checkin = {
+            'checked_in': int(checked_in),
+            'not_checked_in': int(total) - int(checked_in)
+        }
+        return rsvp, checkin
+
+    def get_top_events_by_guests(self, limit=10, event_ids=None, since=None):
+        """
+        Events with the most guests, ranked in SQL
+
+        Returns:
+            list: [{'event': name, 'guests': count}, ...]
+        """
+        guest_count = func.coalesce(EventRollup.total_guests, 0).label('guests')
+        query = db.session.query(
+            Event.name, guest_count
+        ).outerjoin(EventRollup, EventRollup.event_id == Event.id)
+        rows = self._filter_events(
+            query, Event.id, event_ids, since
+        ).order_by(guest_count.desc(), Event.id).limit(limit).all()
+
+        return [{'event': name, 'guests': int(guests)} for name, guests in rows]
+
+    def get_budget_breakdown(self, event_ids=None, since=None):
+        """
+        Budget against booking cost for events that have a budget
+
+        Returns:
+            list: [{'event': name, 'budget': float, 'actual': float}, ...]
+        """
+        query = db.session.query(
+            Event.name, Event.budget, func.coalesce(EventRollup.total_cost, 0)
+        ).outerjoin(
+            EventRollup, EventRollup.event_id == Event.id
+        ).filter(Event.budget > 0)
+        rows = self._filter_events(
+            query, Event.id, event_ids, since
+        ).order_by(Event.id).all()
+
+        return [{
+            'event': name,
+            'budget': float(budget or 0),
+            'actual': float(actual)
+        } for name, budget, actual in rows]
+
+
+# Initialize global service instance
+analytics_service = AnalyticsService()
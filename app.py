@@ -1,16 +1,30 @@
-from flask import Flask, render_template, request, redirect, url_for, flash, jsonify, session, send_file
-from models import db, Event, Guest, Booking, User
+from flask import Flask, render_template, request, redirect, url_for, flash, jsonify, session, send_file, Response, stream_with_context
+from models import db, Event, Guest, Booking, User, Campaign, create_missing_indexes
 from config import Config
 from datetime import datetime
-from sqlalchemy import func
 from functools import wraps
-import re
 import random
 import os
 import json
-from twilio_service import twilio_service
-from qr_service import qr_service
+import click
+from sms_service import sms_service
+from otp_store import otp_store, OTPRateLimited
+from password_service import password_service, PasswordHasherBusy
+from qr_service import qr_service, IMAGE_FORMATS
 from email_service import email_otp_service
+from outbox_service import outbox_service
+from campaign_service import campaign_service
+from reminder_service import reminder_service
+from analytics_service import analytics_service
+from pagination import paginate_keyset
+from query_budget import query_budget
+from validators import validate_gmail, validate_phone
+from rollup_service import rollup_service, CapacityExceeded
+from search_service import search_service
+from export_service import export_service
+from import_service import guest_import_service
+from checkin_service import checkin_service, CheckInResult, MAX_SYNC_BATCH
+from qr_batch_service import qr_batch_service
 
 app = Flask(__name__)
 app.config.from_object(Config)
@@ -30,28 +44,29 @@ def test():
 
 # Initialize database
 db.init_app(app)
+rollup_service.init_app(app)
+analytics_service.init_app(app)
+checkin_service.init_app(app)
+sms_service.init_app(app)
+otp_store.init_app(app)
+password_service.init_app(app)
+outbox_service.init_app(app, sender=email_otp_service.deliver)
+if email_otp_service.enabled and outbox_service.enabled:
+    email_otp_service.outbox = outbox_service
+campaign_service.init_app(app, sender=email_otp_service.deliver, from_address=email_otp_service.email_user, sms=sms_service)
+reminder_service.init_app(app, channels=[
+    channel for channel, ready in (('Email', email_otp_service.enabled), ('SMS', sms_service.enabled)) if ready
+])
 
 # Create tables if they don't exist
 with app.app_context():
     db.create_all()
+    create_missing_indexes()
+    rollup_service.ensure_populated()
+    search_service.install()
 
 
 # Validation helper functions
-def validate_gmail(email):
-    """Validate that email is a Gmail address"""
-    if not email:
-        return True  # Allow empty email
-    pattern = r'^[a-zA-Z0-9._%+-]+@gmail\.com$'
-    return re.match(pattern, email) is not None
-
-def validate_phone(phone):
-    """Validate that phone is exactly 10 digits"""
-    if not phone:
-        return True  # Allow empty phone
-    pattern = r'^[0-9]{10}$'
-    return re.match(pattern, phone) is not None
-
-
 def validate_future_date(date_str):
     """Validate that the date is today or in the future"""
     try:
@@ -68,6 +83,16 @@ def generate_otp():
     return str(random.randint(100000, 999999))
 
 
+def get_page_args():
+    """Read keyset pagination parameters (?after=, ?before=, ?per_page=)"""
+    try:
+        per_page = int(request.args.get('per_page', app.config['PAGE_SIZE']))
+    except ValueError:
+        per_page = app.config['PAGE_SIZE']
+    per_page = max(1, min(per_page, app.config['MAX_PAGE_SIZE']))
+    return request.args.get('after'), request.args.get('before'), per_page
+
+
 # Login required decorator (temporarily disabled for testing)
 def login_required(f):
     @wraps(f)
@@ -103,7 +128,18 @@ def login():
             (User.username == username) | (User.email == username)
         ).first()
         
-        if user and user.check_password(password):
+        try:
+            if user:
+                valid = user.check_password(password)
+                db.session.commit()  # keeps a hash upgraded to the current parameters
+            else:
+                # Same hashing cost as a wrong password, so usernames cannot be probed by timing
+                valid, _ = password_service.verify(None, password)
+        except PasswordHasherBusy as e:
+            flash(str(e), 'error')
+            return render_template('auth/login.html'), 503
+        
+        if valid:
             session['user_id'] = user.id
             session['username'] = user.username
             session['full_name'] = user.full_name
@@ -260,10 +296,10 @@ def verify_registration_otp():
             return jsonify({'success': False, 'message': 'No pending registration found'}), 400
         
         pending = session['pending_registration']
-        stored_otp = pending.get('otp')
+        result = otp_store.verify('register', pending['phone'], user_otp)
         
         # Verify OTP
-        if str(stored_otp) == str(user_otp):
+        if result.success:
             # Create username from phone
             username = f"user_{pending['phone']}"
             
@@ -294,7 +330,7 @@ def verify_registration_otp():
                 'redirect': url_for('dashboard')
             })
         else:
-            return jsonify({'success': False, 'message': 'Invalid OTP'}), 400
+            return jsonify({'success': False, 'message': result.message}), 400
             
     except Exception as e:
         db.session.rollback()
@@ -323,21 +359,23 @@ def mobile_login():
                     'message': 'Phone number not registered. Please sign up first.'
                 }), 404
             
-            # Generate OTP
-            otp = twilio_service.generate_otp()
+            # Generate OTP (rate limited per phone number)
+            try:
+                otp = otp_store.issue('login', phone)
+            except OTPRateLimited as e:
+                return jsonify({'success': False, 'message': str(e), 'retry_after': e.retry_after}), 429
             
             # Send OTP
-            success, message, message_sid = twilio_service.send_otp(
+            success, message, message_sid = sms_service.send_otp(
                 phone,
                 otp,
                 "Login Verification"
             )
             
             if success:
-                # Store OTP in session
+                # Remember who is logging in; the code itself stays in the OTP store
                 session['login_otp'] = {
                     'phone': phone,
-                    'otp': otp,
                     'user_id': user.id,
                     'timestamp': datetime.utcnow().isoformat()
                 }
@@ -347,6 +385,7 @@ def mobile_login():
                     'phone': phone
                 })
             else:
+                otp_store.discard('login', phone)
                 return jsonify({'success': False, 'message': message}), 500
                 
         except Exception as e:
@@ -365,10 +404,10 @@ def verify_login_otp():
             return jsonify({'success': False, 'message': 'No pending login found'}), 400
         
         login_data = session['login_otp']
-        stored_otp = login_data.get('otp')
+        result = otp_store.verify('login', login_data['phone'], user_otp)
         
         # Verify OTP
-        if str(stored_otp) == str(user_otp):
+        if result.success:
             user = User.query.get(login_data['user_id'])
             
             if user:
@@ -386,7 +425,9 @@ def verify_login_otp():
             else:
                 return jsonify({'success': False, 'message': 'User not found'}), 404
         else:
-            return jsonify({'success': False, 'message': 'Invalid OTP'}), 400
+            if result.status != result.INVALID:
+                session.pop('login_otp', None)
+            return jsonify({'success': False, 'message': result.message}), 400
             
     except Exception as e:
         return jsonify({'success': False, 'message': f'Error: {str(e)}'}), 500
@@ -404,41 +445,35 @@ def index():
 @login_required
 def dashboard():
     """Main dashboard showing overview of all events"""
-    total_events = Event.query.count()
-    upcoming_events = Event.query.filter(Event.event_date >= datetime.now().date()).count()
-    total_guests = Guest.query.count()
-    total_bookings = Booking.query.count()
+    # Counts, budget and RSVP statistics (one cached aggregate query)
+    summary = analytics_service.get_dashboard_summary()
     
     # Get recent events
     recent_events = Event.query.order_by(Event.created_at.desc()).limit(5).all()
     
-    # Calculate total budget
-    total_budget = db.session.query(func.sum(Event.budget)).scalar() or 0
-    
-    # RSVP statistics
-    rsvp_stats = {
-        'accepted': Guest.query.filter_by(rsvp_status='Accepted').count(),
-        'pending': Guest.query.filter_by(rsvp_status='Pending').count(),
-        'declined': Guest.query.filter_by(rsvp_status='Declined').count()
-    }
-    
     return render_template('dashboard.html', 
-                         total_events=total_events,
-                         upcoming_events=upcoming_events,
-                         total_guests=total_guests,
-                         total_bookings=total_bookings,
+                         total_events=summary['total_events'],
+                         upcoming_events=summary['upcoming_events'],
+                         total_guests=summary['total_guests'],
+                         total_bookings=summary['total_bookings'],
                          recent_events=recent_events,
-                         total_budget=total_budget,
-                         rsvp_stats=rsvp_stats)
+                         total_budget=summary['total_budget'],
+                         rsvp_stats=summary['rsvp_stats'])
 
 
 # ============= EVENT ROUTES =============
 
 @app.route('/events')
+@query_budget(2)
 def events_list():
-    """List all events"""
-    events = Event.query.order_by(Event.event_date.desc()).all()
-    return render_template('events/list.html', events=events)
+    """List events, newest first, one page at a time"""
+    after, before, per_page = get_page_args()
+    try:
+        page = paginate_keyset(Event.query_with_counts(), Event.event_date, Event.id, after, before, per_page)
+    except ValueError as e:
+        flash(str(e), 'error')
+        return redirect(url_for('events_list'))
+    return render_template('events/list.html', events=page.items, pagination=page)
 
 
 def validate_future_date(date_str):
@@ -486,6 +521,7 @@ def event_create():
 
 
 @app.route('/events/<int:id>')
+@query_budget(4)
 def event_detail(id):
     """View event details"""
     event = Event.query.get_or_404(id)
@@ -551,13 +587,60 @@ def event_delete(id):
     return redirect(url_for('events_list'))
 
 
+@app.route('/events/<int:id>/guests.<fmt>')
+@login_required
+def export_event_guests(id, fmt):
+    """Stream an event's guest list as CSV or NDJSON
+    
+    Query params: columns=name,email,...  rsvp_status=Accepted  checked_in=true|false
+    """
+    if fmt not in ('csv', 'ndjson'):
+        return jsonify({'success': False, 'message': 'Format must be csv or ndjson'}), 404
+    
+    event = Event.query.get_or_404(id)
+    
+    try:
+        columns = export_service.parse_columns(request.args.get('columns'))
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+    
+    rsvp_status = request.args.get('rsvp_status')
+    if rsvp_status and rsvp_status not in ('Pending', 'Accepted', 'Declined'):
+        return jsonify({'success': False, 'message': 'rsvp_status must be Pending, Accepted or Declined'}), 400
+    
+    checked_in = request.args.get('checked_in') or None
+    if checked_in is not None:
+        flags = {'true': True, '1': True, 'false': False, '0': False}
+        if checked_in.lower() not in flags:
+            return jsonify({'success': False, 'message': 'checked_in must be true, false, 1 or 0'}), 400
+        checked_in = flags[checked_in.lower()]
+    
+    rows = export_service.iter_guests(event.id, columns, rsvp_status, checked_in)
+    if fmt == 'csv':
+        body, mimetype = export_service.stream_csv(rows, columns), 'text/csv'
+    else:
+        body, mimetype = export_service.stream_ndjson(rows, columns), 'application/x-ndjson'
+    
+    return Response(
+        stream_with_context(body),
+        mimetype=mimetype,
+        headers={'Content-Disposition': f'attachment; filename=event_{event.id}_guests.{fmt}'}
+    )
+
+
 # ============= GUEST ROUTES =============
 
 @app.route('/guests')
+@query_budget(2)
 def guests_list():
-    """List all guests"""
-    guests = Guest.query.order_by(Guest.created_at.desc()).all()
-    return render_template('guests/list.html', guests=guests)
+    """List guests, newest first, one page at a time"""
+    after, before, per_page = get_page_args()
+    try:
+        page = paginate_keyset(Guest.query_with_event(), Guest.created_at, Guest.id, after, before, per_page)
+    except ValueError as e:
+        flash(str(e), 'error')
+        return redirect(url_for('guests_list'))
+    return render_template('guests/list.html', guests=page.items, pagination=page)
 
 
 @app.route('/guests/<int:id>/qr')
@@ -590,15 +673,6 @@ def guest_create():
                 events = Event.query.all()
                 return render_template('guests/create.html', events=events)
             
-            # Check venue capacity
-            event = Event.query.get(event_id)
-            if event and event.venue_capacity:
-                current_guests = db.session.query(func.sum(Guest.guest_count)).filter_by(event_id=event_id).scalar() or 0
-                if current_guests + guest_count > event.venue_capacity:
-                    flash(f'Error: Adding {guest_count} guests would exceed venue capacity of {event.venue_capacity}. Current guests: {current_guests}', 'error')
-                    events = Event.query.all()
-                    return render_template('guests/create.html', events=events)
-            
             guest = Guest(
                 event_id=event_id,
                 name=request.form['name'],
@@ -609,9 +683,15 @@ def guest_create():
                 dietary_requirements=request.form.get('dietary_requirements')
             )
             db.session.add(guest)
+            # Venue capacity is enforced by the atomic seat counter on commit
             db.session.commit()
             flash('Guest added successfully!', 'success')
             return redirect(url_for('guests_list'))
+        except CapacityExceeded as e:
+            db.session.rollback()
+            flash(f'Error: {str(e)}', 'error')
+            events = Event.query.all()
+            return render_template('guests/create.html', events=events)
         except Exception as e:
             flash(f'Error adding guest: {str(e)}', 'error')
             db.session.rollback()
@@ -620,6 +700,33 @@ def guest_create():
     return render_template('guests/create.html', events=events)
 
 
+@app.route('/guests/import', methods=['GET', 'POST'])
+@login_required
+def guest_import():
+    """Bulk import guests from a CSV or XLSX file"""
+    if request.method == 'POST':
+        upload = request.files.get('file')
+        if not upload or not upload.filename:
+            return jsonify({'success': False, 'message': 'Please choose a CSV or XLSX file'}), 400
+        
+        try:
+            event_id = int(request.form['event_id']) if request.form.get('event_id') else None
+            report = guest_import_service.import_guests(
+                upload.stream,
+                upload.filename,
+                default_event_id=event_id,
+                dry_run=request.form.get('dry_run') in ('1', 'true', 'on')
+            )
+            return jsonify({'success': True, **report})
+        except ValueError as e:
+            return jsonify({'success': False, 'message': str(e)}), 400
+        except Exception as e:
+            return jsonify({'success': False, 'message': f'Error importing guests: {str(e)}'}), 500
+    
+    events = Event.query.all()
+    return render_template('guests/import.html', events=events)
+
+
 @app.route('/guests/<int:id>/edit', methods=['GET', 'POST'])
 def guest_edit(id):
     """Edit a guest"""
@@ -642,7 +749,10 @@ def guest_edit(id):
                 events = Event.query.all()
                 return render_template('guests/edit.html', guest=guest, events=events)
             
-            guest.event_id = int(request.form['event_id'])
+            event_id = int(request.form['event_id'])
+            if event_id != guest.event_id:
+                guest.qr_token = None  # Tokens are signed for one event; the next QR gets a new one
+            guest.event_id = event_id
             guest.name = request.form['name']
             guest.email = email
             guest.phone = phone
@@ -650,9 +760,13 @@ def guest_edit(id):
             guest.guest_count = int(request.form.get('guest_count', 1))
             guest.dietary_requirements = request.form.get('dietary_requirements')
             
+            # Venue capacity is enforced by the atomic seat counter on commit
             db.session.commit()
             flash('Guest updated successfully!', 'success')
             return redirect(url_for('guests_list'))
+        except CapacityExceeded as e:
+            db.session.rollback()
+            flash(f'Error: {str(e)}', 'error')
         except Exception as e:
             flash(f'Error updating guest: {str(e)}', 'error')
             db.session.rollback()
@@ -679,10 +793,16 @@ def guest_delete(id):
 # ============= BOOKING ROUTES =============
 
 @app.route('/bookings')
+@query_budget(2)
 def bookings_list():
-    """List all bookings"""
-    bookings = Booking.query.order_by(Booking.created_at.desc()).all()
-    return render_template('bookings/list.html', bookings=bookings)
+    """List bookings, newest first, one page at a time"""
+    after, before, per_page = get_page_args()
+    try:
+        page = paginate_keyset(Booking.query_with_event(), Booking.created_at, Booking.id, after, before, per_page)
+    except ValueError as e:
+        flash(str(e), 'error')
+        return redirect(url_for('bookings_list'))
+    return render_template('bookings/list.html', bookings=page.items, pagination=page)
 
 
 @app.route('/bookings/create', methods=['GET', 'POST'])
@@ -757,7 +877,39 @@ def booking_delete(id):
     return redirect(url_for('bookings_list'))
 
 
-# ============= OTP ROUTES (TWILIO) =============
+# ============= SEARCH =============
+
+@app.route('/search')
+@login_required
+def search():
+    """Full-text search across guests, events and bookings (JSON)"""
+    query = request.args.get('q', '').strip()
+    kinds = [k for k in request.args.get('type', '').split(',') if k] or None
+    try:
+        page = max(1, int(request.args.get('page', 1)))
+        per_page = int(request.args.get('per_page', 20))
+    except ValueError:
+        return jsonify({'success': False, 'message': 'page and per_page must be integers'}), 400
+    per_page = max(1, min(per_page, app.config['MAX_PAGE_SIZE']))
+    
+    try:
+        results, has_next = search_service.search(query, kinds, page, per_page)
+        return jsonify({
+            'success': True,
+            'query': query,
+            'page': page,
+            'per_page': per_page,
+            'has_next': has_next,
+            'results': results
+        })
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'message': f'Search failed: {str(e)}'
+        }), 500
+
+
+# ============= OTP ROUTES (SMS) =============
 
 @app.route('/guests/<int:id>/send-otp', methods=['POST'])
 def send_guest_otp(id):
@@ -778,22 +930,27 @@ def send_guest_otp(id):
                 'message': 'Invalid phone number format. Must be 10 digits.'
             }), 400
         
-        # Generate OTP
-        otp = twilio_service.generate_otp()
+        # Generate OTP (rate limited per phone number)
+        try:
+            otp = otp_store.issue(f'guest:{guest.id}', guest.phone)
+        except OTPRateLimited as e:
+            return jsonify({
+                'success': False,
+                'message': str(e),
+                'retry_after': e.retry_after
+            }), 429
         
         # Get event name for context
         event_name = guest.event.name if guest.event else None
         
-        # Send OTP via Twilio
-        success, message, message_sid = twilio_service.send_otp(
+        # Send OTP via SMS
+        success, message, message_sid = sms_service.send_otp(
             guest.phone, 
             otp, 
             event_name
         )
         
         if success:
-            # Save OTP to database
-            guest.otp = otp
             guest.otp_verified = False
             db.session.commit()
             
@@ -804,6 +961,7 @@ def send_guest_otp(id):
                 'message_sid': message_sid
             })
         else:
+            otp_store.discard(f'guest:{guest.id}', guest.phone)
             return jsonify({
                 'success': False,
                 'message': message
@@ -829,14 +987,9 @@ def verify_guest_otp(id):
                 'message': 'Please enter OTP'
             }), 400
         
-        if not guest.otp:
-            return jsonify({
-                'success': False,
-                'message': 'No OTP was sent. Please request a new OTP.'
-            }), 400
+        result = otp_store.verify(f'guest:{guest.id}', guest.phone, user_otp)
         
-        # Verify OTP (simple comparison for now)
-        if str(guest.otp) == str(user_otp):
+        if result.success:
             guest.otp_verified = True
             guest.rsvp_status = 'Accepted'
             db.session.commit()
@@ -844,12 +997,12 @@ def verify_guest_otp(id):
             flash('Phone number verified successfully!', 'success')
             return jsonify({
                 'success': True,
-                'message': 'OTP verified successfully!'
+                'message': result.message
             })
         else:
             return jsonify({
                 'success': False,
-                'message': 'Invalid OTP. Please try again.'
+                'message': result.message
             }), 400
             
     except Exception as e:
@@ -873,7 +1026,7 @@ def send_event_reminder(id):
             }), 400
         
         # Send reminder
-        success, message, message_sid = twilio_service.send_event_reminder(
+        success, message, message_sid = sms_service.send_event_reminder(
             guest.phone,
             guest.name,
             event.name,
@@ -905,21 +1058,29 @@ def send_event_reminder(id):
 @app.route('/guests/<int:id>/generate-qr', methods=['GET'])
 @login_required
 def generate_guest_qr(id):
-    """Generate QR code for guest"""
+    """Generate QR code for guest
+    
+    The guest's current signed token (and cached image) is reused;
+    rotate=1 issues a new token, invalidating the printed code.
+    """
     try:
         guest = Guest.query.get_or_404(id)
         
+        token = None if request.args.get('rotate') == '1' else qr_service.reusable_token(guest)
+        
         # Generate QR code
         qr_image, token = qr_service.generate_qr_code(
             guest_id=guest.id,
             event_id=guest.event_id,
-            guest_name=guest.name
+            guest_name=guest.name,
+            token=token
         )
         
         if qr_image and token:
             # Save token to database
-            guest.qr_token = token
-            db.session.commit()
+            if guest.qr_token != token:
+                guest.qr_token = token
+                db.session.commit()
             
             return jsonify({
                 'success': True,
@@ -939,6 +1100,56 @@ def generate_guest_qr(id):
         }), 500
 
 
+@app.route('/guests/<int:id>/qr.<fmt>')
+@login_required
+def guest_qr_image(id, fmt):
+    """Serve a guest's QR code as a PNG or SVG file (cacheable by browsers)"""
+    if fmt not in IMAGE_FORMATS:
+        return jsonify({'success': False, 'message': 'Format must be png or svg'}), 404
+    
+    guest = Guest.query.get_or_404(id)
+    image, token = qr_service.generate_qr_code(
+        guest_id=guest.id,
+        event_id=guest.event_id,
+        guest_name=guest.name,
+        token=qr_service.reusable_token(guest),
+        fmt=fmt
+    )
+    
+    if image is None:
+        return jsonify({'success': False, 'message': 'Failed to generate QR code'}), 500
+    
+    if guest.qr_token != token:
+        guest.qr_token = token
+        db.session.commit()
+    
+    response = Response(image, mimetype=IMAGE_FORMATS[fmt])
+    response.headers['Cache-Control'] = 'private, max-age=86400'
+    response.add_etag()
+    return response.make_conditional(request)
+
+
+@app.route('/events/<int:id>/qr-codes.zip')
+@login_required
+def event_qr_codes_zip(id):
+    """Stream QR codes for every guest of an event as a ZIP
+    
+    Query params: rotate=1 issues new tokens (printed codes stop working)
+    """
+    event = Event.query.get_or_404(id)
+    entries = qr_batch_service.issue_tokens(event.id, rotate=request.args.get('rotate') == '1')
+    files = qr_batch_service.render(event.id, entries)
+    
+    return Response(
+        stream_with_context(qr_batch_service.stream_zip(files)),
+        mimetype='application/zip',
+        headers={
+            'Content-Disposition': f'attachment; filename=event_{event.id}_qr_codes.zip',
+            'X-QR-Count': str(len(entries))
+        }
+    )
+
+
 @app.route('/check-in', methods=['GET', 'POST'])
 def check_in_page():
     """QR code scanner page for check-in"""
@@ -952,44 +1163,41 @@ def check_in_page():
             if not decoded_data:
                 return jsonify({
                     'success': False,
-                    'message': 'Invalid QR code'
+                    'message': 'Invalid or expired QR code'
                 }), 400
             
-            # Find guest
-            guest = Guest.query.get(decoded_data['guest_id'])
+            result = checkin_service.check_in(
+                guest_id=int(decoded_data['guest_id']),
+                event_id=int(decoded_data['event_id']),
+                token=decoded_data['token']
+            )
             
-            if not guest:
+            if result.status == CheckInResult.NOT_FOUND:
                 return jsonify({
                     'success': False,
                     'message': 'Guest not found'
                 }), 404
             
-            # Verify token matches
-            if guest.qr_token != decoded_data['token']:
+            if result.status == CheckInResult.INVALID_TOKEN:
                 return jsonify({
                     'success': False,
                     'message': 'Invalid or expired QR code'
                 }), 400
             
-            # Check if already checked in
-            if guest.checked_in:
+            if result.status == CheckInResult.ALREADY_CHECKED_IN:
+                checked_in_at = f' at {result.check_in_time.strftime("%I:%M %p")}' if result.check_in_time else ''
                 return jsonify({
                     'success': False,
-                    'message': f'{guest.name} is already checked in at {guest.check_in_time.strftime("%I:%M %p")}',
+                    'message': f'{result.guest_name} is already checked in{checked_in_at}',
                     'already_checked_in': True
                 }), 400
             
-            # Mark as checked in
-            guest.checked_in = True
-            guest.check_in_time = datetime.now()  # Local time (India timezone)
-            db.session.commit()
-            
             return jsonify({
                 'success': True,
-                'message': f'✅ Welcome {guest.name}! Check-in successful!',
-                'guest_name': guest.name,
-                'event_name': guest.event.name,
-                'check_in_time': guest.check_in_time.strftime('%I:%M %p')
+                'message': f'✅ Welcome {result.guest_name}! Check-in successful!',
+                'guest_name': result.guest_name,
+                'event_name': result.event_name,
+                'check_in_time': result.check_in_time.strftime('%I:%M %p')
             })
             
         except Exception as e:
@@ -1002,6 +1210,54 @@ def check_in_page():
     return render_template('check_in/scanner.html')
 
 
+@app.route('/check-in/sync', methods=['POST'])
+def check_in_sync():
+    """Apply a batch of scans queued by an offline scanner"""
+    try:
+        scans = (request.get_json(silent=True) or {}).get('scans')
+        
+        if not isinstance(scans, list) or not scans:
+            return jsonify({
+                'success': False,
+                'message': 'Send a non-empty "scans" list'
+            }), 400
+        
+        if len(scans) > MAX_SYNC_BATCH:
+            return jsonify({
+                'success': False,
+                'message': f'At most {MAX_SYNC_BATCH} scans per sync'
+            }), 413
+        
+        results = checkin_service.sync(scans)
+        
+        return jsonify({
+            'success': True,
+            'checked_in': sum(1 for r in results if r['status'] == CheckInResult.OK),
+            'results': results
+        })
+        
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'message': f'Error: {str(e)}'
+        }), 500
+
+
+@app.route('/events/<int:id>/check-in-manifest', methods=['GET'])
+@login_required
+def event_check_in_manifest(id):
+    """Token manifest for scanners that need to work offline"""
+    manifest = checkin_service.build_manifest(id)
+    
+    if manifest is None:
+        return jsonify({
+            'success': False,
+            'message': 'Event not found'
+        }), 404
+    
+    return jsonify(dict(manifest, success=True))
+
+
 @app.route('/guests/<int:id>/check-in-status', methods=['GET'])
 @login_required
 def guest_check_in_status(id):
@@ -1023,6 +1279,115 @@ def guest_check_in_status(id):
         }), 500
 
 
+# ============= CAMPAIGNS =============
+
+@app.route('/events/<int:id>/campaigns', methods=['GET'])
+@login_required
+def event_campaigns(id):
+    """Campaigns of an event, newest first"""
+    event = Event.query.get_or_404(id)
+    campaigns = Campaign.query.filter_by(event_id=event.id).order_by(Campaign.id.desc()).all()
+    
+    return jsonify({
+        'success': True,
+        'campaigns': [campaign.to_dict() for campaign in campaigns]
+    })
+
+
+@app.route('/events/<int:id>/campaigns', methods=['POST'])
+@login_required
+def create_event_campaign(id):
+    """Create an invite/reminder campaign and start sending it in the background"""
+    event = Event.query.get_or_404(id)
+    data = request.get_json(silent=True) or request.form
+    channel = data.get('channel', 'Email')
+    
+    if (channel == 'SMS' and not sms_service.enabled) or (channel != 'SMS' and not email_otp_service.enabled):
+        return jsonify({
+            'success': False,
+            'message': f'{channel} service not configured'
+        }), 400
+    
+    rsvp_statuses = data.get('rsvp_status') or []
+    if isinstance(rsvp_statuses, str):
+        rsvp_statuses = rsvp_statuses.split(',')
+    
+    try:
+        campaign = campaign_service.create(
+            event,
+            name=data.get('name') or f"{data.get('kind', 'Custom')} - {event.name}",
+            kind=data.get('kind', 'Custom'),
+            subject=data.get('subject'),
+            body=data.get('body'),
+            rsvp_statuses=[status.strip() for status in rsvp_statuses],
+            channel=channel
+        )
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'message': str(e)
+        }), 400
+    
+    campaign_service.start(campaign.id)
+    
+    return jsonify({
+        'success': True,
+        'campaign': campaign.to_dict()
+    }), 202
+
+
+@app.route('/events/<int:id>/send-reminders', methods=['POST'])
+@login_required
+def send_event_reminders(id):
+    """SMS reminder to every guest of an event (Accepted and Pending RSVPs by default)"""
+    event = Event.query.get_or_404(id)
+    data = request.get_json(silent=True) or request.form
+    
+    if not sms_service.enabled:
+        return jsonify({
+            'success': False,
+            'message': 'SMS service not configured'
+        }), 400
+    
+    rsvp_statuses = data.get('rsvp_status') or ['Accepted', 'Pending']
+    if isinstance(rsvp_statuses, str):
+        rsvp_statuses = rsvp_statuses.split(',')
+    
+    try:
+        campaign = campaign_service.create(
+            event,
+            name=f'SMS reminder - {event.name}',
+            kind='Reminder',
+            body=data.get('body'),
+            rsvp_statuses=[status.strip() for status in rsvp_statuses],
+            channel='SMS'
+        )
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'message': str(e)
+        }), 400
+    
+    campaign_service.start(campaign.id)
+    
+    return jsonify({
+        'success': True,
+        'campaign': campaign.to_dict()
+    }), 202
+
+
+@app.route('/campaigns/<int:id>', methods=['GET'])
+@login_required
+def campaign_status(id):
+    """Progress of a campaign"""
+    campaign = Campaign.query.get_or_404(id)
+    
+    return jsonify({
+        'success': True,
+        'campaign': campaign.to_dict()
+    })
+
+
 # ============= FEATURE 3: ANALYTICS DASHBOARD =============
 
 @app.route('/analytics')
@@ -1030,49 +1395,19 @@ def guest_check_in_status(id):
 def analytics_dashboard():
     """Analytics dashboard with charts and statistics"""
     try:
-        # Get all data
-        events = Event.query.all()
-        guests = Guest.query.all()
-        bookings = Booking.query.all()
-        
-        # Calculate statistics
-        stats = {
-            'total_events': len(events),
-            'total_guests': len(guests),
-            'total_bookings': len(bookings),
-            'checked_in_count': len([g for g in guests if g.checked_in]),
-            'rsvp_accepted': len([g for g in guests if g.rsvp_status == 'Accepted']),
-            'rsvp_declined': len([g for g in guests if g.rsvp_status == 'Declined']),
-            'rsvp_pending': len([g for g in guests if g.rsvp_status == 'Pending']),
-            'total_budget': sum([float(e.budget) for e in events if e.budget]),
-            'total_actual_cost': 0  # Actual cost tracking not implemented yet
-        }
+        # Calculate statistics with SQL aggregates
+        stats = analytics_service.get_stats()
         
         # Event statistics
-        event_stats = []
-        for event in events:
-            event_guests = [g for g in guests if g.event_id == event.id]
-            event_stats.append({
-                'name': event.name,
-                'guest_count': len(event_guests),
-                'checked_in': len([g for g in event_guests if g.checked_in]),
-                'accepted': len([g for g in event_guests if g.rsvp_status == 'Accepted']),
-                'budget': float(event.budget) if event.budget else 0,
-                'actual_cost': 0  # Actual cost tracking not implemented
-            })
+        event_stats = analytics_service.get_event_stats()
         
         # Monthly event distribution
-        from collections import defaultdict
-        monthly_events = defaultdict(int)
-        for event in events:
-            if event.event_date:
-                month_key = event.event_date.strftime('%Y-%m')
-                monthly_events[month_key] += 1
+        monthly_events = analytics_service.get_monthly_events()
         
         return render_template('analytics/dashboard.html', 
                              stats=stats, 
                              event_stats=event_stats,
-                             monthly_events=dict(monthly_events))
+                             monthly_events=monthly_events)
         
     except Exception as e:
         flash(f'Error loading analytics: {str(e)}', 'error')
@@ -1084,40 +1419,35 @@ def analytics_dashboard():
 def analytics_api():
     """API endpoint for analytics data (for AJAX updates)"""
     try:
-        events = Event.query.all()
-        guests = Guest.query.all()
+        # Optional filters: ?event_ids=1,2,3 and ?since=YYYY-MM-DD
+        event_ids = None
+        if request.args.get('event_ids'):
+            try:
+                event_ids = [int(x) for x in request.args['event_ids'].split(',') if x.strip()]
+            except ValueError:
+                return jsonify({
+                    'success': False,
+                    'message': 'event_ids must be a comma-separated list of integers'
+                }), 400
         
-        # RSVP Distribution
-        rsvp_data = {
-            'accepted': len([g for g in guests if g.rsvp_status == 'Accepted']),
-            'declined': len([g for g in guests if g.rsvp_status == 'Declined']),
-            'pending': len([g for g in guests if g.rsvp_status == 'Pending'])
-        }
+        since = None
+        if request.args.get('since'):
+            try:
+                since = datetime.strptime(request.args['since'], '%Y-%m-%d').date()
+            except ValueError:
+                return jsonify({
+                    'success': False,
+                    'message': 'since must be a date in YYYY-MM-DD format'
+                }), 400
         
-        # Check-in Rate
-        checkin_data = {
-            'checked_in': len([g for g in guests if g.checked_in]),
-            'not_checked_in': len([g for g in guests if not g.checked_in])
-        }
+        # RSVP Distribution and Check-in Rate
+        rsvp_data, checkin_data = analytics_service.get_guest_breakdown(event_ids, since)
         
-        # Guests per Event
-        event_guest_data = []
-        for event in events[:10]:  # Top 10 events
-            guest_count = Guest.query.filter_by(event_id=event.id).count()
-            event_guest_data.append({
-                'event': event.name,
-                'guests': guest_count
-            })
+        # Guests per Event (Top 10 by guest count)
+        event_guest_data = analytics_service.get_top_events_by_guests(10, event_ids, since)
         
         # Budget Analysis
-        budget_data = []
-        for event in events:
-            if event.budget:
-                budget_data.append({
-                    'event': event.name,
-                    'budget': float(event.budget or 0),
-                    'actual': 0  # Actual cost tracking not implemented
-                })
+        budget_data = analytics_service.get_budget_breakdown(event_ids, since)
         
         return jsonify({
             'success': True,
@@ -1134,5 +1464,111 @@ def analytics_api():
         }), 500
 
 
+@app.route('/analytics/api/cache-stats')
+@login_required
+def analytics_cache_stats():
+    """Hit/miss counters of the dashboard and QR image caches"""
+    return jsonify({
+        'success': True,
+        'caches': dict(analytics_service.cache_stats(), qr_images=qr_service.image_cache.stats())
+    })
+
+
+@app.route('/analytics/api/outbox-stats')
+@login_required
+def analytics_outbox_stats():
+    """Email outbox depth and delivery counters"""
+    return jsonify({
+        'success': True,
+        'outbox': outbox_service.stats(),
+        'smtp_pool': email_otp_service.pool.stats() if email_otp_service.pool else None
+    })
+
+
+# ============= CLI COMMANDS =============
+
+@app.cli.command('rebuild-rollups')
+def rebuild_rollups_command():
+    """Recompute per-event rollups from the guests and bookings tables"""
+    count = rollup_service.rebuild()
+    db.session.commit()
+    print(f"✅ Rebuilt rollups for {count} events")
+
+
+@app.cli.command('rebuild-search-index')
+def rebuild_search_index_command():
+    """Re-index guests, events and bookings for full-text search"""
+    search_service.rebuild()
+    print("✅ Search index rebuilt")
+
+
+@app.cli.command('import-guests')
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--event-id', type=int, help='Event for rows without an event_id column')
+@click.option('--dry-run', is_flag=True, help='Validate the file without inserting')
+def import_guests_command(path, event_id, dry_run):
+    """Bulk import guests from a CSV or XLSX file"""
+    with open(path, 'rb') as f:
+        report = guest_import_service.import_guests(f, path, default_event_id=event_id, dry_run=dry_run)
+    
+    for error in report['errors']:
+        print(f"❌ Row {error['row']}: {'; '.join(error['errors'])}")
+    action = 'Validated' if dry_run else 'Imported'
+    print(f"✅ {action} {report['imported']} of {report['total_rows']} rows ({report['failed']} failed)")
+
+
+@app.cli.command('generate-qr-codes')
+@click.argument('event_id', type=int)
+@click.option('--output', '-o', type=click.Path(dir_okay=False), help='ZIP file (default: event_<id>_qr_codes.zip)')
+@click.option('--rotate', is_flag=True, help='Issue new tokens (printed codes stop working)')
+@click.option('--workers', type=int, help='Rendering processes (default: one per CPU)')
+def generate_qr_codes_command(event_id, output, rotate, workers):
+    """Generate QR codes for every guest of an event into a ZIP file"""
+    if db.session.get(Event, event_id) is None:
+        raise click.ClickException(f'Event {event_id} not found')
+    
+    output = output or f'event_{event_id}_qr_codes.zip'
+    entries = qr_batch_service.issue_tokens(event_id, rotate=rotate)
+    
+    with click.progressbar(length=len(entries), label='Rendering QR codes') as bar, open(output, 'wb') as f:
+        files = qr_batch_service.render(event_id, entries, workers=workers, progress=lambda done, total: bar.update(1))
+        for chunk in qr_batch_service.stream_zip(files):
+            f.write(chunk)
+    
+    print(f"✅ Wrote {len(entries)} QR codes to {output}")
+
+
+@app.cli.command('outbox-retry-dead')
+def outbox_retry_dead_command():
+    """Re-queue dead-lettered emails for another round of delivery attempts"""
+    count = outbox_service.retry_dead()
+    print(f"✅ Re-queued {count} dead-lettered email(s)")
+
+
+
+@app.cli.command('send-campaign')
+@click.argument('campaign_id', type=int)
+def send_campaign_command(campaign_id):
+    """Send (or resume) a campaign in the foreground"""
+    campaign = db.session.get(Campaign, campaign_id)
+    if campaign is None:
+        raise click.ClickException(f'Campaign {campaign_id} not found')
+    if not (sms_service.enabled if campaign.channel == 'SMS' else email_otp_service.enabled):
+        raise click.ClickException(f'{campaign.channel} service not configured')
+    
+    campaign_service.run(campaign_id)
+
+
+
+@app.cli.command('send-due-reminders')
+def send_due_reminders_command():
+    """Run one reminder scheduler tick (for cron instead of the background thread)"""
+    if not reminder_service.channels:
+        raise click.ClickException('No reminder channel configured (email or SMS)')
+    
+    campaign_ids = reminder_service.tick()
+    print(f"✅ Sent {len(campaign_ids)} reminder campaign(s)")
+
+
 if __name__ == '__main__':
     app.run(debug=True, port=5001)
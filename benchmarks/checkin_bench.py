@@ -0,0 +1,132 @@
+"""
+Check-in throughput benchmark
+
+Seeds a throwaway SQLite database with one event and N guests holding
+QR tokens, then replays door scans through the old ORM path, the
+single-UPDATE path in checkin_service and the offline batch sync,
+reporting scans per second.
+
+Usage:
+    python benchmarks/checkin_bench.py --guests 20000 --scans 5000
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import date, datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask
+from sqlalchemy import insert, update
+from models import db, Event, Guest
+from rollup_service import rollup_service
+from checkin_service import checkin_service
+
+
+def create_app(db_path):
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{db_path}'
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    db.init_app(app)
+    rollup_service.init_app(app)
+    checkin_service.init_app(app)
+    return app
+
+
+def seed(n_guests):
+    event = Event(name='Benchmark Expo', event_date=date.today(), venue_capacity=None)
+    db.session.add(event)
+    db.session.commit()
+
+    guests = [{
+        'event_id': event.id,
+        'name': f'Guest {i}',
+        'rsvp_status': 'Accepted',
+        'guest_count': 1,
+        'qr_token': f'{i:032x}',
+        'checked_in': False,
+    } for i in range(n_guests)]
+    db.session.execute(insert(Guest), guests)
+    rollup_service.rebuild()
+    db.session.commit()
+    return event.id
+
+
+def reset():
+    db.session.execute(update(Guest).values(checked_in=False, check_in_time=None))
+    rollup_service.rebuild()
+    db.session.commit()
+
+
+def legacy_scan(guest_id, event_id, token):
+    """The previous check_in_page() flow: get, compare, lazy-load event, commit"""
+    guest = db.session.get(Guest, guest_id)
+    if not guest or guest.qr_token != token or guest.checked_in:
+        return False
+    guest.checked_in = True
+    guest.check_in_time = datetime.now()
+    db.session.commit()
+    return bool(guest.event.name)
+
+
+def fast_scan(guest_id, event_id, token):
+    return checkin_service.check_in(guest_id, event_id, token).success
+
+
+def sync_scans(scans, event_id, batch_size=1000):
+    """Offline scanners uploading their queues in batches"""
+    accepted = 0
+    for start in range(0, len(scans), batch_size):
+        results = checkin_service.sync([{
+            'qr_data': json.dumps({'guest_id': guest_id, 'event_id': event_id,
+                                   'token': f'{guest_id - 1:032x}', 'name': ''}),
+            'scanned_at': datetime.now().isoformat()
+        } for guest_id in scans[start:start + batch_size]])
+        accepted += sum(r['status'] == 'ok' for r in results)
+    return accepted
+
+
+def one_by_one(scan):
+    return lambda scans, event_id: sum(scan(guest_id, event_id, f'{guest_id - 1:032x}') for guest_id in scans)
+
+
+def run(label, replay, scans, event_id):
+    start = time.perf_counter()
+    accepted = replay(scans, event_id)
+    elapsed = time.perf_counter() - start
+    print(f"{label:<22} {len(scans):>7} scans  {elapsed:7.2f}s  {len(scans) / elapsed:9.0f} scans/s  "
+          f"({accepted} accepted)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--guests', type=int, default=20000)
+    parser.add_argument('--scans', type=int, default=5000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        app = create_app(os.path.join(tmp, 'bench.db'))
+        with app.app_context():
+            db.create_all()
+            event_id = seed(args.guests)
+
+            # Each guest scanned once, plus 10% repeat scans at the door
+            scans = random.sample(range(1, args.guests + 1), min(args.scans, args.guests))
+            scans += random.sample(scans, len(scans) // 10)
+
+            print(f"📊 {args.guests} guests, {len(scans)} scans (SQLite, one scanner)")
+            run('ORM get + commit', one_by_one(legacy_scan), scans, event_id)
+            reset()
+            run('single UPDATE', one_by_one(fast_scan), scans, event_id)
+            reset()
+            run('batch sync (1000)', sync_scans, scans, event_id)
+            db.session.remove()
+
+
+if __name__ == '__main__':
+    main()
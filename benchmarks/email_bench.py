@@ -0,0 +1,81 @@
+"""
+Email rendering benchmark
+
+Builds N campaign emails two ways and reports messages per second:
+rendering the Jinja template and a fresh MIME tree per recipient, then
+serializing it (the old per-call path), versus the compiled template
+that only encodes the per-recipient fields.
+
+Usage:
+    python benchmarks/email_bench.py --messages 10000
+"""
+
+import argparse
+import os
+import sys
+import time
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from email_template_service import email_template_service, field
+
+SENDER = 'events@example.com'
+CONTEXT = {
+    'event_name': 'Annual Tech Conference 2025',
+    'event_date': '15 November 2025',
+    'event_time': '09:00 AM',
+    'location': 'Convention Center, Delhi',
+}
+BODY = "Hello {name},\n\nYou are invited to {event_name} on {event_date}.\nYour party: {guest_count}.\n\nBest regards,\nNexus Event Management Team"
+
+
+def per_message(recipients):
+    """Jinja render + MIME tree + serialization for every recipient"""
+    parts = email_template_service.templates['campaign']
+    out = []
+    for recipient, values in recipients:
+        context = dict(CONTEXT, body=BODY.format(**CONTEXT, **values))
+        msg = MIMEMultipart('alternative')
+        msg['From'] = SENDER
+        msg['To'] = recipient
+        msg['Subject'] = f"🎉 You're invited, {values['name']}"
+        for subtype, template in parts:
+            msg.attach(MIMEText(template.render(context), subtype))
+        out.append(msg.as_bytes())
+    return out
+
+
+def compiled(recipients):
+    """Compile once, then fill in the guest fields per recipient"""
+    markers = {name: field(name) for name in ('name', 'guest_count')}
+    email = email_template_service.compile(
+        'campaign', SENDER, f"🎉 You're invited, {field('name')}",
+        fields=('name', 'guest_count'),
+        context=dict(CONTEXT, body=BODY.format(**CONTEXT, **markers))
+    )
+    return [msg.data for msg in email.render_batch(recipients)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--messages', type=int, default=10000)
+    args = parser.parse_args()
+
+    recipients = [(f'guest{i}@example.com', {'name': f'Guest {i}', 'guest_count': i % 4 + 1})
+                  for i in range(args.messages)]
+
+    print(f"📊 {args.messages} messages")
+    baseline = None
+    for label, build in (('per-message MIME', per_message), ('compiled template', compiled)):
+        start = time.perf_counter()
+        size = sum(len(data) for data in build(recipients))
+        elapsed = time.perf_counter() - start
+        baseline = baseline or elapsed
+        print(f"{label:<18} {elapsed:7.2f}s  {args.messages / elapsed:8.0f} msgs/s  "
+              f"x{baseline / elapsed:5.1f}  ({size / args.messages:.0f} bytes/msg)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,77 @@
+"""
+Password hashing benchmark: logins per second per core
+
+Checks passwords from 16 concurrent "request" threads through
+PasswordService, hashing on the request thread (0 workers) and on a
+process pool, for each hash method/cost. Alongside, one more thread
+does small pure-Python work the way other requests would; its rate shows
+how much the hashing holds up the rest of the app.
+
+Usage:
+    python benchmarks/password_bench.py --logins 64 --methods pbkdf2:sha256:600000,scrypt:32768:8:1
+"""
+
+import argparse
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from werkzeug.security import generate_password_hash
+from password_service import PasswordService
+
+
+def other_requests(stop, counter):
+    while not stop.is_set():
+        sum(range(1000))
+        counter[0] += 1
+
+
+def run(service, hashes, threads):
+    stop, counter = threading.Event(), [0]
+    background = threading.Thread(target=other_requests, args=(stop, counter))
+    background.start()
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(threads) as executor:
+        results = list(executor.map(lambda item: service.verify(item[0], item[1])[0], hashes))
+    elapsed = time.perf_counter() - start
+
+    stop.set()
+    background.join()
+    assert all(results), 'A password check failed'
+    return elapsed, counter[0] / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--logins', type=int, default=64)
+    parser.add_argument('--threads', type=int, default=16, help='Concurrent request threads')
+    parser.add_argument('--methods', default='pbkdf2:sha256:600000,scrypt:16384:8:1,scrypt:32768:8:1')
+    args = parser.parse_args()
+
+    cpus = os.cpu_count() or 1
+    pools = sorted({0, 1, cpus})
+
+    print(f"📊 {args.logins} logins from {args.threads} threads, {cpus} CPU core(s)")
+    for method in args.methods.split(','):
+        hashes = [(generate_password_hash(f'password-{i}', method), f'password-{i}') for i in range(args.logins)]
+        print(f"\n{method}")
+        for workers in pools:
+            service = PasswordService(method=method, workers=workers, max_pending=args.threads)
+            service.verify(*hashes[0])  # start the pool outside the timing
+            elapsed, background = run(service, hashes, args.threads)
+            service.shutdown()
+
+            cores = min(max(workers, 1), cpus)
+            label = 'request thread' if not workers else f'{workers} process(es)'
+            print(f"  {label:<16} {args.logins / elapsed:8.1f} logins/s  "
+                  f"{args.logins / elapsed / cores:8.1f} /s per core  "
+                  f"other requests {background:9.0f} ops/s")
+
+
+if __name__ == '__main__':
+    main()
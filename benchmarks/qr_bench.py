@@ -0,0 +1,51 @@
+"""
+Bulk QR rendering benchmark
+
+Renders N signed guest QR codes with 1, 2, 4 ... CPU-count worker
+processes and reports codes per second and speed-up over one process.
+Each run starts from an empty image cache in a temporary folder, so
+every code is really rendered and nothing is written to QR_CACHE_DIR.
+
+Usage:
+    python benchmarks/qr_bench.py --codes 2000
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from qr_batch_service import QRBatchService, print_progress
+from qr_service import qr_service, QRImageCache
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--codes', type=int, default=2000)
+    args = parser.parse_args()
+
+    entries = [(i, f'Guest {i}', qr_service.generate_guest_token(i, 1)) for i in range(1, args.codes + 1)]
+    cpus = os.cpu_count() or 1
+    counts = sorted({1, cpus} | {n for n in (2, 4, 8, 16, 32) if n < cpus})
+
+    print(f"📊 {args.codes} QR codes, {cpus} CPUs")
+    baseline = None
+    for workers in counts:
+        service = QRBatchService(workers=workers)
+        with tempfile.TemporaryDirectory() as directory:
+            cache = QRImageCache(directory, 0, qr_service.error_correction)
+            start = time.perf_counter()
+            files = service.render(1, entries, progress=print_progress, cache=cache)
+            size = sum(len(chunk) for chunk in service.stream_zip(files))
+            elapsed = time.perf_counter() - start
+            assert cache.renders == args.codes, 'Every code should have been rendered'
+        baseline = baseline or elapsed
+        print(f"{workers:>3} workers  {elapsed:7.2f}s  {args.codes / elapsed:8.0f} codes/s  "
+              f"x{baseline / elapsed:4.1f}  ({size / 1024 / 1024:.1f} MB zip)")
+
+
+if __name__ == '__main__':
+    main()
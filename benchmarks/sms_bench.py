@@ -0,0 +1,50 @@
+"""
+Bulk SMS benchmark against the local stub provider
+
+Sends N messages through SMSService.send_bulk() with 1, 4, 16 and 32
+worker threads and reports messages per second. The stub simulates
+provider latency and failures, so nothing leaves the machine.
+
+Usage:
+    python benchmarks/sms_bench.py --messages 500 --latency 0.2 --failure-rate 0.02 [--rate 0]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from rate_limit import RateLimiter
+from sms_service import SMSService, StubSMSProvider
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--messages', type=int, default=500)
+    parser.add_argument('--latency', type=float, default=0.2)
+    parser.add_argument('--failure-rate', type=float, default=0.02)
+    parser.add_argument('--rate', type=float, default=0, help='Provider rate limit, messages/s (0 = none)')
+    args = parser.parse_args()
+
+    messages = [(f'98765{i:05d}', f'Hi Guest {i}, reminder: Annual Tech Conference is tomorrow.')
+                for i in range(args.messages)]
+
+    print(f"📊 {args.messages} SMS, {args.latency * 1000:.0f} ms simulated latency, "
+          f"{args.failure_rate:.0%} failures, rate limit {args.rate or 'none'}")
+    for workers in (1, 4, 16, 32):
+        service = SMSService()
+        service.provider = StubSMSProvider(latency=args.latency, failure_rate=args.failure_rate, verbose=False)
+        service.workers = workers
+        service.limiter = RateLimiter(args.rate)
+
+        start = time.perf_counter()
+        results = service.send_bulk(messages)
+        elapsed = time.perf_counter() - start
+        failed = sum(1 for _, error in results if error)
+        print(f"{workers:>3} workers  {elapsed:7.2f}s  {args.messages / elapsed:8.1f} msgs/s  ({failed} failed)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,136 @@
+"""
+Process-local caches for Event Management System
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+
+class TTLCache:
+    """Small thread-safe key/value cache whose entries expire after a TTL"""
+
+    def __init__(self, ttl=30, max_entries=256):
+        """
+        Args:
+            ttl (float): Seconds an entry stays valid (0 disables caching)
+            max_entries (int): Entries kept before the oldest is dropped
+        """
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._data = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def get(self, key):
+        """Return the cached value or None when missing or expired"""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                self.hits += 1
+                return entry[1]
+            if entry is not None:
+                del self._data[key]
+            self.misses += 1
+            return None
+
+    def set(self, key, value):
+        if self.ttl <= 0:
+            return
+        with self._lock:
+            if key not in self._data and len(self._data) >= self.max_entries:
+                self._data.pop(next(iter(self._data)))
+            self._data[key] = (time.monotonic() + self.ttl, value)
+
+    def get_or_set(self, key, factory):
+        """Return the cached value, computing and storing it on a miss"""
+        value = self.get(key)
+        if value is None:
+            value = factory()
+            self.set(key, value)
+        return value
+
+    def invalidate(self, key=None):
+        """Drop one entry, or everything when no key is given"""
+        with self._lock:
+            if key is None:
+                self._data.clear()
+            else:
+                self._data.pop(key, None)
+            self.invalidations += 1
+
+    def stats(self):
+        """Hit/miss counters for monitoring"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'ttl': self.ttl,
+                'entries': len(self._data),
+                'hits': self.hits,
+                'misses': self.misses,
+                'invalidations': self.invalidations,
+                'hit_ratio': round(self.hits / lookups, 4) if lookups else 0.0
+            }
+
+
+class ByteLRUCache:
+    """Thread-safe LRU cache of bytes values, bounded by their total size"""
+
+    def __init__(self, max_bytes=32 * 1024 * 1024):
+        """
+        Args:
+            max_bytes (int): Total size of cached values before the least
+                             recently used ones are evicted (0 disables caching)
+        """
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._data
+
+    def get(self, key):
+        """Return the cached bytes (marking them recently used) or None"""
+        with self._lock:
+            value = self._data.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value):
+        if len(value) > self.max_bytes:
+            return
+        with self._lock:
+            old = self._data.pop(key, None)
+            if old is not None:
+                self.bytes -= len(old)
+            self._data[key] = value
+            self.bytes += len(value)
+            while self.bytes > self.max_bytes:
+                _, evicted = self._data.popitem(last=False)
+                self.bytes -= len(evicted)
+                self.evictions += 1
+
+    def stats(self):
+        """Hit/miss counters and memory use for monitoring"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._data),
+                'bytes': self.bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_ratio': round(self.hits / lookups, 4) if lookups else 0.0
+            }
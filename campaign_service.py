@@ -0,0 +1,425 @@
+"""
+Campaign Service for Event Management System
+Bulk email and SMS invites and reminders to the guests of an event
+"""
+
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from string import Template
+from sqlalchemy import select, insert, update, func, literal, bindparam, or_
+from models import db, Guest, Campaign, CampaignDelivery
+from email_template_service import email_template_service, field
+from rate_limit import RateLimiter
+
+
+guests = Guest.__table__
+campaigns = Campaign.__table__
+deliveries = CampaignDelivery.__table__
+
+# Deliveries a result may still be written over (not finalized by a runner that took over)
+OPEN_DELIVERY = or_(deliveries.c.status == 'Pending', deliveries.c.status == 'Sending')
+
+RSVP_STATUSES = ('Pending', 'Accepted', 'Declined')
+
+# Placeholders filled per guest; the event ones are filled once per campaign
+GUEST_FIELDS = ('name', 'guest_count', 'rsvp_status')
+
+# Default (subject, body) per campaign kind; $placeholders are filled per guest
+DEFAULT_TEMPLATES = {
+    'Invite': (
+        "You're invited: $event_name",
+        "Hello $name,\n\n"
+        "You are invited to $event_name on $event_date at $location.\n\n"
+        "Please let us know if you can make it.\n\n"
+        "Best regards,\nNexus Event Management Team"
+    ),
+    'Reminder': (
+        "Reminder: $event_name on $event_date",
+        "Hello $name,\n\n"
+        "This is a reminder that $event_name takes place on $event_date $event_time at $location.\n\n"
+        "We look forward to seeing you!\n\n"
+        "Best regards,\nNexus Event Management Team"
+    ),
+}
+
+# Default SMS text per campaign kind
+SMS_TEMPLATES = {
+    'Invite': "Hi $name, you're invited to $event_name on $event_date at $location. - Nexus Event",
+    'Reminder': "Hi $name, reminder: $event_name is on $event_date $event_time at $location. See you there! - Nexus Event",
+}
+
+
+class CampaignTakenOver(RuntimeError):
+    """Raised inside run() when another process took over a campaign whose lease expired"""
+
+
+class CampaignService:
+    """Create campaigns and send them in rate-limited batches"""
+
+    def __init__(self, batch_size=200):
+        """
+        Args:
+            batch_size (int): Deliveries loaded, sent and recorded per round
+        """
+        self.batch_size = batch_size
+        self.lease = timedelta(seconds=300)
+        self.app = None
+        self.sender = None
+
+    def init_app(self, app, sender, from_address, sms=None):
+        """
+        Args:
+            app: Flask app (background sends run inside its app context)
+            sender (callable): Delivers one email.message.Message, raising on failure
+            from_address (str): From header of campaign emails
+            sms (SMSService): Sends SMS campaigns (its own rate limit and workers apply)
+        """
+        self.app = app
+        self.sender = sender
+        self.from_address = from_address
+        self.sms = sms
+        self.send_rate = app.config.get('CAMPAIGN_SEND_RATE', 20)
+        self.concurrency = max(1, app.config.get('CAMPAIGN_CONCURRENCY', 4))
+        self.batch_size = app.config.get('CAMPAIGN_BATCH_SIZE', self.batch_size)
+        self.lease = timedelta(seconds=app.config.get('CAMPAIGN_LEASE', 300))
+
+    def create(self, event, name, kind='Custom', subject=None, body=None, rsvp_statuses=None, channel='Email',
+               commit=True):
+        """
+        Create a draft campaign
+
+        Args:
+            event (Event): Target event
+            name (str): Campaign name
+            kind (str): 'Invite', 'Reminder' or 'Custom'
+            subject (str): Subject template (defaults per kind)
+            body (str): Body template with $name, $event_name, $event_date,
+                        $event_time, $location, $guest_count, $rsvp_status
+            rsvp_statuses (list): Only guests with these RSVP statuses (optional)
+            channel (str): 'Email' or 'SMS' (subject is not used for SMS)
+            commit (bool): Commit now (False: only flush, the caller commits)
+
+        Raises:
+            ValueError: For invalid input
+        """
+        if kind not in ('Invite', 'Reminder', 'Custom'):
+            raise ValueError('Kind must be Invite, Reminder or Custom')
+        if channel not in ('Email', 'SMS'):
+            raise ValueError('Channel must be Email or SMS')
+        rsvp_statuses = [status for status in (rsvp_statuses or []) if status]
+        unknown = [status for status in rsvp_statuses if status not in RSVP_STATUSES]
+        if unknown:
+            raise ValueError(f"Unknown RSVP status: {', '.join(unknown)}")
+
+        if channel == 'SMS':
+            subject = None
+            body = body or SMS_TEMPLATES.get(kind)
+        else:
+            default_subject, default_body = DEFAULT_TEMPLATES.get(kind, (None, None))
+            subject = subject or default_subject
+            body = body or default_body
+            if not subject:
+                raise ValueError('Subject is required')
+        if not name or not body:
+            raise ValueError('Name and body are required')
+
+        campaign = Campaign(
+            event_id=event.id,
+            name=name,
+            kind=kind,
+            channel=channel,
+            rsvp_filter=','.join(rsvp_statuses) or None,
+            subject=subject,
+            body=body
+        )
+        db.session.add(campaign)
+        if commit:
+            db.session.commit()
+        else:
+            db.session.flush()
+        return campaign
+
+    def start(self, campaign_id):
+        """Send a campaign from a background thread"""
+        def work():
+            with self.app.app_context():
+                try:
+                    self.run(campaign_id)
+                except Exception as e:
+                    print(f"❌ Campaign {campaign_id} failed: {str(e)}")
+
+        threading.Thread(target=work, name=f'campaign-{campaign_id}', daemon=True).start()
+
+    def run(self, campaign_id):
+        """
+        Send every pending delivery of a campaign
+
+        Recipients are snapshotted with one INSERT ... SELECT over the
+        event's guests; deliveries are then read in id order, batch by
+        batch, rendered (emails from the campaign template compiled once),
+        sent concurrently - over the pooled SMTP connections at
+        CAMPAIGN_SEND_RATE, or through the SMS provider within SMS_RATE -
+        and their status written back with one UPDATE per batch.
+
+        Only one process sends a campaign at a time: run() claims it with
+        a lease renewed every batch, and another process can take it over
+        only once the lease is CAMPAIGN_LEASE seconds old. Deliveries are
+        claimed Pending -> Sending before they are sent, so no guest is
+        messaged twice; a batch that was in flight when a run died is
+        marked failed rather than resent.
+
+        Returns:
+            Campaign: The finished campaign, or None if another process is sending it
+        """
+        runner = self._claim(campaign_id)
+        if runner is None:
+            print(f"⚠️ Campaign {campaign_id} is being sent by another process")
+            return None
+        campaign = db.session.get(Campaign, campaign_id)
+
+        try:
+            if not db.session.execute(
+                select(deliveries.c.id).where(deliveries.c.campaign_id == campaign_id).limit(1)
+            ).first():
+                self._snapshot(campaign)
+            else:
+                # The previous runner stopped mid-batch: those may have gone out, so never resend them
+                self._record(campaign_id, [
+                    (delivery_id, 'Interrupted while sending; not retried') for delivery_id in db.session.execute(
+                        select(deliveries.c.id).where(deliveries.c.campaign_id == campaign_id,
+                                                      deliveries.c.status == 'Sending')
+                    ).scalars()
+                ])
+
+            prepare, send, workers = self._channel(campaign)
+            last_id = 0
+
+            with ThreadPoolExecutor(workers) as executor:
+                while True:
+                    rows = db.session.execute(
+                        select(deliveries.c.id, deliveries.c.recipient, guests.c.name,
+                               guests.c.guest_count, guests.c.rsvp_status)
+                        .join(guests, guests.c.id == deliveries.c.guest_id)
+                        .where(deliveries.c.campaign_id == campaign_id,
+                               deliveries.c.status == 'Pending',
+                               deliveries.c.id > last_id)
+                        .order_by(deliveries.c.id).limit(self.batch_size)
+                    ).all()
+                    if not rows:
+                        break
+                    last_id = rows[-1].id
+                    rows = self._claim_batch(campaign_id, runner, rows)
+
+                    messages, results = [], []
+                    for row in rows:
+                        try:
+                            messages.append((row.id, prepare(row.recipient, {
+                                'name': row.name,
+                                'guest_count': row.guest_count or 1,
+                                'rsvp_status': row.rsvp_status
+                            })))
+                        except ValueError as e:
+                            results.append((row.id, str(e)))
+
+                    results += executor.map(lambda item: self._send_one(send, *item), messages)
+                    self._record(campaign_id, results)
+
+            # Guests deleted after the snapshot never matched the join above
+            self._record(campaign_id, [
+                (delivery_id, 'Guest no longer exists') for delivery_id in db.session.execute(
+                    select(deliveries.c.id).where(deliveries.c.campaign_id == campaign_id,
+                                                  deliveries.c.status == 'Pending')
+                ).scalars()
+            ])
+
+            if not self._release(campaign_id, runner, 'Completed'):
+                raise CampaignTakenOver()
+        except CampaignTakenOver:
+            db.session.rollback()
+            print(f"⚠️ Campaign {campaign_id} was taken over by another process; stopped")
+            return None
+        except Exception as e:
+            db.session.rollback()
+            self._release(campaign_id, runner, 'Failed', str(e)[:1000])
+            raise
+
+        campaign = db.session.get(Campaign, campaign_id)
+        db.session.refresh(campaign)
+        print(f"✅ Campaign {campaign_id} finished: {campaign.sent} sent, {campaign.failed} failed")
+        return campaign
+
+    def claimable(self, now=None):
+        """SQL condition for campaigns nobody is sending (not Sending, or its runner missed CAMPAIGN_LEASE)"""
+        return or_(
+            campaigns.c.status != 'Sending',
+            campaigns.c.heartbeat_at.is_(None),
+            campaigns.c.heartbeat_at < (now or datetime.utcnow()) - self.lease
+        )
+
+    # ---- helpers ----
+
+    def _claim(self, campaign_id):
+        """Take the campaign's lease; returns this runner's ID, or None if it is held"""
+        runner = uuid.uuid4().hex
+        now = datetime.utcnow()
+        claimed = db.session.execute(
+            update(campaigns).where(campaigns.c.id == campaign_id, self.claimable(now)).values(
+                status='Sending',
+                claimed_by=runner,
+                heartbeat_at=now,
+                started_at=func.coalesce(campaigns.c.started_at, now),
+                last_error=None
+            )
+        ).rowcount
+        db.session.commit()
+        return runner if claimed else None
+
+    def _claim_batch(self, campaign_id, runner, rows):
+        """
+        Mark a batch Sending and renew the lease in one transaction
+
+        Returns:
+            list: The rows this runner claimed (others may have been claimed elsewhere)
+
+        Raises:
+            CampaignTakenOver: If the lease was lost
+        """
+        ids = [row.id for row in rows]
+        claim = update(deliveries).where(deliveries.c.status == 'Pending').values(status='Sending')
+        if db.session.execute(claim.where(deliveries.c.id.in_(ids))).rowcount != len(ids):
+            # Some rows were taken meanwhile: claim one by one to learn which are ours
+            db.session.rollback()
+            rows = [row for row in rows if db.session.execute(claim.where(deliveries.c.id == row.id)).rowcount]
+
+        renewed = db.session.execute(
+            update(campaigns).where(campaigns.c.id == campaign_id, campaigns.c.claimed_by == runner)
+            .values(heartbeat_at=datetime.utcnow())
+        ).rowcount
+        if not renewed:
+            raise CampaignTakenOver()
+        db.session.commit()
+        return rows
+
+    def _release(self, campaign_id, runner, status, error=None):
+        """Finish the campaign; False if another runner took it over meanwhile"""
+        values = {'status': status, 'claimed_by': None, 'finished_at': datetime.utcnow()}
+        if error is not None:
+            values['last_error'] = error
+        released = db.session.execute(
+            update(campaigns).where(campaigns.c.id == campaign_id, campaigns.c.claimed_by == runner).values(**values)
+        ).rowcount
+        db.session.commit()
+        return released == 1
+
+    def _snapshot(self, campaign):
+        """Create one Pending delivery per matching guest with an email address (phone for SMS)"""
+        address = guests.c.phone if campaign.channel == 'SMS' else guests.c.email
+        source = select(
+            literal(campaign.id), guests.c.id, address, literal('Pending')
+        ).where(
+            guests.c.event_id == campaign.event_id,
+            address.isnot(None),
+            address != ''
+        )
+        if campaign.rsvp_filter:
+            source = source.where(guests.c.rsvp_status.in_(campaign.rsvp_filter.split(',')))
+
+        db.session.execute(insert(deliveries).from_select(
+            ['campaign_id', 'guest_id', 'recipient', 'status'], source
+        ))
+        campaign.total = db.session.execute(
+            select(func.count()).select_from(deliveries).where(deliveries.c.campaign_id == campaign.id)
+        ).scalar()
+        db.session.commit()
+
+    @staticmethod
+    def _event_context(event):
+        return {
+            'event_name': event.name,
+            'event_date': event.event_date.strftime('%d %B %Y') if event.event_date else '',
+            'event_time': event.event_time.strftime('%I:%M %p') if event.event_time else '',
+            'location': event.location or '',
+        }
+
+    def _channel(self, campaign):
+        """
+        Returns:
+            tuple: (prepare(recipient, guest values) -> message, send(message), worker threads)
+        """
+        context = self._event_context(campaign.event)
+
+        if campaign.channel == 'SMS':
+            if self.sms is None or not self.sms.enabled:
+                raise RuntimeError('SMS service not configured')
+            body = Template(campaign.body)
+            return (
+                lambda recipient, values: (recipient, body.safe_substitute(context, **values)),
+                lambda message: self.sms.deliver(*message),
+                max(1, self.sms.workers)
+            )
+
+        email = self._compile(campaign, context)
+        limiter = RateLimiter(self.send_rate)
+
+        def send(msg):
+            limiter.acquire()
+            self.sender(msg)
+
+        return email.render, send, self.concurrency
+
+    def _compile(self, campaign, context):
+        """Render the campaign email once; only the guest fields are left for each message"""
+        values = dict(context, **{name: field(name) for name in GUEST_FIELDS})
+        return email_template_service.compile(
+            'campaign', self.from_address,
+            subject=Template(campaign.subject).safe_substitute(values),
+            fields=GUEST_FIELDS,
+            context=dict(context, body=Template(campaign.body).safe_substitute(values))
+        )
+
+    @staticmethod
+    def _send_one(send, delivery_id, message):
+        """Send one message; returns (delivery id, error or None)"""
+        try:
+            send(message)
+            return delivery_id, None
+        except Exception as e:
+            return delivery_id, str(e)[:500] or e.__class__.__name__
+
+    def _record(self, campaign_id, results):
+        """
+        Write a batch of outcomes with bulk UPDATEs and bump the campaign counters
+
+        Deliveries already finalized (e.g. by a runner that took over) are left
+        alone, and the counters only count the rows actually written.
+        """
+        if not results:
+            return
+        sent_ids = [delivery_id for delivery_id, error in results if error is None]
+        failures = [{'b_id': delivery_id, 'b_error': error} for delivery_id, error in results if error is not None]
+
+        sent = failed = 0
+        if sent_ids:
+            sent = db.session.execute(
+                update(deliveries).where(deliveries.c.id.in_(sent_ids), OPEN_DELIVERY)
+                .values(status='Sent', sent_at=datetime.utcnow(), error=None)
+            ).rowcount
+        if failures:
+            failed = db.session.execute(
+                update(deliveries).where(deliveries.c.id == bindparam('b_id'), OPEN_DELIVERY)
+                .values(status='Failed', error=bindparam('b_error')),
+                failures
+            ).rowcount
+        db.session.execute(
+            update(campaigns).where(campaigns.c.id == campaign_id).values(
+                sent=campaigns.c.sent + sent,
+                failed=campaigns.c.failed + failed
+            )
+        )
+        db.session.commit()
+
+
+# Initialize global service instance
+campaign_service = CampaignService()
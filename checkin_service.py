@@ -0,0 +1,245 @@
+"""
+Check-in Service for Event Management System
+Fast QR check-in: one conditional UPDATE per scan, offline manifests
+and batch sync for door scanners
+"""
+
+import base64
+import hashlib
+from collections import defaultdict
+from datetime import datetime
+from sqlalchemy import event, select, update
+from models import db, Event, Guest
+from rollup_service import rollup_service
+from analytics_service import analytics_service
+from qr_service import qr_service
+from cache import TTLCache
+
+
+guests = Guest.__table__
+
+# Bytes of SHA-256(token) kept per manifest entry
+MANIFEST_HASH_BYTES = 8
+MAX_SYNC_BATCH = 5000
+
+
+def token_hash(token):
+    """Truncated SHA-256 of a QR token, as listed in offline manifests"""
+    return hashlib.sha256(token.encode()).digest()[:MANIFEST_HASH_BYTES]
+
+
+class CheckInResult:
+    """Outcome of a single scan"""
+
+    OK = 'ok'
+    ALREADY_CHECKED_IN = 'already_checked_in'
+    INVALID_TOKEN = 'invalid_token'
+    NOT_FOUND = 'not_found'
+    INVALID_SCAN = 'invalid_scan'
+
+    def __init__(self, status, guest_name=None, event_name=None, check_in_time=None):
+        self.status = status
+        self.guest_name = guest_name
+        self.event_name = event_name
+        self.check_in_time = check_in_time
+
+    @property
+    def success(self):
+        return self.status == self.OK
+
+    def to_dict(self):
+        return {
+            'status': self.status,
+            'guest_name': self.guest_name,
+            'event_name': self.event_name,
+            'check_in_time': self.check_in_time.strftime('%Y-%m-%d %H:%M:%S') if self.check_in_time else None
+        }
+
+
+class CheckInService:
+    """Door-scanner check-in path"""
+
+    def __init__(self):
+        """Initialize the event name cache"""
+        self.event_names = TTLCache(ttl=300, max_entries=1024)
+
+    def init_app(self, app):
+        """Drop cached event names when events are added, edited or deleted"""
+        event.listen(db.session, 'after_flush', self._mark_events_changed)
+        event.listen(db.session, 'after_commit', self._invalidate_event_names)
+
+    def event_name(self, event_id):
+        """Event name by id, cached so scans do not re-read the events table"""
+        return self.event_names.get_or_set(
+            event_id,
+            lambda: db.session.execute(select(Event.name).where(Event.id == event_id)).scalar()
+        )
+
+    def check_in(self, guest_id, event_id, token, when=None, commit=True):
+        """
+        Check a guest in if the token matches and they are not checked in yet
+
+        The happy path is a single conditional UPDATE (using RETURNING
+        for the guest name where the database supports it); the guest
+        row is only read again to explain a rejected scan.
+
+        Args:
+            guest_id (int): Guest ID from the QR code
+            event_id (int): Event ID from the QR code
+            token (str): QR token from the QR code
+            when (datetime): Check-in time (defaults to now, local time)
+            commit (bool): Commit the transaction (False when batching)
+
+        Returns:
+            CheckInResult: Outcome of the scan
+        """
+        connection = db.session.connection()
+        result = self._mark_checked_in(connection, guest_id, event_id, token, when or datetime.now())
+
+        if not result.success:
+            if commit:
+                db.session.rollback()
+            return result
+
+        rollup_service.apply(connection, {event_id: {'checked_in': 1}})
+        if commit:
+            db.session.commit()
+            analytics_service.invalidate()
+        return result
+
+    def sync(self, scans):
+        """
+        Apply scans queued by an offline scanner in one transaction
+
+        Scans are applied in scanned_at order, so when the same code was
+        scanned at two doors the earliest scan wins and the others are
+        reported as already checked in.
+
+        Args:
+            scans (list): Dicts with qr_data (QR code text) and scanned_at
+                          (ISO timestamp, optional; defaults to now)
+
+        Returns:
+            list: One result dict per scan, in request order, with its index
+        """
+        results = [None] * len(scans)
+        queued = []
+        for index, scan in enumerate(scans):
+            decoded = qr_service.verify_qr_code(scan.get('qr_data')) if isinstance(scan, dict) else None
+            try:
+                scanned_at = datetime.fromisoformat(scan['scanned_at']) if scan.get('scanned_at') else datetime.now()
+                if scanned_at.tzinfo:
+                    scanned_at = scanned_at.astimezone().replace(tzinfo=None)  # Stored as local time
+                if decoded:
+                    queued.append((scanned_at, index, int(decoded['guest_id']),
+                                   int(decoded['event_id']), decoded['token']))
+                else:
+                    results[index] = CheckInResult(CheckInResult.INVALID_TOKEN)
+            except (AttributeError, TypeError, ValueError):
+                results[index] = CheckInResult(CheckInResult.INVALID_SCAN)
+
+        connection = db.session.connection()
+        checked_in = defaultdict(int)
+        try:
+            for scanned_at, index, guest_id, event_id, token in sorted(queued, key=lambda q: (q[0], q[1])):
+                results[index] = self._mark_checked_in(connection, guest_id, event_id, token, scanned_at)
+                if results[index].success:
+                    checked_in[event_id] += 1
+
+            rollup_service.apply(connection, {event_id: {'checked_in': n} for event_id, n in checked_in.items()})
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        if checked_in:
+            analytics_service.invalidate()
+
+        return [dict(result.to_dict(), index=index) for index, result in enumerate(results)]
+
+    def build_manifest(self, event_id):
+        """
+        Compact list of an event's valid tokens for scanners to cache offline
+
+        Entries are sorted by token_hash(token); "hashes" is the base64 of
+        the concatenated hashes, so a scanner binary-searches it and reads
+        the guest at the same position. Tokens themselves are not included.
+
+        Args:
+            event_id (int): Event ID
+
+        Returns:
+            dict: Manifest, or None if the event does not exist
+        """
+        event_name = self.event_name(event_id)
+        if event_name is None:
+            return None
+
+        stmt = select(guests.c.id, guests.c.name, guests.c.qr_token, guests.c.checked_in).where(
+            guests.c.event_id == event_id,
+            guests.c.qr_token.isnot(None)
+        ).execution_options(yield_per=1000)
+        entries = sorted(
+            (token_hash(row.qr_token), row.id, row.name, bool(row.checked_in))
+            for row in db.session.execute(stmt)
+        )
+
+        return {
+            'event_id': event_id,
+            'event_name': event_name,
+            'generated_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+            'hash': f'sha256/{MANIFEST_HASH_BYTES * 8}',
+            'count': len(entries),
+            'hashes': base64.b64encode(b''.join(entry[0] for entry in entries)).decode(),
+            'guests': [[guest_id, name, checked_in] for _, guest_id, name, checked_in in entries]
+        }
+
+    def _mark_checked_in(self, connection, guest_id, event_id, token, when):
+        """Run the conditional UPDATE; the rollup counter is left to the caller"""
+        stmt = update(guests).where(
+            guests.c.id == guest_id,
+            guests.c.event_id == event_id,
+            guests.c.qr_token == token,
+            guests.c.checked_in == False
+        ).values(checked_in=True, check_in_time=when)
+
+        if connection.dialect.update_returning:
+            row = connection.execute(stmt.returning(guests.c.name)).first()
+            updated, guest_name = row is not None, row.name if row else None
+        else:
+            updated = connection.execute(stmt).rowcount == 1
+            guest_name = None
+
+        if not updated:
+            return self._explain_rejection(guest_id, event_id, token)
+
+        if guest_name is None:
+            guest_name = connection.execute(select(guests.c.name).where(guests.c.id == guest_id)).scalar()
+        return CheckInResult(CheckInResult.OK, guest_name, self.event_name(event_id), when)
+
+    def _explain_rejection(self, guest_id, event_id, token):
+        row = db.session.execute(
+            select(guests.c.name, guests.c.event_id, guests.c.qr_token,
+                   guests.c.checked_in, guests.c.check_in_time).where(guests.c.id == guest_id)
+        ).first()
+
+        if row is None:
+            return CheckInResult(CheckInResult.NOT_FOUND)
+        if row.qr_token != token or row.event_id != event_id:
+            return CheckInResult(CheckInResult.INVALID_TOKEN, row.name)
+        return CheckInResult(CheckInResult.ALREADY_CHECKED_IN, row.name,
+                             self.event_name(event_id), row.check_in_time)
+
+    # ---- cache invalidation hooks ----
+
+    @staticmethod
+    def _mark_events_changed(session, flush_context):
+        if any(isinstance(obj, Event) for obj in (*session.new, *session.dirty, *session.deleted)):
+            session.info['event_names_dirty'] = True
+
+    def _invalidate_event_names(self, session):
+        if session.info.pop('event_names_dirty', False):
+            self.event_names.invalidate()
+
+
+# Initialize global service instance
+checkin_service = CheckInService()
@@ -32,5 +32,85 @@ class Config:
             # No password specified
             SQLALCHEMY_DATABASE_URI = f'mysql+pymysql://{DB_USER}@{DB_HOST}/{DB_NAME}'
     
+    # Seconds the dashboard summary is cached (0 disables the cache)
+    DASHBOARD_CACHE_TTL = int(os.getenv('DASHBOARD_CACHE_TTL', 30))
+    
+    # List page sizes (?per_page= is clamped to MAX_PAGE_SIZE)
+    PAGE_SIZE = int(os.getenv('PAGE_SIZE', 50))
+    MAX_PAGE_SIZE = int(os.getenv('MAX_PAGE_SIZE', 200))
+    
+    # Fail list routes that exceed their SQL query budget (N+1 guard)
+    QUERY_BUDGET_STRICT = os.getenv('QUERY_BUDGET_STRICT', 'False').lower() == 'true'
+    
+    # Signed QR check-in tokens
+    # QR_KEY_ID tags new tokens; QR_OLD_KEYS ("id:secret,id:secret") keeps
+    # tokens signed under previous SECRET_KEYs valid after a rotation
+    QR_KEY_ID = os.getenv('QR_KEY_ID', '1')
+    QR_OLD_KEYS = os.getenv('QR_OLD_KEYS', '')
+    QR_TOKEN_TTL_DAYS = int(os.getenv('QR_TOKEN_TTL_DAYS', 180))
+    # Accept unsigned tokens issued before signing was introduced
+    QR_ALLOW_LEGACY_TOKENS = os.getenv('QR_ALLOW_LEGACY_TOKENS', 'True').lower() == 'true'
+    
+    # QR payload: 'compact' (base45 signed token) or 'json'; error correction L/M/Q/H
+    QR_PAYLOAD = os.getenv('QR_PAYLOAD', 'compact')
+    QR_ERROR_CORRECTION = os.getenv('QR_ERROR_CORRECTION', 'M')
+    
+    # Processes used to render QR codes in bulk (0 = one per CPU)
+    QR_WORKERS = int(os.getenv('QR_WORKERS', 0))
+    
+    # Rendered QR images: in-memory LRU size, on-disk cache directory and its size limit (0 = unbounded)
+    QR_CACHE_MAX_BYTES = int(os.getenv('QR_CACHE_MAX_BYTES', 32 * 1024 * 1024))
+    QR_CACHE_DIR = os.getenv('QR_CACHE_DIR', 'static/qr_codes')
+    QR_CACHE_DISK_MAX_BYTES = int(os.getenv('QR_CACHE_DISK_MAX_BYTES', 512 * 1024 * 1024))
+    
+    # Background email outbox (0 workers = send inline during the request)
+    OUTBOX_WORKERS = int(os.getenv('OUTBOX_WORKERS', 2))
+    OUTBOX_MAX_DEPTH = int(os.getenv('OUTBOX_MAX_DEPTH', 10000))
+    OUTBOX_MAX_ATTEMPTS = int(os.getenv('OUTBOX_MAX_ATTEMPTS', 6))
+    OUTBOX_RETRY_BASE = int(os.getenv('OUTBOX_RETRY_BASE', 30))
+    # Days delivered messages are kept before the workers delete them
+    OUTBOX_RETENTION_DAYS = int(os.getenv('OUTBOX_RETENTION_DAYS', 7))
+    
+    # Bulk email campaigns: messages per second, parallel sends (one per pooled SMTP connection), batch size
+    CAMPAIGN_SEND_RATE = float(os.getenv('CAMPAIGN_SEND_RATE', 20))
+    CAMPAIGN_CONCURRENCY = int(os.getenv('CAMPAIGN_CONCURRENCY', os.getenv('EMAIL_POOL_SIZE', 4)))
+    CAMPAIGN_BATCH_SIZE = int(os.getenv('CAMPAIGN_BATCH_SIZE', 200))
+    # Seconds without a heartbeat (one per batch) before another process may take over a campaign
+    CAMPAIGN_LEASE = int(os.getenv('CAMPAIGN_LEASE', 300))
+    
+    # SMS: provider is 'twilio' or 'stub' (local stand-in); empty uses Twilio when configured
+    SMS_PROVIDER = os.getenv('SMS_PROVIDER', '')
+    SMS_RATE = float(os.getenv('SMS_RATE', 10))
+    SMS_WORKERS = int(os.getenv('SMS_WORKERS', 8))
+    SMS_COUNTRY_CODE = os.getenv('SMS_COUNTRY_CODE', '+91')
+    SMS_STUB_LATENCY = float(os.getenv('SMS_STUB_LATENCY', 0.2))
+    SMS_STUB_FAILURE_RATE = float(os.getenv('SMS_STUB_FAILURE_RATE', 0.0))
+    TWILIO_ACCOUNT_SID = os.getenv('TWILIO_ACCOUNT_SID')
+    TWILIO_AUTH_TOKEN = os.getenv('TWILIO_AUTH_TOKEN')
+    TWILIO_PHONE_NUMBER = os.getenv('TWILIO_PHONE_NUMBER')
+    TWILIO_ENABLED = os.getenv('TWILIO_ENABLED', 'False').lower() == 'true'
+    
+    # Automatic reminders: hours before an event, channels, scheduler tick in seconds (0 = off)
+    REMINDER_WINDOWS = os.getenv('REMINDER_WINDOWS', '24,2')
+    REMINDER_CHANNELS = os.getenv('REMINDER_CHANNELS', 'Email,SMS')
+    REMINDER_INTERVAL = int(os.getenv('REMINDER_INTERVAL', 60))
+    
+    # One-time codes: 'memory' (single process) or 'sql' (shared by all processes)
+    OTP_BACKEND = os.getenv('OTP_BACKEND', 'memory')
+    OTP_TTL = int(os.getenv('OTP_TTL', 600))
+    OTP_MAX_ATTEMPTS = int(os.getenv('OTP_MAX_ATTEMPTS', 5))
+    OTP_MEMORY_MAX_ENTRIES = int(os.getenv('OTP_MEMORY_MAX_ENTRIES', 100000))
+    # Codes per phone/email: at most OTP_SEND_LIMIT per OTP_SEND_WINDOW seconds, OTP_RESEND_INTERVAL apart
+    OTP_SEND_LIMIT = int(os.getenv('OTP_SEND_LIMIT', 5))
+    OTP_SEND_WINDOW = int(os.getenv('OTP_SEND_WINDOW', 3600))
+    OTP_RESEND_INTERVAL = int(os.getenv('OTP_RESEND_INTERVAL', 30))
+    
+    # Password hashing: werkzeug method with its cost ('scrypt:32768:8:1', 'pbkdf2:sha256:600000'),
+    # run on PASSWORD_HASH_WORKERS processes (0 = on the request thread); older hashes are upgraded at login
+    PASSWORD_HASH_METHOD = os.getenv('PASSWORD_HASH_METHOD', 'scrypt')
+    PASSWORD_HASH_WORKERS = int(os.getenv('PASSWORD_HASH_WORKERS', 2))
+    PASSWORD_HASH_MAX_PENDING = int(os.getenv('PASSWORD_HASH_MAX_PENDING', 64))
+    PASSWORD_HASH_TIMEOUT = float(os.getenv('PASSWORD_HASH_TIMEOUT', 10))
+    
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     SQLALCHEMY_ECHO = True
@@ -10,6 +10,9 @@ CREATE TABLE IF NOT EXISTS events (
     event_date DATE NOT NULL,
     event_time TIME,
     location VARCHAR(255),
+    latitude DOUBLE,
+    longitude DOUBLE,
+    venue_capacity INT,
     budget DECIMAL(10, 2) DEFAULT 0.00,
     status ENUM('Planning', 'Confirmed', 'Completed', 'Cancelled') DEFAULT 'Planning',
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
@@ -23,9 +26,14 @@ CREATE TABLE IF NOT EXISTS guests (
     name VARCHAR(200) NOT NULL,
     email VARCHAR(255),
     phone VARCHAR(20),
+    otp VARCHAR(6),
+    otp_verified BOOLEAN DEFAULT FALSE,
     rsvp_status ENUM('Pending', 'Accepted', 'Declined') DEFAULT 'Pending',
     guest_count INT DEFAULT 1,
     dietary_requirements TEXT,
+    qr_token VARCHAR(100),
+    checked_in BOOLEAN DEFAULT FALSE,
+    check_in_time DATETIME,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
     FOREIGN KEY (event_id) REFERENCES events(id) ON DELETE CASCADE
@@ -48,6 +56,106 @@ CREATE TABLE IF NOT EXISTS bookings (
     FOREIGN KEY (event_id) REFERENCES events(id) ON DELETE CASCADE
 );
 
+-- Per-event counters (kept in sync by the application, repair with `flask rebuild-rollups`)
+CREATE TABLE IF NOT EXISTS event_rollups (
+    event_id INT PRIMARY KEY,
+    total_guests INT NOT NULL DEFAULT 0,
+    rsvp_accepted INT NOT NULL DEFAULT 0,
+    rsvp_pending INT NOT NULL DEFAULT 0,
+    rsvp_declined INT NOT NULL DEFAULT 0,
+    checked_in INT NOT NULL DEFAULT 0,
+    headcount INT NOT NULL DEFAULT 0,
+    total_bookings INT NOT NULL DEFAULT 0,
+    total_cost DECIMAL(12, 2) NOT NULL DEFAULT 0.00,
+    FOREIGN KEY (event_id) REFERENCES events(id) ON DELETE CASCADE
+);
+
+-- Outgoing email queue (delivered by background workers)
+CREATE TABLE IF NOT EXISTS email_outbox (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    recipient VARCHAR(255) NOT NULL,
+    subject VARCHAR(255),
+    message MEDIUMTEXT NOT NULL,
+    status ENUM('Pending', 'Sending', 'Sent', 'Dead') NOT NULL DEFAULT 'Pending',
+    attempts INT NOT NULL DEFAULT 0,
+    next_attempt_at DATETIME NOT NULL,
+    last_error TEXT,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    sent_at DATETIME,
+    INDEX idx_outbox_status_next (status, next_attempt_at),
+    INDEX idx_outbox_status_sent (status, sent_at)
+);
+
+-- Bulk email campaigns and their per-guest deliveries
+CREATE TABLE IF NOT EXISTS campaigns (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    event_id INT NOT NULL,
+    name VARCHAR(200) NOT NULL,
+    kind ENUM('Invite', 'Reminder', 'Custom') NOT NULL DEFAULT 'Custom',
+    channel ENUM('Email', 'SMS') NOT NULL DEFAULT 'Email',
+    rsvp_filter VARCHAR(100),
+    subject VARCHAR(255),
+    body TEXT NOT NULL,
+    status ENUM('Draft', 'Sending', 'Completed', 'Failed') NOT NULL DEFAULT 'Draft',
+    total INT NOT NULL DEFAULT 0,
+    sent INT NOT NULL DEFAULT 0,
+    failed INT NOT NULL DEFAULT 0,
+    last_error TEXT,
+    claimed_by VARCHAR(32),
+    heartbeat_at DATETIME,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    started_at DATETIME,
+    finished_at DATETIME,
+    FOREIGN KEY (event_id) REFERENCES events(id) ON DELETE CASCADE,
+    INDEX idx_campaign_event (event_id)
+);
+
+CREATE TABLE IF NOT EXISTS campaign_deliveries (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    campaign_id INT NOT NULL,
+    guest_id INT NOT NULL,
+    recipient VARCHAR(255) NOT NULL,
+    status ENUM('Pending', 'Sending', 'Sent', 'Failed') NOT NULL DEFAULT 'Pending',
+    error TEXT,
+    sent_at DATETIME,
+    FOREIGN KEY (campaign_id) REFERENCES campaigns(id) ON DELETE CASCADE,
+    FOREIGN KEY (guest_id) REFERENCES guests(id) ON DELETE CASCADE,
+    UNIQUE KEY uq_delivery_campaign_guest (campaign_id, guest_id),
+    INDEX idx_delivery_campaign_status (campaign_id, status, id)
+);
+
+-- Reminder windows already handled per event (the unique key prevents double sends)
+CREATE TABLE IF NOT EXISTS event_reminders (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    event_id INT NOT NULL,
+    window_hours INT NOT NULL,
+    email_campaign_id INT,
+    sms_campaign_id INT,
+    skipped BOOLEAN NOT NULL DEFAULT FALSE,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (event_id) REFERENCES events(id) ON DELETE CASCADE,
+    FOREIGN KEY (email_campaign_id) REFERENCES campaigns(id) ON DELETE SET NULL,
+    FOREIGN KEY (sms_campaign_id) REFERENCES campaigns(id) ON DELETE SET NULL,
+    UNIQUE KEY uq_reminder_event_window (event_id, window_hours)
+);
+
+-- One-time codes (hashed) and per-recipient send counters for the SQL OTP store
+CREATE TABLE IF NOT EXISTS otp_codes (
+    `key` VARCHAR(191) PRIMARY KEY,
+    code_hash VARCHAR(64) NOT NULL,
+    attempts INT NOT NULL DEFAULT 0,
+    expires_at DATETIME NOT NULL,
+    INDEX idx_otp_expires (expires_at)
+);
+
+CREATE TABLE IF NOT EXISTS otp_rate_limits (
+    recipient VARCHAR(191) PRIMARY KEY,
+    window_start DATETIME NOT NULL,
+    count INT NOT NULL DEFAULT 0,
+    last_sent_at DATETIME NOT NULL,
+    INDEX idx_otp_rate_window (window_start)
+);
+
 -- Create indexes for better performance
 CREATE INDEX idx_event_date ON events(event_date);
 CREATE INDEX idx_event_status ON events(status);
@@ -56,6 +164,19 @@ CREATE INDEX idx_guest_rsvp ON guests(rsvp_status);
 CREATE INDEX idx_booking_event ON bookings(event_id);
 CREATE INDEX idx_booking_status ON bookings(status);
 
+-- Keyset pagination indexes for the list pages
+CREATE INDEX idx_event_date_id ON events(event_date, id);
+CREATE INDEX idx_guest_created_id ON guests(created_at, id);
+CREATE INDEX idx_booking_created_id ON bookings(created_at, id);
+
+-- QR check-in token lookup
+CREATE UNIQUE INDEX idx_guest_qr_token ON guests(qr_token);
+
+-- Full-text search indexes (used by /search)
+ALTER TABLE guests ADD FULLTEXT INDEX ft_guests (name, email, phone);
+ALTER TABLE events ADD FULLTEXT INDEX ft_events (name, location, description);
+ALTER TABLE bookings ADD FULLTEXT INDEX ft_bookings (vendor_name, description);
+
 -- Insert sample data
 INSERT INTO events (name, description, event_date, event_time, location, budget, status) VALUES
 ('Annual Tech Conference 2025', 'A comprehensive technology conference featuring industry leaders', '2025-11-15', '09:00:00', 'Convention Center, Delhi', 500000.00, 'Planning'),
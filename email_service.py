@@ -5,15 +5,193 @@ Send OTP via Gmail SMTP (100% FREE)
 
 import os
 import smtplib
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
+import threading
+import time
+import atexit
+from collections import deque
 from dotenv import load_dotenv
 import random
+from email_template_service import email_template_service, field, PreparedEmail
 
 # Load environment variables
 load_dotenv()
 
 
+class SMTPPoolExhausted(RuntimeError):
+    """Raised when no SMTP connection frees up within the wait timeout"""
+
+
+class SMTPConnectionPool:
+    """
+    Bounded pool of logged-in SMTP connections, safe to share between threads
+    
+    Connections are reused across messages instead of paying for
+    connect + STARTTLS + LOGIN every time. A connection that sat idle
+    for a while is checked with NOOP before reuse, idle ones past the
+    idle timeout are closed, and broken ones are replaced.
+    """
+    
+    # Idle seconds after which a connection is NOOP-checked before reuse
+    HEALTH_CHECK_AFTER = 5
+    
+    def __init__(self, host, port, user, password, max_size=4, idle_timeout=60, timeout=30):
+        """
+        Args:
+            host (str): SMTP host
+            port (int): SMTP port (STARTTLS)
+            user (str): Login user
+            password (str): Login password
+            max_size (int): Maximum open connections (idle + in use)
+            idle_timeout (float): Seconds an unused connection is kept open
+            timeout (float): Socket timeout and maximum wait for a free connection
+        """
+        self.host = host
+        self.port = port
+        self.user = user
+        self.password = password
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self.timeout = timeout
+        self._idle = deque()  # (connection, last used) - most recently used on the right
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(max_size)
+        self.created = 0
+        self.reused = 0
+        self.discarded = 0
+    
+    def _connect(self):
+        server = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        try:
+            server.starttls()
+            server.login(self.user, self.password)
+        except Exception:
+            self._close(server)
+            raise
+        with self._lock:
+            self.created += 1
+        return server
+    
+    @staticmethod
+    def _close(server):
+        try:
+            server.quit()
+        except Exception:
+            try:
+                server.close()
+            except Exception:
+                pass
+    
+    def _discard(self, server):
+        self._close(server)
+        with self._lock:
+            self.discarded += 1
+    
+    def acquire(self, fresh=False):
+        """
+        Check out a logged-in connection (blocks while the pool is at max_size)
+        
+        Args:
+            fresh (bool): Open a new connection instead of reusing an idle one
+        
+        Raises:
+            SMTPPoolExhausted: If no connection frees up within the timeout
+        """
+        if not self._slots.acquire(timeout=self.timeout):
+            raise SMTPPoolExhausted(f"No SMTP connection available after {self.timeout}s")
+        
+        try:
+            while not fresh:
+                with self._lock:
+                    if not self._idle:
+                        break
+                    server, last_used = self._idle.pop()
+                
+                idle_for = time.monotonic() - last_used
+                if idle_for > self.idle_timeout:
+                    self._discard(server)
+                    continue
+                if idle_for > self.HEALTH_CHECK_AFTER:
+                    try:
+                        if server.noop()[0] != 250:
+                            raise smtplib.SMTPServerDisconnected('NOOP failed')
+                    except (smtplib.SMTPException, OSError):
+                        self._discard(server)
+                        continue
+                
+                with self._lock:
+                    self.reused += 1
+                return server
+            
+            return self._connect()
+        except Exception:
+            self._slots.release()
+            raise
+    
+    def release(self, server, broken=False):
+        """Return a connection to the pool (closing it if broken)"""
+        try:
+            if broken:
+                self._discard(server)
+            else:
+                with self._lock:
+                    self._idle.append((server, time.monotonic()))
+        finally:
+            self._slots.release()
+    
+    def send_message(self, msg):
+        """
+        Send a message over a pooled connection
+        
+        Accepts an email.message.Message or an already encoded PreparedEmail.
+        A connection the server dropped while idle is replaced by a new
+        one and the message retried once; other SMTP errors are raised
+        to the caller.
+        """
+        for attempt in range(2):
+            server = self.acquire(fresh=attempt > 0)
+            try:
+                if isinstance(msg, PreparedEmail):
+                    server.sendmail(msg.sender, [msg.recipient], msg.data)
+                else:
+                    server.send_message(msg)
+            except smtplib.SMTPServerDisconnected:
+                self.release(server, broken=True)
+                if attempt:
+                    raise
+                continue
+            except (smtplib.SMTPRecipientsRefused, smtplib.SMTPSenderRefused, smtplib.SMTPDataError):
+                # Message rejected, connection still fine: reset the transaction
+                try:
+                    server.rset()
+                    self.release(server)
+                except (smtplib.SMTPException, OSError):
+                    self.release(server, broken=True)
+                raise
+            except Exception:
+                self.release(server, broken=True)
+                raise
+            self.release(server)
+            return
+    
+    def close_all(self):
+        """Close every idle connection"""
+        with self._lock:
+            idle, self._idle = list(self._idle), deque()
+        for server, _ in idle:
+            self._close(server)
+    
+    def stats(self):
+        """Pool usage counters for monitoring"""
+        with self._lock:
+            return {
+                'max_size': self.max_size,
+                'idle': len(self._idle),
+                'created': self.created,
+                'reused': self.reused,
+                'discarded': self.discarded
+            }
+
+
 class EmailOTPService:
     """Email OTP service for sending verification codes via Gmail"""
     
@@ -24,8 +202,24 @@ class EmailOTPService:
         self.email_user = os.getenv('EMAIL_USER')
         self.email_password = os.getenv('EMAIL_PASSWORD')
         self.enabled = bool(self.email_user and self.email_password)
+        self.pool = None
+        self.outbox = None  # Set by the app to send through the background outbox
         
         if self.enabled:
+            self.pool = SMTPConnectionPool(
+                self.smtp_host, self.smtp_port, self.email_user, self.email_password,
+                max_size=int(os.getenv('EMAIL_POOL_SIZE', 4)),
+                idle_timeout=float(os.getenv('EMAIL_POOL_IDLE_TIMEOUT', 60))
+            )
+            atexit.register(self.pool.close_all)
+            self.otp_email = email_template_service.compile(
+                'otp', self.email_user, f"🔐 Your Nexus Event OTP - {field('otp')}",
+                fields=('user_name', 'purpose', 'otp')
+            )
+            self.welcome_email = email_template_service.compile(
+                'welcome', self.email_user, "🎉 Welcome to Nexus Event Management!",
+                fields=('user_name',)
+            )
             print("✅ Email OTP service initialized successfully")
         else:
             print("⚠️ Email OTP service not configured")
@@ -34,6 +228,17 @@ class EmailOTPService:
         """Generate a random OTP"""
         return ''.join([str(random.randint(0, 9)) for _ in range(length)])
     
+    def dispatch(self, msg):
+        """Queue the message in the outbox if one is attached (sent once the caller commits), else send it now"""
+        if self.outbox is not None:
+            self.outbox.enqueue(msg)
+        else:
+            self.deliver(msg)
+    
+    def deliver(self, msg):
+        """Send a message immediately over a pooled SMTP connection"""
+        self.pool.send_message(msg)
+    
     def send_otp(self, email, otp, user_name="User", purpose="verification"):
         """
         Send OTP via email
@@ -51,94 +256,10 @@ class EmailOTPService:
             return False, "Email service not configured"
         
         try:
-            # Create message
-            msg = MIMEMultipart('alternative')
-            msg['From'] = self.email_user
-            msg['To'] = email
-            msg['Subject'] = f"🔐 Your Nexus Event OTP - {otp}"
-            
-            # HTML email body
-            html_body = f"""
-            <!DOCTYPE html>
-            <html>
-            <head>
-                <style>
-                    body {{ font-family: Arial, sans-serif; margin: 0; padding: 0; background-color: #f4f4f4; }}
-                    .container {{ max-width: 600px; margin: 30px auto; background: white; border-radius: 10px; overflow: hidden; box-shadow: 0 2px 10px rgba(0,0,0,0.1); }}
-                    .header {{ background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); padding: 30px; text-align: center; color: white; }}
-                    .header h1 {{ margin: 0; font-size: 28px; }}
-                    .content {{ padding: 40px 30px; }}
-                    .otp-box {{ background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); color: white; padding: 25px; border-radius: 10px; text-align: center; margin: 30px 0; }}
-                    .otp-code {{ font-size: 42px; font-weight: bold; letter-spacing: 10px; margin: 0; }}
-                    .info {{ color: #666; line-height: 1.6; }}
-                    .footer {{ background: #f8f9fa; padding: 20px; text-align: center; color: #999; font-size: 12px; }}
-                    .warning {{ background: #fff3cd; border-left: 4px solid #ffc107; padding: 15px; margin: 20px 0; color: #856404; }}
-                </style>
-            </head>
-            <body>
-                <div class="container">
-                    <div class="header">
-                        <h1>🎉 Nexus Event Management</h1>
-                        <p style="margin: 10px 0 0 0; opacity: 0.9;">Your OTP Verification Code</p>
-                    </div>
-                    
-                    <div class="content">
-                        <h2 style="color: #333;">Hello {user_name}!</h2>
-                        <p class="info">We received a request for {purpose}. Your verification code is:</p>
-                        
-                        <div class="otp-box">
-                            <p class="otp-code">{otp}</p>
-                        </div>
-                        
-                        <div class="warning">
-                            <strong>⏰ This OTP is valid for 10 minutes only.</strong>
-                        </div>
-                        
-                        <p class="info">
-                            <strong>Security Tips:</strong><br>
-                            🔒 Never share this OTP with anyone<br>
-                            🔒 Nexus Event will never ask for your OTP via phone or email<br>
-                            🔒 If you didn't request this, please ignore this email
-                        </p>
-                        
-                        <p class="info" style="margin-top: 30px;">
-                            Best regards,<br>
-                            <strong>Nexus Event Management Team</strong>
-                        </p>
-                    </div>
-                    
-                    <div class="footer">
-                        <p>© 2025 Nexus Event Management. All rights reserved.</p>
-                        <p>This is an automated email. Please do not reply.</p>
-                    </div>
-                </div>
-            </body>
-            </html>
-            """
-            
-            # Plain text version
-            text_body = f"""
-            Hello {user_name}!
-            
-            Your OTP for {purpose} is: {otp}
-            
-            This OTP is valid for 10 minutes.
+            msg = self.otp_email.render(email, {'user_name': user_name, 'purpose': purpose, 'otp': otp})
             
-            Please do not share this OTP with anyone.
-            
-            Best regards,
-            Nexus Event Management Team
-            """
-            
-            # Attach both HTML and plain text
-            msg.attach(MIMEText(text_body, 'plain'))
-            msg.attach(MIMEText(html_body, 'html'))
-            
-            # Send email
-            with smtplib.SMTP(self.smtp_host, self.smtp_port) as server:
-                server.starttls()
-                server.login(self.email_user, self.email_password)
-                server.send_message(msg)
+            # Queue (or send) the email
+            self.dispatch(msg)
             
             print(f"✅ Email OTP sent to {email}")
             return True, f"OTP sent successfully to {email}"
@@ -154,46 +275,9 @@ class EmailOTPService:
             return False, "Email service not configured"
         
         try:
-            msg = MIMEMultipart('alternative')
-            msg['From'] = self.email_user
-            msg['To'] = email
-            msg['Subject'] = "🎉 Welcome to Nexus Event Management!"
-            
-            html_body = f"""
-            <!DOCTYPE html>
-            <html>
-            <head>
-                <style>
-                    body {{ font-family: Arial, sans-serif; margin: 0; padding: 0; background-color: #f4f4f4; }}
-                    .container {{ max-width: 600px; margin: 30px auto; background: white; border-radius: 10px; overflow: hidden; }}
-                    .header {{ background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); padding: 40px; text-align: center; color: white; }}
-                    .content {{ padding: 40px 30px; }}
-                    .button {{ background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); color: white; padding: 15px 30px; text-decoration: none; border-radius: 5px; display: inline-block; margin: 20px 0; }}
-                </style>
-            </head>
-            <body>
-                <div class="container">
-                    <div class="header">
-                        <h1>🎊 Welcome to Nexus Event!</h1>
-                    </div>
-                    <div class="content">
-                        <h2>Hello {user_name}!</h2>
-                        <p>Thank you for joining Nexus Event Management System.</p>
-                        <p>You can now create and manage events, invite guests, and much more!</p>
-                        <a href="http://localhost:5001/login" class="button">Login to Dashboard</a>
-                        <p>Best regards,<br>Nexus Event Team</p>
-                    </div>
-                </div>
-            </body>
-            </html>
-            """
-            
-            msg.attach(MIMEText(html_body, 'html'))
+            msg = self.welcome_email.render(email, {'user_name': user_name})
             
-            with smtplib.SMTP(self.smtp_host, self.smtp_port) as server:
-                server.starttls()
-                server.login(self.email_user, self.email_password)
-                server.send_message(msg)
+            self.dispatch(msg)
             
             return True, "Welcome email sent"
             
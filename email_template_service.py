@@ -0,0 +1,238 @@
+"""
+Email Template Service for Event Management System
+Jinja email templates compiled once into pre-encoded MIME messages
+"""
+
+import binascii
+import os
+import re
+import secrets
+from email.header import Header
+from jinja2 import Environment, FileSystemLoader, select_autoescape
+from markupsafe import Markup, escape
+
+
+TEMPLATE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'email_templates')
+
+# Body parts per template file extension, in multipart/alternative order
+SUBTYPES = {'.txt': 'plain', '.html': 'html'}
+
+CRLF = b'\r\n'
+
+
+def field(name):
+    """Marker for a per-recipient field inside a subject or campaign text"""
+    return f'\x00{name}\x00'
+
+
+def nl2br(value):
+    """Jinja filter: escape text and keep its line breaks in HTML"""
+    return escape(value).replace('\n', Markup('<br>\n'))
+
+
+def _qp(text):
+    """Quoted-printable bytes with CRLF line ends"""
+    return binascii.b2a_qp(text.replace('\r\n', '\n').encode('utf-8'), istext=True).replace(b'\n', CRLF)
+
+
+def _qp_segment(text):
+    """
+    Quoted-printable bytes for a segment joined to others at render time
+
+    Ends with a soft line break (unless it already ends a line), so the next
+    segment starts a fresh line and joined lines stay within 76 characters.
+    """
+    data = _qp(text)
+    return data + b'=\r\n' if data and not data.endswith(CRLF) else data
+
+
+def _header(value, name='Subject'):
+    """Header value in wire format (RFC 2047 encoded when not ASCII, folded when long)"""
+    if '\r' in value or '\n' in value:
+        raise ValueError('Header values cannot contain line breaks')
+    if value.isascii() and len(name) + 2 + len(value) <= 76:
+        return value.encode('ascii')
+    charset = 'us-ascii' if value.isascii() else 'utf-8'
+    return Header(value, charset, header_name=name).encode(linesep='\r\n').encode('ascii')
+
+
+class PreparedEmail:
+    """A fully encoded message, handed to SMTP as-is"""
+
+    __slots__ = ('sender', 'recipient', 'subject', 'data')
+
+    def __init__(self, sender, recipient, subject, data):
+        self.sender = sender
+        self.recipient = recipient
+        self.subject = subject
+        self.data = data
+
+    def __getitem__(self, name):
+        """Header lookup for the few headers callers read (From, To, Subject)"""
+        return {'from': self.sender, 'to': self.recipient, 'subject': self.subject}.get(name.lower())
+
+    def as_bytes(self):
+        return self.data
+
+    def as_string(self):
+        return self.data.decode('ascii')
+
+
+class CompiledEmail:
+    """
+    An email template rendered once around markers for its per-recipient fields
+
+    Everything outside the markers is encoded to quoted-printable wire
+    bytes up front, so rendering for a recipient only escapes and
+    encodes the field values and joins byte strings.
+    """
+
+    def __init__(self, sender, subject, parts, fields):
+        """
+        Args:
+            sender (str): From address
+            subject (str): Subject text, may contain field() markers
+            parts (list): (subtype, rendered text with markers), e.g. ('plain', ...), ('html', ...)
+            fields (tuple): Per-recipient field names
+        """
+        self.sender = sender
+        self.fields = tuple(fields)
+        self._pattern = re.compile(
+            '\x00(' + '|'.join(re.escape(name) for name in self.fields) + ')\x00'
+        ) if self.fields else None
+
+        # Subject: text pieces and field names alternating
+        self._subject = self._split(subject)
+        self._static_subject = _header(subject) if len(self._subject) == 1 else None
+
+        # Body: wire bytes and (field name, is_html) references alternating
+        boundary = f'=_{secrets.token_hex(12)}'  # '=_' never occurs in quoted-printable text
+        body = [b'\r\nMIME-Version: 1.0\r\n']
+        if len(parts) > 1:
+            body.append(f'Content-Type: multipart/alternative; boundary="{boundary}"\r\n\r\n'.encode('ascii'))
+        for subtype, text in parts:
+            if len(parts) > 1:
+                body.append(f'--{boundary}\r\n'.encode('ascii'))
+            body.append(f'Content-Type: text/{subtype}; charset="utf-8"\r\n'
+                        f'Content-Transfer-Encoding: quoted-printable\r\n\r\n'.encode('ascii'))
+            pieces = self._split(text)
+            for i, piece in enumerate(pieces):
+                if i % 2:
+                    body.append((piece, subtype == 'html'))
+                else:
+                    body.append(_qp_segment(piece) if i < len(pieces) - 1 else _qp(piece))
+            body.append(CRLF)
+        if len(parts) > 1:
+            body.append(f'--{boundary}--\r\n'.encode('ascii'))
+
+        # Merge neighbouring static chunks so rendering joins as few pieces as possible
+        self._body = []
+        for chunk in body:
+            if isinstance(chunk, bytes) and self._body and isinstance(self._body[-1], bytes):
+                self._body[-1] += chunk
+            else:
+                self._body.append(chunk)
+        self._head = f'From: {sender}\r\nTo: '.encode('ascii')
+
+    def _split(self, text):
+        return self._pattern.split(text) if self._pattern else [text]
+
+    def render(self, recipient, values):
+        """
+        Build the message for one recipient
+
+        Args:
+            recipient (str): To address
+            values (dict): Per-recipient field values (missing ones render empty)
+
+        Returns:
+            PreparedEmail: Ready for SMTP
+
+        Raises:
+            ValueError: For a recipient or subject that cannot go in a header
+        """
+        if self._static_subject is None:
+            subject = ''.join(
+                str(values.get(piece, '')) if i % 2 else piece for i, piece in enumerate(self._subject)
+            )
+            subject_bytes = _header(subject)
+        else:
+            subject = self._subject[0]
+            subject_bytes = self._static_subject
+
+        if not recipient.isascii():
+            raise ValueError(f'Unsupported recipient address: {recipient}')
+        out = [self._head, _header(recipient, 'To'), b'\r\nSubject: ', subject_bytes]
+        for chunk in self._body:
+            if isinstance(chunk, bytes):
+                out.append(chunk)
+            else:
+                name, is_html = chunk
+                value = '' if values.get(name) is None else str(values[name])
+                out.append(_qp_segment(str(escape(value)) if is_html else value))
+
+        return PreparedEmail(self.sender, recipient, subject, b''.join(out))
+
+    def render_batch(self, recipients):
+        """
+        Build messages for many recipients
+
+        Args:
+            recipients (iterable): (recipient, values) pairs
+
+        Returns:
+            list: PreparedEmail per recipient, in order
+        """
+        render = self.render
+        return [render(recipient, values) for recipient, values in recipients]
+
+
+class EmailTemplateService:
+    """Loads the email templates once at startup and compiles them on demand"""
+
+    def __init__(self, directory=TEMPLATE_DIR):
+        """
+        Args:
+            directory (str): Folder with <name>.txt and/or <name>.html Jinja templates
+        """
+        self.env = Environment(
+            loader=FileSystemLoader(directory),
+            autoescape=select_autoescape(['html']),
+            auto_reload=False
+        )
+        self.env.filters['nl2br'] = nl2br
+
+        self.templates = {}  # name -> [(subtype, jinja Template)]
+        order = list(SUBTYPES.values())
+        for file_name in sorted(os.listdir(directory)):
+            name, ext = os.path.splitext(file_name)
+            if ext in SUBTYPES:
+                self.templates.setdefault(name, []).append((SUBTYPES[ext], self.env.get_template(file_name)))
+        for parts in self.templates.values():
+            parts.sort(key=lambda part: order.index(part[0]))
+
+    def compile(self, name, sender, subject, fields=(), context=None):
+        """
+        Render a template once for a group of recipients
+
+        Args:
+            name (str): Template name (file name without extension)
+            sender (str): From address
+            subject (str): Subject text, may contain field() markers
+            fields (tuple): Per-recipient fields, filled in by CompiledEmail.render()
+            context (dict): Values shared by every recipient
+
+        Returns:
+            CompiledEmail: Compiled message
+
+        Raises:
+            KeyError: For an unknown template
+        """
+        markers = {field_name: field(field_name) for field_name in fields}
+        variables = dict(context or {}, **markers)
+        parts = [(subtype, template.render(variables)) for subtype, template in self.templates[name]]
+        return CompiledEmail(sender, subject, parts, fields)
+
+
+# Initialize global service instance
+email_template_service = EmailTemplateService()
@@ -0,0 +1,111 @@
+"""
+Export Service for Event Management System
+Stream guest lists as CSV or NDJSON without loading them into memory
+"""
+
+import csv
+import io
+import json
+from datetime import date, datetime
+from sqlalchemy import select
+from models import db, Guest
+
+
+# Columns that may be exported, in their default order
+EXPORT_COLUMNS = {
+    'id': Guest.id,
+    'name': Guest.name,
+    'email': Guest.email,
+    'phone': Guest.phone,
+    'rsvp_status': Guest.rsvp_status,
+    'guest_count': Guest.guest_count,
+    'dietary_requirements': Guest.dietary_requirements,
+    'checked_in': Guest.checked_in,
+    'check_in_time': Guest.check_in_time,
+    'created_at': Guest.created_at,
+}
+
+DEFAULT_COLUMNS = ['id', 'name', 'email', 'phone', 'rsvp_status', 'guest_count', 'checked_in', 'check_in_time']
+
+
+def _format_value(value):
+    if isinstance(value, datetime):
+        return value.strftime('%Y-%m-%d %H:%M:%S')
+    if isinstance(value, date):
+        return value.strftime('%Y-%m-%d')
+    return value
+
+
+class ExportService:
+    """Streaming guest list exports"""
+
+    def __init__(self, batch_size=1000):
+        """
+        Args:
+            batch_size (int): Rows fetched from the server-side cursor at a time
+        """
+        self.batch_size = batch_size
+
+    def parse_columns(self, columns_param):
+        """
+        Validate a comma-separated column list
+
+        Raises:
+            ValueError: If an unknown column is requested
+        """
+        if not columns_param:
+            return list(DEFAULT_COLUMNS)
+        columns = [c.strip() for c in columns_param.split(',') if c.strip()]
+        unknown = [c for c in columns if c not in EXPORT_COLUMNS]
+        if unknown:
+            raise ValueError(f"Unknown column(s): {', '.join(unknown)}. "
+                             f"Available: {', '.join(EXPORT_COLUMNS)}")
+        return columns
+
+    def iter_guests(self, event_id, columns, rsvp_status=None, checked_in=None):
+        """
+        Yield guest rows of an event from a server-side cursor
+
+        Args:
+            event_id (int): Event ID
+            columns (list): Column names from EXPORT_COLUMNS
+            rsvp_status (str): Only this RSVP status (optional)
+            checked_in (bool): Only checked-in / not checked-in guests (optional)
+        """
+        stmt = select(*[EXPORT_COLUMNS[c] for c in columns]).where(Guest.event_id == event_id)
+        if rsvp_status:
+            stmt = stmt.where(Guest.rsvp_status == rsvp_status)
+        if checked_in is not None:
+            stmt = stmt.where(Guest.checked_in == checked_in)
+        stmt = stmt.order_by(Guest.id).execution_options(yield_per=self.batch_size)
+
+        for row in db.session.execute(stmt):
+            yield [_format_value(value) for value in row]
+
+    def stream_csv(self, rows, columns):
+        """Encode rows as CSV, yielding one chunk per batch"""
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(columns)
+        for count, row in enumerate(rows, 1):
+            writer.writerow(row)
+            if count % self.batch_size == 0:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+        yield buffer.getvalue()
+
+    def stream_ndjson(self, rows, columns):
+        """Encode rows as newline-delimited JSON, yielding one chunk per batch"""
+        lines = []
+        for row in rows:
+            lines.append(json.dumps(dict(zip(columns, row))))
+            if len(lines) >= self.batch_size:
+                yield '\n'.join(lines) + '\n'
+                lines = []
+        if lines:
+            yield '\n'.join(lines) + '\n'
+
+
+# Initialize global service instance
+export_service = ExportService()
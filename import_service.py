@@ -0,0 +1,236 @@
+"""
+Import Service for Event Management System
+Bulk guest import from CSV / XLSX with batched inserts
+"""
+
+import csv
+import io
+from collections import defaultdict
+from sqlalchemy import insert, func
+from models import db, Event, Guest, EventRollup
+from rollup_service import rollup_service, guest_deltas
+from analytics_service import analytics_service
+from validators import validate_gmail, validate_phone
+
+
+RSVP_STATUSES = ('Pending', 'Accepted', 'Declined')
+
+# Accepted spellings of column headers
+HEADER_ALIASES = {
+    'guest_name': 'name',
+    'full_name': 'name',
+    'mobile': 'phone',
+    'phone_number': 'phone',
+    'rsvp': 'rsvp_status',
+    'status': 'rsvp_status',
+    'guests': 'guest_count',
+    'dietary': 'dietary_requirements',
+    'event': 'event_id',
+}
+
+
+def _normalize_header(header):
+    key = str(header or '').strip().lower().replace(' ', '_')
+    return HEADER_ALIASES.get(key, key)
+
+
+def _clean(value):
+    if value is None:
+        return None
+    value = str(value).strip()
+    return value or None
+
+
+def _to_int(value):
+    """Parse a whole number; spreadsheet floats like 3.0 are accepted, 2.5/inf/nan are not"""
+    number = float(value)
+    if not number.is_integer():  # False for inf and nan too
+        raise ValueError(f'Not a whole number: {value}')
+    return int(number)
+
+
+class GuestImportService:
+    """Validate and insert guest lists in chunks"""
+
+    def __init__(self, chunk_size=500):
+        """
+        Args:
+            chunk_size (int): Rows per executemany INSERT
+        """
+        self.chunk_size = chunk_size
+
+    def iter_rows(self, stream, filename):
+        """
+        Yield one dict per data row, reading the file as a stream
+
+        Args:
+            stream: Binary file object
+            filename (str): Used to pick the CSV or XLSX reader
+
+        Raises:
+            ValueError: For unsupported file types
+        """
+        name = (filename or '').lower()
+        if name.endswith('.csv'):
+            reader = csv.reader(io.TextIOWrapper(stream, encoding='utf-8-sig', newline=''))
+        elif name.endswith('.xlsx'):
+            try:
+                from openpyxl import load_workbook
+            except ImportError:
+                raise ValueError('XLSX import requires openpyxl (pip install openpyxl)')
+            workbook = load_workbook(stream, read_only=True, data_only=True)
+            reader = workbook.active.iter_rows(values_only=True)
+        else:
+            raise ValueError('Unsupported file type. Upload a .csv or .xlsx file.')
+
+        headers = None
+        for values in reader:
+            if headers is None:
+                headers = [_normalize_header(h) for h in values]
+                continue
+            if not any(_clean(v) for v in values):
+                continue  # Skip blank lines
+            yield dict(zip(headers, values))
+
+    def import_guests(self, stream, filename, default_event_id=None, dry_run=False):
+        """
+        Import guests from a CSV or XLSX file
+
+        Rows are validated one by one (Gmail, 10-digit phone, RSVP status,
+        guest count, event, venue capacity) and valid rows are inserted
+        in chunks with executemany. Capacity is checked against a running
+        total per event, starting from the event's current headcount; the
+        seats are then reserved with the atomic seat counter, so a
+        concurrent writer that filled the venue makes the import fail
+        with CapacityExceeded instead of overbooking.
+
+        Args:
+            stream: Binary file object
+            filename (str): Original file name (.csv or .xlsx)
+            default_event_id (int): Event for rows without an event_id column
+            dry_run (bool): Validate only, insert nothing
+
+        Returns:
+            dict: total_rows, imported, failed and per-row errors
+        """
+        report = {'total_rows': 0, 'imported': 0, 'failed': 0, 'errors': []}
+        events = {}  # event_id -> [venue_capacity, seats used so far] or None if missing
+        chunk = []
+        deltas = defaultdict(lambda: defaultdict(int))
+
+        try:
+            # Row 1 is the header, so data starts at row 2
+            for row_number, row in enumerate(self.iter_rows(stream, filename), start=2):
+                report['total_rows'] += 1
+                guest, errors = self._validate_row(row, default_event_id, events)
+                if errors:
+                    report['failed'] += 1
+                    report['errors'].append({'row': row_number, 'errors': errors})
+                    continue
+
+                chunk.append(guest)
+                for col, value in guest_deltas(guest['rsvp_status'], False, guest['guest_count']).items():
+                    deltas[guest['event_id']][col] += value
+                if len(chunk) >= self.chunk_size:
+                    report['imported'] += self._insert_chunk(chunk, dry_run)
+                    chunk = []
+
+            if chunk:
+                report['imported'] += self._insert_chunk(chunk, dry_run)
+
+            if dry_run:
+                db.session.rollback()
+            else:
+                rollup_service.apply(db.session.connection(), deltas)
+                db.session.commit()
+                analytics_service.invalidate()
+        except Exception:
+            db.session.rollback()
+            raise
+
+        return report
+
+    def _insert_chunk(self, chunk, dry_run):
+        if not dry_run:
+            db.session.execute(insert(Guest), chunk)
+        return len(chunk)
+
+    def _validate_row(self, row, default_event_id, events):
+        """Return (guest values, list of error messages)"""
+        errors = []
+        name = _clean(row.get('name'))
+        email = _clean(row.get('email'))
+        phone = _clean(row.get('phone'))
+        if phone and phone.endswith('.0'):
+            phone = phone[:-2]  # Spreadsheet numbers come back as floats
+        rsvp_status = (_clean(row.get('rsvp_status')) or 'Pending').capitalize()
+
+        if not name:
+            errors.append('Name is required')
+        if email and not validate_gmail(email):
+            errors.append('Only Gmail addresses are accepted')
+        if phone and not validate_phone(phone):
+            errors.append('Phone number must be exactly 10 digits')
+        if rsvp_status not in RSVP_STATUSES:
+            errors.append(f'RSVP status must be one of {", ".join(RSVP_STATUSES)}')
+
+        try:
+            guest_count = _to_int(_clean(row.get('guest_count')) or 1)
+            if guest_count < 1:
+                raise ValueError
+        except (TypeError, ValueError, OverflowError):
+            errors.append('Guest count must be a positive whole number')
+            guest_count = None
+
+        try:
+            event_id = _to_int(_clean(row.get('event_id')) or default_event_id)
+        except (TypeError, ValueError, OverflowError):
+            errors.append('Event ID is missing or invalid')
+            event_id = None
+
+        if event_id is not None:
+            if event_id not in events:
+                events[event_id] = self._load_capacity(event_id)
+            capacity = events[event_id]
+            if capacity is None:
+                errors.append(f'Event {event_id} does not exist')
+            elif not errors and capacity[0] and capacity[1] + guest_count > capacity[0]:
+                errors.append(f'Adding {guest_count} guests would exceed venue capacity of '
+                              f'{capacity[0]}. Current guests: {capacity[1]}')
+
+        if errors:
+            return None, errors
+
+        events[event_id][1] += guest_count
+        return {
+            'event_id': event_id,
+            'name': name,
+            'email': email,
+            'phone': phone,
+            'rsvp_status': rsvp_status,
+            'guest_count': guest_count,
+            'dietary_requirements': _clean(row.get('dietary_requirements')),
+        }, []
+
+    @staticmethod
+    def _load_capacity(event_id):
+        """[venue_capacity, current headcount] for an event, or None if it does not exist
+
+        The rows are locked (MySQL) until the import commits, so other
+        writers wait instead of racing the running total.
+        """
+        row = db.session.query(Event.venue_capacity, EventRollup.headcount).outerjoin(
+            EventRollup, EventRollup.event_id == Event.id
+        ).filter(Event.id == event_id).with_for_update().first()
+        if row is None:
+            return None
+        capacity, headcount = row
+        if headcount is None:
+            headcount = db.session.query(func.coalesce(func.sum(Guest.guest_count), 0)).filter(
+                Guest.event_id == event_id
+            ).scalar()
+        return [capacity, headcount]
+
+
+# Initialize global service instance
+guest_import_service = GuestImportService()
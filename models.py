@@ -1,10 +1,18 @@
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy.orm import joinedload, selectinload
 from datetime import datetime
-from werkzeug.security import generate_password_hash, check_password_hash
+from password_service import password_service
 
 db = SQLAlchemy()
 
 
+def create_missing_indexes():
+    """Create model indexes that create_all() skips on existing tables"""
+    for table in db.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(db.engine, checkfirst=True)
+
+
 class User(db.Model):
     __tablename__ = 'users'
     
@@ -17,10 +25,14 @@ class User(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
     def set_password(self, password):
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = password_service.hash(password)
     
     def check_password(self, password):
-        return check_password_hash(self.password_hash, password)
+        """Check a password; a hash made with older parameters is replaced (the caller commits)"""
+        matches, new_hash = password_service.verify(self.password_hash, password)
+        if new_hash:
+            self.password_hash = new_hash
+        return matches
     
     def to_dict(self):
         return {
@@ -33,6 +45,10 @@ class User(db.Model):
 
 class Event(db.Model):
     __tablename__ = 'events'
+    __table_args__ = (
+        # Keyset pagination order for the events list
+        db.Index('idx_event_date_id', 'event_date', 'id'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(200), nullable=False)
@@ -51,6 +67,26 @@ class Event(db.Model):
     # Relationships
     guests = db.relationship('Guest', backref='event', lazy=True, cascade='all, delete-orphan')
     bookings = db.relationship('Booking', backref='event', lazy=True, cascade='all, delete-orphan')
+    rollup = db.relationship('EventRollup', uselist=False, viewonly=True, lazy='select')
+    
+    @classmethod
+    def query_with_counts(cls):
+        """Event query that batch-loads the rollup counters in one extra SELECT"""
+        return cls.query.options(selectinload(cls.rollup))
+    
+    @property
+    def guest_count(self):
+        """Number of guests, read from the rollup instead of loading every guest"""
+        if self.rollup is not None:
+            return self.rollup.total_guests
+        return Guest.query.filter_by(event_id=self.id).count()
+    
+    @property
+    def booking_count(self):
+        """Number of bookings, read from the rollup instead of loading every booking"""
+        if self.rollup is not None:
+            return self.rollup.total_bookings
+        return Booking.query.filter_by(event_id=self.id).count()
     
     def to_dict(self):
         return {
@@ -63,13 +99,19 @@ class Event(db.Model):
             'budget': float(self.budget) if self.budget else 0.00,
             'status': self.status,
             'created_at': self.created_at.strftime('%Y-%m-%d %H:%M:%S') if self.created_at else None,
-            'guest_count': len(self.guests),
-            'booking_count': len(self.bookings)
+            'guest_count': self.guest_count,
+            'booking_count': self.booking_count
         }
 
 
 class Guest(db.Model):
     __tablename__ = 'guests'
+    __table_args__ = (
+        # Keyset pagination order for the guests list
+        db.Index('idx_guest_created_id', 'created_at', 'id'),
+        # Check-in scans look guests up by token
+        db.Index('idx_guest_qr_token', 'qr_token', unique=True),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     event_id = db.Column(db.Integer, db.ForeignKey('events.id'), nullable=False)
@@ -88,6 +130,12 @@ class Guest(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
+    @classmethod
+    def query_with_event(cls):
+        """Guest query with the event name joined in, so to_dict() and list
+        templates do not lazy-load one event per guest"""
+        return cls.query.options(joinedload(cls.event).load_only(Event.name))
+    
     def to_dict(self):
         return {
             'id': self.id,
@@ -107,6 +155,10 @@ class Guest(db.Model):
 
 class Booking(db.Model):
     __tablename__ = 'bookings'
+    __table_args__ = (
+        # Keyset pagination order for the bookings list
+        db.Index('idx_booking_created_id', 'created_at', 'id'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     event_id = db.Column(db.Integer, db.ForeignKey('events.id'), nullable=False)
@@ -121,6 +173,12 @@ class Booking(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
+    @classmethod
+    def query_with_event(cls):
+        """Booking query with the event name joined in, so to_dict() and list
+        templates do not lazy-load one event per booking"""
+        return cls.query.options(joinedload(cls.event).load_only(Event.name))
+    
     def to_dict(self):
         return {
             'id': self.id,
@@ -135,3 +193,185 @@ class Booking(db.Model):
             'contact_info': self.contact_info,
             'notes': self.notes
         }
+
+
+class EventRollup(db.Model):
+    """Per-event counters maintained alongside guest and booking writes"""
+    __tablename__ = 'event_rollups'
+    
+    event_id = db.Column(db.Integer, db.ForeignKey('events.id', ondelete='CASCADE'), primary_key=True)
+    total_guests = db.Column(db.Integer, nullable=False, default=0)
+    rsvp_accepted = db.Column(db.Integer, nullable=False, default=0)
+    rsvp_pending = db.Column(db.Integer, nullable=False, default=0)
+    rsvp_declined = db.Column(db.Integer, nullable=False, default=0)
+    checked_in = db.Column(db.Integer, nullable=False, default=0)
+    headcount = db.Column(db.Integer, nullable=False, default=0)
+    total_bookings = db.Column(db.Integer, nullable=False, default=0)
+    total_cost = db.Column(db.Numeric(12, 2), nullable=False, default=0)
+    
+    def to_dict(self):
+        return {
+            'event_id': self.event_id,
+            'total_guests': self.total_guests,
+            'rsvp_accepted': self.rsvp_accepted,
+            'rsvp_pending': self.rsvp_pending,
+            'rsvp_declined': self.rsvp_declined,
+            'checked_in': self.checked_in,
+            'headcount': self.headcount,
+            'total_bookings': self.total_bookings,
+            'total_cost': float(self.total_cost) if self.total_cost else 0.00
+        }
+
+
+class EmailOutbox(db.Model):
+    """Queued outgoing email, delivered by the outbox workers"""
+    __tablename__ = 'email_outbox'
+    __table_args__ = (
+        # Workers pick due messages by status and next attempt time
+        db.Index('idx_outbox_status_next', 'status', 'next_attempt_at'),
+        # Retention purge of delivered messages
+        db.Index('idx_outbox_status_sent', 'status', 'sent_at'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    recipient = db.Column(db.String(255), nullable=False)
+    subject = db.Column(db.String(255))
+    message = db.Column(db.Text, nullable=False)  # Full MIME message
+    status = db.Column(db.Enum('Pending', 'Sending', 'Sent', 'Dead'), nullable=False, default='Pending')
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    next_attempt_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    last_error = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    sent_at = db.Column(db.DateTime)
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'recipient': self.recipient,
+            'subject': self.subject,
+            'status': self.status,
+            'attempts': self.attempts,
+            'next_attempt_at': self.next_attempt_at.strftime('%Y-%m-%d %H:%M:%S') if self.next_attempt_at else None,
+            'last_error': self.last_error,
+            'created_at': self.created_at.strftime('%Y-%m-%d %H:%M:%S') if self.created_at else None,
+            'sent_at': self.sent_at.strftime('%Y-%m-%d %H:%M:%S') if self.sent_at else None
+        }
+
+
+class Campaign(db.Model):
+    """Bulk message to the guests of an event (invites, reminders)"""
+    __tablename__ = 'campaigns'
+    __table_args__ = (
+        db.Index('idx_campaign_event', 'event_id'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    event_id = db.Column(db.Integer, db.ForeignKey('events.id', ondelete='CASCADE'), nullable=False)
+    name = db.Column(db.String(200), nullable=False)
+    kind = db.Column(db.Enum('Invite', 'Reminder', 'Custom'), nullable=False, default='Custom')
+    channel = db.Column(db.Enum('Email', 'SMS'), nullable=False, default='Email')
+    rsvp_filter = db.Column(db.String(100))  # Comma-separated RSVP statuses, empty = all guests
+    subject = db.Column(db.String(255))
+    body = db.Column(db.Text, nullable=False)
+    status = db.Column(db.Enum('Draft', 'Sending', 'Completed', 'Failed'), nullable=False, default='Draft')
+    total = db.Column(db.Integer, nullable=False, default=0)
+    sent = db.Column(db.Integer, nullable=False, default=0)
+    failed = db.Column(db.Integer, nullable=False, default=0)
+    last_error = db.Column(db.Text)
+    claimed_by = db.Column(db.String(32))  # Runner sending it; others wait until heartbeat_at is CAMPAIGN_LEASE old
+    heartbeat_at = db.Column(db.DateTime)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime)
+    finished_at = db.Column(db.DateTime)
+    
+    event = db.relationship('Event', backref=db.backref('campaigns', lazy=True, cascade='all, delete-orphan'))
+    deliveries = db.relationship('CampaignDelivery', lazy=True, cascade='all, delete-orphan')
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'event_id': self.event_id,
+            'name': self.name,
+            'kind': self.kind,
+            'channel': self.channel,
+            'rsvp_filter': self.rsvp_filter,
+            'subject': self.subject,
+            'status': self.status,
+            'total': self.total,
+            'sent': self.sent,
+            'failed': self.failed,
+            'last_error': self.last_error,
+            'created_at': self.created_at.strftime('%Y-%m-%d %H:%M:%S') if self.created_at else None,
+            'started_at': self.started_at.strftime('%Y-%m-%d %H:%M:%S') if self.started_at else None,
+            'finished_at': self.finished_at.strftime('%Y-%m-%d %H:%M:%S') if self.finished_at else None
+        }
+
+
+class CampaignDelivery(db.Model):
+    """Per-guest delivery status of a campaign"""
+    __tablename__ = 'campaign_deliveries'
+    __table_args__ = (
+        db.UniqueConstraint('campaign_id', 'guest_id', name='uq_delivery_campaign_guest'),
+        db.Index('idx_delivery_campaign_status', 'campaign_id', 'status', 'id'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    campaign_id = db.Column(db.Integer, db.ForeignKey('campaigns.id', ondelete='CASCADE'), nullable=False)
+    guest_id = db.Column(db.Integer, db.ForeignKey('guests.id', ondelete='CASCADE'), nullable=False)
+    recipient = db.Column(db.String(255), nullable=False)
+    status = db.Column(db.Enum('Pending', 'Sending', 'Sent', 'Failed'), nullable=False, default='Pending')
+    error = db.Column(db.Text)
+    sent_at = db.Column(db.DateTime)
+
+
+class EventReminder(db.Model):
+    """Reminder window already handled for an event (at most one row per event and window)"""
+    __tablename__ = 'event_reminders'
+    __table_args__ = (
+        db.UniqueConstraint('event_id', 'window_hours', name='uq_reminder_event_window'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    event_id = db.Column(db.Integer, db.ForeignKey('events.id', ondelete='CASCADE'), nullable=False)
+    window_hours = db.Column(db.Integer, nullable=False)
+    email_campaign_id = db.Column(db.Integer, db.ForeignKey('campaigns.id', ondelete='SET NULL'))
+    sms_campaign_id = db.Column(db.Integer, db.ForeignKey('campaigns.id', ondelete='SET NULL'))
+    skipped = db.Column(db.Boolean, nullable=False, default=False)  # A narrower window was due at the same time
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'event_id': self.event_id,
+            'window_hours': self.window_hours,
+            'email_campaign_id': self.email_campaign_id,
+            'sms_campaign_id': self.sms_campaign_id,
+            'skipped': self.skipped,
+            'created_at': self.created_at.strftime('%Y-%m-%d %H:%M:%S') if self.created_at else None
+        }
+
+
+class OTPCode(db.Model):
+    """Outstanding one-time code (SQL backend of otp_store); only a hash of the code is kept"""
+    __tablename__ = 'otp_codes'
+    __table_args__ = (
+        db.Index('idx_otp_expires', 'expires_at'),
+    )
+    
+    key = db.Column(db.String(191), primary_key=True)  # "<purpose>:<recipient>"
+    code_hash = db.Column(db.String(64), nullable=False)
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    expires_at = db.Column(db.DateTime, nullable=False)
+
+
+class OTPRateLimit(db.Model):
+    """OTP sends per recipient in the current window (SQL backend of otp_store)"""
+    __tablename__ = 'otp_rate_limits'
+    __table_args__ = (
+        db.Index('idx_otp_rate_window', 'window_start'),
+    )
+    
+    recipient = db.Column(db.String(191), primary_key=True)
+    window_start = db.Column(db.DateTime, nullable=False)
+    count = db.Column(db.Integer, nullable=False, default=0)
+    last_sent_at = db.Column(db.DateTime, nullable=False)
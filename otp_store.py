@@ -0,0 +1,346 @@
+"""
+OTP Store for Event Management System
+Expiring one-time codes with hashed storage, attempt limits and send-rate limits
+"""
+
+import hashlib
+import hmac
+import math
+import secrets
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from sqlalchemy import select, insert, update, delete
+from sqlalchemy.exc import IntegrityError
+from models import db, OTPCode, OTPRateLimit
+
+
+otp_codes = OTPCode.__table__
+otp_rate_limits = OTPRateLimit.__table__
+
+
+class OTPRateLimited(RuntimeError):
+    """Raised when a recipient asked for codes too often"""
+
+    def __init__(self, retry_after):
+        self.retry_after = max(1, math.ceil(retry_after))
+        super().__init__(f"Too many OTP requests. Try again in {self.retry_after} seconds.")
+
+
+class OTPResult:
+    """Outcome of an OTP check"""
+
+    OK = 'ok'
+    INVALID = 'invalid'
+    EXPIRED = 'expired'
+    LOCKED = 'locked'
+
+    MESSAGES = {
+        OK: 'OTP verified successfully!',
+        INVALID: 'Invalid OTP. Please try again.',
+        EXPIRED: 'OTP expired or was never sent. Please request a new OTP.',
+        LOCKED: 'Too many wrong attempts. Please request a new OTP.',
+    }
+
+    def __init__(self, status):
+        self.status = status
+
+    @property
+    def success(self):
+        return self.status == self.OK
+
+    @property
+    def message(self):
+        return self.MESSAGES[self.status]
+
+
+class MemoryOTPBackend:
+    """Process-local backend: bounded, expired entries dropped on access and by sweep()"""
+
+    def __init__(self, max_entries=100000):
+        """
+        Args:
+            max_entries (int): Codes (and, separately, rate counters) kept before the oldest are dropped
+        """
+        self.max_entries = max_entries
+        self._codes = OrderedDict()  # key -> [code_hash, expires_at, attempts]; oldest first
+        self._rates = OrderedDict()  # recipient -> [window_start, count, last_sent_at]
+        self._lock = threading.Lock()
+
+    def save(self, key, code_hash, expires_at):
+        with self._lock:
+            self._codes.pop(key, None)
+            self._codes[key] = [code_hash, expires_at, 0]
+            while len(self._codes) > self.max_entries:
+                self._codes.popitem(last=False)
+
+    def load(self, key, now):
+        """Returns (code_hash, attempts) or None when missing or expired"""
+        with self._lock:
+            entry = self._codes.get(key)
+            if entry is None:
+                return None
+            if entry[1] <= now:
+                del self._codes[key]
+                return None
+            return entry[0], entry[2]
+
+    def add_attempt(self, key, max_attempts):
+        """Count an attempt; False once max_attempts were already used"""
+        with self._lock:
+            entry = self._codes.get(key)
+            if entry is None or entry[2] >= max_attempts:
+                return False
+            entry[2] += 1
+            return True
+
+    def delete(self, key):
+        with self._lock:
+            self._codes.pop(key, None)
+
+    def hit(self, recipient, now, window, limit, interval):
+        with self._lock:
+            state = self._rates.get(recipient)
+            retry_after = _retry_after(state, now, window, limit, interval)
+            if retry_after:
+                return retry_after
+            if state is None or now - state[0] >= window:
+                state = [now, 0, now]
+            state[1] += 1
+            state[2] = now
+            self._rates.pop(recipient, None)
+            self._rates[recipient] = state
+            while len(self._rates) > self.max_entries:
+                self._rates.popitem(last=False)
+            return 0
+
+    def sweep(self, now, window):
+        """Drop expired codes and finished rate windows"""
+        with self._lock:
+            expired = [key for key, entry in self._codes.items() if entry[1] <= now]
+            for key in expired:
+                del self._codes[key]
+            stale = [recipient for recipient, state in self._rates.items() if now - state[0] >= window]
+            for recipient in stale:
+                del self._rates[recipient]
+            return len(expired) + len(stale)
+
+
+class SQLOTPBackend:
+    """
+    Database backend (otp_codes / otp_rate_limits), shared by every app process
+
+    Writes go through their own connection and transaction, so issuing or
+    checking a code never commits (or rolls back) the caller's session.
+    """
+
+    def save(self, key, code_hash, expires_at):
+        for attempt in range(2):
+            try:
+                with db.engine.begin() as conn:
+                    conn.execute(delete(otp_codes).where(otp_codes.c.key == key))
+                    conn.execute(insert(otp_codes).values(key=key, code_hash=code_hash, attempts=0, expires_at=expires_at))
+                return
+            except IntegrityError:
+                # A concurrent request stored a code for the same key in between
+                if attempt:
+                    raise
+
+    def load(self, key, now):
+        with db.engine.connect() as conn:
+            row = conn.execute(
+                select(otp_codes.c.code_hash, otp_codes.c.attempts, otp_codes.c.expires_at).where(otp_codes.c.key == key)
+            ).first()
+        if row is None:
+            return None
+        if row.expires_at <= now:
+            self.delete(key)
+            return None
+        return row.code_hash, row.attempts
+
+    def add_attempt(self, key, max_attempts):
+        with db.engine.begin() as conn:
+            result = conn.execute(
+                update(otp_codes).where(otp_codes.c.key == key, otp_codes.c.attempts < max_attempts)
+                .values(attempts=otp_codes.c.attempts + 1)
+            )
+        return result.rowcount == 1
+
+    def delete(self, key):
+        with db.engine.begin() as conn:
+            conn.execute(delete(otp_codes).where(otp_codes.c.key == key))
+
+    def hit(self, recipient, now, window, limit, interval):
+        # Optimistic compare-and-set on the counter row; retried if another request won the race
+        for _ in range(3):
+            try:
+                with db.engine.begin() as conn:
+                    row = conn.execute(
+                        select(otp_rate_limits.c.window_start, otp_rate_limits.c.count, otp_rate_limits.c.last_sent_at)
+                        .where(otp_rate_limits.c.recipient == recipient)
+                    ).first()
+                    retry_after = _retry_after(row, now, window, limit, interval)
+                    if retry_after:
+                        return retry_after
+
+                    if row is None:
+                        conn.execute(insert(otp_rate_limits).values(
+                            recipient=recipient, window_start=now, count=1, last_sent_at=now
+                        ))
+                        changed = 1
+                    else:
+                        new_window = now - row.window_start >= window
+                        changed = conn.execute(
+                            update(otp_rate_limits).where(
+                                otp_rate_limits.c.recipient == recipient,
+                                otp_rate_limits.c.window_start == row.window_start,
+                                otp_rate_limits.c.count == row.count
+                            ).values(
+                                window_start=now if new_window else row.window_start,
+                                count=1 if new_window else row.count + 1,
+                                last_sent_at=now
+                            )
+                        ).rowcount
+            except IntegrityError:
+                continue
+            if changed:
+                return 0
+        return interval.total_seconds() or 1
+
+    def sweep(self, now, window):
+        with db.engine.begin() as conn:
+            removed = conn.execute(delete(otp_codes).where(otp_codes.c.expires_at <= now)).rowcount
+            removed += conn.execute(
+                delete(otp_rate_limits).where(otp_rate_limits.c.window_start <= now - window)
+            ).rowcount
+        return removed
+
+
+def _retry_after(state, now, window, limit, interval):
+    """Seconds until another send is allowed for (window_start, count, last_sent_at); 0 = now"""
+    if state is None:
+        return 0
+    window_start, count, last_sent_at = state
+    if now - last_sent_at < interval:
+        return (interval - (now - last_sent_at)).total_seconds()
+    if now - window_start < window and count >= limit:
+        return (window - (now - window_start)).total_seconds()
+    return 0
+
+
+class OTPStore:
+    """Issue and check one-time codes"""
+
+    def __init__(self, backend=None, secret='', ttl=600, max_attempts=5,
+                 send_limit=5, send_window=3600, resend_interval=30, sweep_interval=300):
+        """
+        Args:
+            backend: MemoryOTPBackend or SQLOTPBackend
+            secret (str): Key for hashing codes (the app SECRET_KEY)
+            ttl (int): Seconds a code stays valid
+            max_attempts (int): Wrong guesses allowed per code
+            send_limit (int): Codes a recipient can request per send_window
+            send_window (int): Rate limit window in seconds
+            resend_interval (int): Minimum seconds between two codes to one recipient
+            sweep_interval (int): Seconds between sweeps of expired entries
+        """
+        self.backend = backend or MemoryOTPBackend()
+        self.secret = secret.encode()
+        self.ttl = timedelta(seconds=ttl)
+        self.max_attempts = max_attempts
+        self.send_limit = send_limit
+        self.send_window = timedelta(seconds=send_window)
+        self.resend_interval = timedelta(seconds=resend_interval)
+        self.sweep_interval = timedelta(seconds=sweep_interval)
+        self._next_sweep = datetime.utcnow() + self.sweep_interval
+
+    def init_app(self, app):
+        """Configure from the OTP_* settings (OTP_BACKEND is 'memory' or 'sql')"""
+        config = app.config
+        backend = config.get('OTP_BACKEND', 'memory').lower()
+        if backend == 'sql':
+            self.backend = SQLOTPBackend()
+        elif backend == 'memory':
+            self.backend = MemoryOTPBackend(max_entries=config.get('OTP_MEMORY_MAX_ENTRIES', 100000))
+        else:
+            raise ValueError(f"Unknown OTP_BACKEND: {backend}")
+
+        self.secret = config['SECRET_KEY'].encode()
+        self.ttl = timedelta(seconds=config.get('OTP_TTL', 600))
+        self.max_attempts = config.get('OTP_MAX_ATTEMPTS', 5)
+        self.send_limit = config.get('OTP_SEND_LIMIT', 5)
+        self.send_window = timedelta(seconds=config.get('OTP_SEND_WINDOW', 3600))
+        self.resend_interval = timedelta(seconds=config.get('OTP_RESEND_INTERVAL', 30))
+
+    @staticmethod
+    def _key(purpose, recipient):
+        return f"{purpose}:{recipient}"[:191]
+
+    def _hash(self, key, code):
+        return hmac.new(self.secret, f"{key}:{code}".encode(), hashlib.sha256).hexdigest()
+
+    def _maybe_sweep(self, now):
+        if now >= self._next_sweep:
+            self._next_sweep = now + self.sweep_interval
+            self.backend.sweep(now, self.send_window)
+
+    def issue(self, purpose, recipient, length=6):
+        """
+        Create a new code for a recipient (replacing any earlier one)
+
+        Args:
+            purpose (str): What the code is for, e.g. 'login' or 'guest:12'
+            recipient (str): Phone number or email address the code is sent to
+            length (int): Number of digits
+
+        Returns:
+            str: The code, to be sent to the recipient
+
+        Raises:
+            OTPRateLimited: If the recipient requested codes too often
+        """
+        now = datetime.utcnow()
+        self._maybe_sweep(now)
+
+        retry_after = self.backend.hit(
+            str(recipient)[:191], now, self.send_window, self.send_limit, self.resend_interval
+        )
+        if retry_after:
+            raise OTPRateLimited(retry_after)
+
+        code = ''.join(secrets.choice('0123456789') for _ in range(length))
+        key = self._key(purpose, recipient)
+        self.backend.save(key, self._hash(key, code), now + self.ttl)
+        return code
+
+    def verify(self, purpose, recipient, code):
+        """
+        Check a code; a correct code is consumed
+
+        Returns:
+            OTPResult: OK, INVALID, EXPIRED or LOCKED
+        """
+        now = datetime.utcnow()
+        key = self._key(purpose, recipient)
+        entry = self.backend.load(key, now)
+        if entry is None:
+            return OTPResult(OTPResult.EXPIRED)
+
+        # Count the attempt before comparing so parallel guesses cannot exceed the limit
+        if not self.backend.add_attempt(key, self.max_attempts):
+            self.backend.delete(key)
+            return OTPResult(OTPResult.LOCKED)
+
+        if not hmac.compare_digest(entry[0], self._hash(key, str(code or '').strip())):
+            return OTPResult(OTPResult.INVALID)
+
+        self.backend.delete(key)
+        return OTPResult(OTPResult.OK)
+
+    def discard(self, purpose, recipient):
+        """Drop a code, e.g. when sending it failed"""
+        self.backend.delete(self._key(purpose, recipient))
+
+
+# Initialize global store instance
+otp_store = OTPStore()
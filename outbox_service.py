@@ -0,0 +1,250 @@
+"""
+Outbox Service for Event Management System
+Persistent email queue drained by background worker threads
+"""
+
+import email
+import random
+import smtplib
+import threading
+from datetime import datetime, timedelta
+from sqlalchemy import event, func, select, update, delete
+from models import db, EmailOutbox
+
+
+outbox = EmailOutbox.__table__
+
+# Statuses still waiting for delivery (a 'Sending' row whose lease ran out is retried)
+QUEUED_STATUSES = ('Pending', 'Sending')
+
+
+class OutboxFull(RuntimeError):
+    """Raised when the outbox already holds max_depth undelivered messages"""
+
+
+def is_permanent_failure(error):
+    """Rejections that will not succeed on retry (bad recipient, 5xx replies)"""
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        return True
+    return isinstance(error, smtplib.SMTPResponseException) and 500 <= error.smtp_code < 600
+
+
+class OutboxService:
+    """Queue emails in the database and deliver them from worker threads"""
+
+    def __init__(self):
+        self.app = None
+        self.sender = None
+        self.workers = 0
+        self._threads = []
+        self._wake = threading.Event()
+        self._start_lock = threading.Lock()
+
+    def init_app(self, app, sender):
+        """
+        Configure the outbox
+
+        Args:
+            app: Flask app (workers run inside its app context)
+            sender (callable): Delivers one email.message.Message, raising on failure
+        """
+        self.app = app
+        self.sender = sender
+        self.workers = app.config.get('OUTBOX_WORKERS', 2)
+        self.max_depth = app.config.get('OUTBOX_MAX_DEPTH', 10000)
+        self.max_attempts = app.config.get('OUTBOX_MAX_ATTEMPTS', 6)
+        self.retry_base = app.config.get('OUTBOX_RETRY_BASE', 30)
+        self.retention = timedelta(days=app.config.get('OUTBOX_RETENTION_DAYS', 7))
+        self.purge_interval = timedelta(hours=1)
+        self.purge_batch = 1000
+        self._next_purge = datetime.utcnow()
+        self.max_delay = 3600
+        self.lease = 300  # Seconds a claimed message stays with one worker
+        self.batch_size = 10
+        self.poll_interval = 2
+
+        app.before_request(self.start)
+
+    @property
+    def enabled(self):
+        return self.workers > 0 and self.sender is not None
+
+    def start(self):
+        """Start the worker threads (once per process)"""
+        if not self.enabled or len(self._threads) >= self.workers:
+            return
+        with self._start_lock:
+            while len(self._threads) < self.workers:
+                thread = threading.Thread(
+                    target=self._work, name=f'outbox-worker-{len(self._threads) + 1}', daemon=True
+                )
+                thread.start()
+                self._threads.append(thread)
+            print(f"✅ Email outbox started with {self.workers} worker(s)")
+
+    def depth(self):
+        """Number of messages not yet delivered or dead-lettered"""
+        return db.session.execute(
+            select(func.count()).select_from(outbox).where(outbox.c.status.in_(QUEUED_STATUSES))
+        ).scalar()
+
+    def enqueue(self, msg):
+        """
+        Store a message for background delivery
+
+        The row is only flushed: it is committed (and the workers woken)
+        with the caller's transaction, so an email is never queued for
+        work that is rolled back, and the caller's pending changes are
+        never committed as a side effect.
+
+        Args:
+            msg: email.message.Message with To and Subject set
+
+        Returns:
+            int: Outbox message ID
+
+        Raises:
+            OutboxFull: If max_depth messages are already waiting (backpressure)
+        """
+        depth = self.depth()
+        if depth >= self.max_depth:
+            raise OutboxFull(f"Email outbox is full ({depth} messages waiting, limit {self.max_depth})")
+
+        item = EmailOutbox(recipient=msg['To'], subject=msg['Subject'], message=msg.as_string())
+        db.session.add(item)
+        db.session.flush()
+        self.start()
+
+        # One-shot hook on this session only; wakes the workers once the row is visible
+        session = db.session()
+        if not session.info.get('outbox_wake'):
+            session.info['outbox_wake'] = True
+            event.listen(session, 'after_commit', self._after_commit, once=True)
+        return item.id
+
+    def _after_commit(self, session):
+        session.info.pop('outbox_wake', None)
+        self._wake.set()
+
+    def retry_dead(self):
+        """Move dead-lettered messages back to the queue"""
+        result = db.session.execute(
+            update(outbox).where(outbox.c.status == 'Dead')
+            .values(status='Pending', attempts=0, next_attempt_at=datetime.utcnow())
+        )
+        db.session.commit()
+        self._wake.set()
+        return result.rowcount
+
+    def purge(self, now=None):
+        """
+        Delete Sent messages older than OUTBOX_RETENTION_DAYS, in batches
+
+        Returns:
+            int: Messages deleted
+        """
+        cutoff = (now or datetime.utcnow()) - self.retention
+        removed = 0
+        while True:
+            ids = db.session.execute(
+                select(outbox.c.id).where(outbox.c.status == 'Sent', outbox.c.sent_at < cutoff)
+                .limit(self.purge_batch)
+            ).scalars().all()
+            if ids:
+                removed += db.session.execute(delete(outbox).where(outbox.c.id.in_(ids))).rowcount
+            db.session.commit()
+            if len(ids) < self.purge_batch:
+                return removed
+
+    def stats(self):
+        """Message counts per status plus queue settings"""
+        counts = dict(db.session.execute(
+            select(outbox.c.status, func.count()).group_by(outbox.c.status)
+        ).all())
+        return {
+            'pending': counts.get('Pending', 0),
+            'sending': counts.get('Sending', 0),
+            'sent': counts.get('Sent', 0),
+            'dead': counts.get('Dead', 0),
+            'depth': counts.get('Pending', 0) + counts.get('Sending', 0),
+            'max_depth': self.max_depth,
+            'workers': sum(thread.is_alive() for thread in self._threads)
+        }
+
+    # ---- workers ----
+
+    def _work(self):
+        while True:
+            try:
+                with self.app.app_context():
+                    self._maybe_purge()
+                    delivered = self._drain_once()
+            except Exception as e:
+                print(f"❌ Outbox worker error: {str(e)}")
+                delivered = 0
+            if not delivered:
+                self._wake.wait(self.poll_interval)
+                self._wake.clear()
+
+    def _maybe_purge(self):
+        now = datetime.utcnow()
+        if now >= self._next_purge:
+            self._next_purge = now + self.purge_interval
+            removed = self.purge(now)
+            if removed:
+                print(f"📦 Outbox purged {removed} sent message(s)")
+
+    def _drain_once(self):
+        """Claim a batch of due messages and try to deliver them"""
+        ids = self._claim()
+        for message_id in ids:
+            self._deliver(message_id)
+        return len(ids)
+
+    def _claim(self):
+        """Lease due messages to this worker (safe across threads and processes)"""
+        now = datetime.utcnow()
+        due = db.session.execute(
+            select(outbox.c.id).where(outbox.c.status.in_(QUEUED_STATUSES), outbox.c.next_attempt_at <= now)
+            .order_by(outbox.c.next_attempt_at).limit(self.batch_size)
+        ).scalars().all()
+
+        claimed = []
+        for message_id in due:
+            result = db.session.execute(
+                update(outbox).where(
+                    outbox.c.id == message_id,
+                    outbox.c.status.in_(QUEUED_STATUSES),
+                    outbox.c.next_attempt_at <= now
+                ).values(status='Sending', next_attempt_at=now + timedelta(seconds=self.lease))
+            )
+            if result.rowcount:
+                claimed.append(message_id)
+        db.session.commit()
+        return claimed
+
+    def _deliver(self, message_id):
+        row = db.session.execute(
+            select(outbox.c.message, outbox.c.attempts).where(outbox.c.id == message_id)
+        ).first()
+        attempts = row.attempts + 1
+
+        try:
+            self.sender(email.message_from_string(row.message))
+        except Exception as e:
+            if attempts >= self.max_attempts or is_permanent_failure(e):
+                values = {'status': 'Dead'}
+                print(f"❌ Email {message_id} dead-lettered after {attempts} attempt(s): {str(e)}")
+            else:
+                delay = min(self.retry_base * 2 ** (attempts - 1), self.max_delay) * random.uniform(0.8, 1.2)
+                values = {'status': 'Pending', 'next_attempt_at': datetime.utcnow() + timedelta(seconds=delay)}
+            values.update(attempts=attempts, last_error=str(e)[:1000])
+        else:
+            values = {'status': 'Sent', 'attempts': attempts, 'sent_at': datetime.utcnow(), 'last_error': None}
+
+        db.session.execute(update(outbox).where(outbox.c.id == message_id).values(**values))
+        db.session.commit()
+
+
+# Initialize global service instance
+outbox_service = OutboxService()
@@ -0,0 +1,116 @@
+"""
+Keyset (cursor) pagination for list pages
+"""
+
+import base64
+import json
+from datetime import date, datetime
+from sqlalchemy import and_, or_
+
+
+class KeysetPage:
+    """One page of results plus the cursors to move around it"""
+
+    def __init__(self, items, per_page, next_cursor=None, prev_cursor=None):
+        self.items = items
+        self.per_page = per_page
+        self.next_cursor = next_cursor
+        self.prev_cursor = prev_cursor
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def has_prev(self):
+        return self.prev_cursor is not None
+
+    def to_dict(self):
+        return {
+            'per_page': self.per_page,
+            'next_cursor': self.next_cursor,
+            'prev_cursor': self.prev_cursor
+        }
+
+
+def encode_cursor(sort_value, row_id):
+    """Encode a (sort value, id) position as an opaque URL-safe string"""
+    if isinstance(sort_value, (date, datetime)):
+        sort_value = sort_value.isoformat()
+    raw = json.dumps([sort_value, row_id], separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor, sort_column):
+    """
+    Decode a cursor created by encode_cursor
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        sort_value, row_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        python_type = sort_column.type.python_type
+        if sort_value is not None and python_type is datetime:
+            sort_value = datetime.fromisoformat(sort_value)
+        elif sort_value is not None and python_type is date:
+            sort_value = date.fromisoformat(sort_value)
+        return sort_value, int(row_id)
+    except Exception:
+        raise ValueError('Invalid pagination cursor')
+
+
+def paginate_keyset(query, sort_column, id_column, after=None, before=None, per_page=50):
+    """
+    Paginate a query newest-first by (sort_column, id_column)
+
+    Each page is one indexed range scan of per_page + 1 rows, so the cost
+    does not grow with the table size or with how deep the user pages.
+
+    Args:
+        query: Query to paginate (without ORDER BY)
+        sort_column: Column to sort by, descending
+        id_column: Unique tie-breaker column (primary key)
+        after (str): Cursor of the last row of the previous page
+        before (str): Cursor of the first row of the next page
+        per_page (int): Page size
+
+    Returns:
+        KeysetPage: Items and next/prev cursors
+
+    Raises:
+        ValueError: If a cursor is malformed
+    """
+    if before:
+        sort_value, row_id = decode_cursor(before, sort_column)
+        query = query.filter(or_(
+            sort_column > sort_value,
+            and_(sort_column == sort_value, id_column > row_id)
+        ))
+        rows = query.order_by(sort_column.asc(), id_column.asc()).limit(per_page + 1).all()
+        has_more = len(rows) > per_page
+        items = list(reversed(rows[:per_page]))
+        has_prev, has_next = has_more, True
+    else:
+        if after:
+            sort_value, row_id = decode_cursor(after, sort_column)
+            query = query.filter(or_(
+                sort_column < sort_value,
+                and_(sort_column == sort_value, id_column < row_id)
+            ))
+        rows = query.order_by(sort_column.desc(), id_column.desc()).limit(per_page + 1).all()
+        has_more = len(rows) > per_page
+        items = rows[:per_page]
+        has_prev, has_next = bool(after), has_more
+
+    sort_attr, id_attr = sort_column.key, id_column.key
+    next_cursor = prev_cursor = None
+    if items and has_next:
+        last = items[-1]
+        next_cursor = encode_cursor(getattr(last, sort_attr), getattr(last, id_attr))
+    if items and has_prev:
+        first = items[0]
+        prev_cursor = encode_cursor(getattr(first, sort_attr), getattr(first, id_attr))
+
+    return KeysetPage(items, per_page, next_cursor, prev_cursor)
@@ -0,0 +1,123 @@
+"""
+Password Service for Event Management System
+Password hashing on a bounded process pool, with a configurable method and cost
+"""
+
+import atexit
+import secrets
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from werkzeug.security import generate_password_hash, check_password_hash
+
+
+class PasswordHasherBusy(RuntimeError):
+    """Raised when too many hashes are already waiting for a worker"""
+
+
+class PasswordService:
+    """
+    Hash and check passwords off the request threads
+
+    Hashing is CPU-bound and deliberately slow, so it runs on a small
+    process pool: a burst of logins queues there (up to max_pending)
+    instead of holding the GIL in every request thread. Hashes made with
+    older parameters are replaced after a successful check.
+    """
+
+    def __init__(self, method='scrypt', workers=0, max_pending=64, timeout=10):
+        self.configure(method, workers, max_pending, timeout)
+        self._executor = None
+        self._lock = threading.Lock()
+        atexit.register(self.shutdown)
+
+    def init_app(self, app):
+        """Configure from PASSWORD_HASH_* settings"""
+        self.configure(
+            app.config.get('PASSWORD_HASH_METHOD', 'scrypt'),
+            app.config.get('PASSWORD_HASH_WORKERS', 2),
+            app.config.get('PASSWORD_HASH_MAX_PENDING', 64),
+            app.config.get('PASSWORD_HASH_TIMEOUT', 10)
+        )
+
+    def configure(self, method, workers, max_pending=64, timeout=10):
+        """
+        Args:
+            method (str): werkzeug hash method with its cost, e.g. 'scrypt:32768:8:1'
+                          or 'pbkdf2:sha256:600000'
+            workers (int): Hashing processes (0 = hash on the calling thread)
+            max_pending (int): Hashes queued or running before callers are turned away
+            timeout (float): Seconds to wait for a queue slot
+        """
+        self.method = method
+        self.workers = workers
+        self.timeout = timeout
+        self._slots = threading.BoundedSemaphore(max(1, max_pending))
+
+        # Reference hash: its prefix is the current parameters, and checking
+        # against it keeps unknown-user logins as slow as real ones
+        self._dummy = generate_password_hash(secrets.token_hex(8), method)
+        self._params = self._dummy.split('$', 1)[0]
+
+    def _pool(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(self.workers)
+            return self._executor
+
+    def _run(self, fn, *args):
+        if not self.workers:
+            return fn(*args)
+        if not self._slots.acquire(timeout=self.timeout):
+            raise PasswordHasherBusy('Too many password checks in progress, please try again')
+        try:
+            for attempt in range(2):
+                pool = self._pool()
+                try:
+                    return pool.submit(fn, *args).result()
+                except BrokenProcessPool:
+                    # A worker died (e.g. killed for memory); start a fresh pool once
+                    with self._lock:
+                        if self._executor is pool:
+                            self._executor = None
+                    if attempt:
+                        raise
+        finally:
+            self._slots.release()
+
+    def hash(self, password):
+        """Hash a password with the current method"""
+        return self._run(generate_password_hash, password, self.method)
+
+    def needs_rehash(self, pwhash):
+        """True if a hash was made with other parameters than the current ones"""
+        return pwhash.split('$', 1)[0] != self._params
+
+    def verify(self, pwhash, password):
+        """
+        Check a password
+
+        Args:
+            pwhash (str): Stored hash (None for an unknown user, still costs one check)
+            password (str): Password to check
+
+        Returns:
+            tuple: (matches: bool, new hash to store or None)
+        """
+        if not pwhash:
+            self._run(check_password_hash, self._dummy, password or '')
+            return False, None
+
+        if not self._run(check_password_hash, pwhash, password or ''):
+            return False, None
+        return True, self.hash(password) if self.needs_rehash(pwhash) else None
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+
+# Initialize global service instance
+password_service = PasswordService()
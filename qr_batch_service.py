@@ -0,0 +1,159 @@
+"""
+QR Batch Service for Event Management System
+Generate QR codes for a whole event on a process pool and stream them as a ZIP
+"""
+
+import os
+import re
+from functools import partial
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from sqlalchemy import select, update, bindparam
+from models import db, Guest
+from qr_service import qr_service, render_qr
+from config import Config
+
+
+guests = Guest.__table__
+
+
+def _slug(name):
+    return re.sub(r'[^A-Za-z0-9]+', '_', name or '').strip('_')[:40] or 'guest'
+
+
+def print_progress(done, total):
+    """Progress report for the command line: a log line every 10%"""
+    step = max(total // 10, 1)
+    if done == total or done % step == 0:
+        print(f"📦 QR codes rendered: {done}/{total}")
+
+
+class _ZipStream:
+    """Write-only file object that hands ZIP bytes back to a generator"""
+
+    def __init__(self):
+        self.chunks = []
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b''.join(self.chunks)
+        self.chunks = []
+        return data
+
+
+class QRBatchService:
+    """Bulk QR code generation for an event"""
+
+    def __init__(self, workers=None, chunk_size=32, write_batch=1000):
+        """
+        Args:
+            workers (int): Rendering processes (defaults to the CPU count)
+            chunk_size (int): Codes handed to a worker at a time
+            write_batch (int): Token UPDATEs per executemany
+        """
+        self.workers = workers or os.cpu_count() or 1
+        self.chunk_size = chunk_size
+        self.write_batch = write_batch
+
+    def issue_tokens(self, event_id, rotate=False):
+        """
+        Make sure every guest of an event has a valid signed token
+
+        Existing tokens are kept unless they are unsigned, expired or
+        rotate is set; new tokens are written back in batched UPDATEs.
+
+        Args:
+            event_id (int): Event ID
+            rotate (bool): Replace every token (invalidates printed codes)
+
+        Returns:
+            list: (guest_id, name, token) per guest, ordered by guest id
+        """
+        rows = db.session.execute(
+            select(guests.c.id, guests.c.event_id, guests.c.name, guests.c.qr_token)
+            .where(guests.c.event_id == event_id).order_by(guests.c.id)
+        ).all()
+
+        entries, changes = [], []
+        for row in rows:
+            token = None if rotate else qr_service.reusable_token(row)
+            if not token:
+                token = qr_service.generate_guest_token(row.id, event_id)
+                changes.append({'b_id': row.id, 'b_token': token})
+            entries.append((row.id, row.name, token))
+
+        stmt = update(guests).where(guests.c.id == bindparam('b_id')).values(qr_token=bindparam('b_token'))
+        for start in range(0, len(changes), self.write_batch):
+            db.session.execute(stmt, changes[start:start + self.write_batch])
+        db.session.commit()
+        return entries
+
+    def render(self, event_id, entries, workers=None, progress=None, cache=None):
+        """
+        Render QR code PNGs, fanned out over a process pool
+
+        Images already in the QR image cache are reused; only the rest
+        are rendered, and stored in the cache as they come back.
+
+        Args:
+            event_id (int): Event ID
+            entries (list): (guest_id, name, token) from issue_tokens()
+            workers (int): Override the number of processes
+            progress (callable): Called with (done, total) after each code, e.g. print_progress
+            cache (QRImageCache): Image cache to use (defaults to the shared qr_service one)
+
+        Yields:
+            tuple: (file name, PNG bytes) in guest order
+        """
+        workers = workers or self.workers
+        cache = cache or qr_service.image_cache
+        contents = [qr_service.build_qr_content(guest_id, event_id, token, name)
+                    for guest_id, name, token in entries]
+        names = [f"guest_{guest_id}_{_slug(name)}.png" for guest_id, name, _ in entries]
+        missing = [i for i, content in enumerate(contents) if not cache.contains(content)]
+
+        render = partial(render_qr, fmt='png', error_correction=cache.error_correction)
+
+        executor = ProcessPoolExecutor(workers) if workers > 1 and len(missing) > 1 else None
+        try:
+            if executor:
+                rendered = executor.map(render, [contents[i] for i in missing], chunksize=self.chunk_size)
+            else:
+                rendered = map(render, [contents[i] for i in missing])
+
+            to_render = set(missing)
+            for i, (name, content) in enumerate(zip(names, contents)):
+                if i in to_render:
+                    png = next(rendered)
+                    cache.put(content, png)
+                else:
+                    png = cache.get_or_render(content)
+                if progress:
+                    progress(i + 1, len(names))
+                yield name, png
+        finally:
+            if executor:
+                executor.shutdown(wait=False, cancel_futures=True)
+
+    def stream_zip(self, files):
+        """
+        Encode (name, bytes) pairs as a ZIP, yielding bytes as entries are added
+
+        PNGs are already compressed, so entries are stored, not deflated.
+        """
+        stream = _ZipStream()
+        with zipfile.ZipFile(stream, 'w', zipfile.ZIP_STORED) as archive:
+            for name, data in files:
+                archive.writestr(name, data)
+                yield stream.drain()
+        yield stream.drain()
+
+
+# Initialize global service instance
+qr_batch_service = QRBatchService(workers=Config.QR_WORKERS)
@@ -4,11 +4,280 @@ Generate and manage QR codes for guest check-in
 """
 
 import qrcode
+from qrcode.image.svg import SvgPathImage
 import io
 import base64
-from datetime import datetime
+from datetime import datetime, timedelta
 import hashlib
+import hmac
 import json
+import os
+import re
+import secrets
+import struct
+import threading
+import time
+from config import Config
+from cache import ByteLRUCache
+
+
+# Signed token body: guest_id, event_id, expiry (unix seconds), random nonce
+TOKEN_STRUCT = struct.Struct('>IIII')
+SIGNATURE_BYTES = 16
+LEGACY_TOKEN = re.compile(r'^[0-9a-f]{32}$')
+
+ERROR_CORRECTION = {
+    'L': qrcode.constants.ERROR_CORRECT_L,
+    'M': qrcode.constants.ERROR_CORRECT_M,
+    'Q': qrcode.constants.ERROR_CORRECT_Q,
+    'H': qrcode.constants.ERROR_CORRECT_H,
+}
+
+# Image formats and their MIME types ('data_uri' wraps the PNG)
+IMAGE_FORMATS = {'png': 'image/png', 'svg': 'image/svg+xml'}
+
+# RFC 9285 alphabet: exactly the QR alphanumeric character set
+BASE45_ALPHABET = '0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ $%*+-./:'
+BASE45_VALUES = {char: value for value, char in enumerate(BASE45_ALPHABET)}
+
+
+def _b64encode(data):
+    return base64.urlsafe_b64encode(data).rstrip(b'=').decode()
+
+
+def _b64decode(text):
+    return base64.urlsafe_b64decode(text + '=' * (-len(text) % 4))
+
+
+def _b45encode(data):
+    chars = []
+    for i in range(0, len(data), 2):
+        if i + 1 < len(data):
+            value, width = data[i] * 256 + data[i + 1], 3
+        else:
+            value, width = data[i], 2
+        for _ in range(width):
+            value, digit = divmod(value, 45)
+            chars.append(BASE45_ALPHABET[digit])
+    return ''.join(chars)
+
+
+def _b45decode(text):
+    if len(text) % 3 == 1:
+        raise ValueError('Invalid base45 length')
+    data = bytearray()
+    for i in range(0, len(text), 3):
+        group = text[i:i + 3]
+        value = sum(BASE45_VALUES[char] * 45 ** n for n, char in enumerate(group))
+        if len(group) == 3:
+            if value > 0xFFFF:
+                raise ValueError('Invalid base45 group')
+            data += value.to_bytes(2, 'big')
+        else:
+            if value > 0xFF:
+                raise ValueError('Invalid base45 group')
+            data.append(value)
+    return bytes(data)
+
+
+def render_qr(qr_content, fmt='png', error_correction='M'):
+    """
+    Render QR code content as PNG or SVG bytes
+    
+    Module-level so it can run in a ProcessPoolExecutor worker.
+    
+    Args:
+        qr_content (str): Text to encode
+        fmt (str): 'png' or 'svg'
+        error_correction (str): 'L', 'M', 'Q' or 'H'
+    """
+    qr = qrcode.QRCode(
+        error_correction=ERROR_CORRECTION[error_correction],
+        box_size=10,
+        border=4,
+    )
+    qr.add_data(qr_content)
+    qr.make(fit=True)
+    
+    buffer = io.BytesIO()
+    if fmt == 'svg':
+        qr.make_image(image_factory=SvgPathImage).save(buffer)
+    else:
+        qr.make_image(fill_color="black", back_color="white").save(buffer, format='PNG')
+    return buffer.getvalue()
+
+
+def _derive_key(secret):
+    """Separate signing key per secret so QR tokens never share a key with sessions"""
+    return hmac.new(secret.encode(), b'nexus-qr-token-v1', hashlib.sha256).digest()
+
+
+class QRImageCache:
+    """
+    Rendered QR images keyed by a hash of their content
+    
+    Two tiers: a byte-bounded in-memory LRU and PNG files under
+    QR_CACHE_DIR. The same payload always maps to the same file, so an
+    image is only rendered again when its token (or guest name) changes.
+    The directory is kept under disk_max_bytes by deleting the least
+    recently used files (by mtime, refreshed on every disk hit).
+    """
+    
+    def __init__(self, directory, max_bytes, error_correction='M', disk_max_bytes=0):
+        """
+        Args:
+            directory (str): Folder for the image files
+            max_bytes (int): In-memory LRU size
+            error_correction (str): 'L', 'M', 'Q' or 'H'
+            disk_max_bytes (int): Size of the image folder before old files are evicted (0 = unbounded)
+        """
+        self.directory = directory
+        self.error_correction = error_correction
+        self.memory = ByteLRUCache(max_bytes)
+        self.disk_max_bytes = disk_max_bytes
+        self._lock = threading.Lock()
+        self._sweep_lock = threading.Lock()
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.renders = 0
+        self.disk_files = None  # Unknown until the folder is first scanned
+        self.disk_bytes = 0
+        self.disk_evictions = 0
+    
+    def key(self, qr_content, fmt='png'):
+        return hashlib.sha256(f"{fmt}:{self.error_correction}:{qr_content}".encode()).hexdigest()
+    
+    def path(self, key, fmt='png'):
+        return os.path.join(self.directory, f"{key}.{fmt}")
+    
+    def contains(self, qr_content, fmt='png'):
+        """True if the image is cached in memory or on disk"""
+        key = self.key(qr_content, fmt)
+        return key in self.memory or os.path.exists(self.path(key, fmt))
+    
+    def get(self, qr_content, fmt='png'):
+        """Cached image bytes for the content, or None"""
+        key = self.key(qr_content, fmt)
+        png = self.memory.get(key)
+        if png is not None:
+            self._count('memory_hits')
+            return png
+        
+        path = self.path(key, fmt)
+        try:
+            with open(path, 'rb') as f:
+                png = f.read()
+            if self.disk_max_bytes:
+                os.utime(path)  # Recently used: evicted last
+        except OSError:
+            return None
+        self._count('disk_hits')
+        self.memory.set(key, png)
+        return png
+    
+    def put(self, qr_content, png, fmt='png'):
+        """Store freshly rendered image bytes in both tiers"""
+        key = self.key(qr_content, fmt)
+        self._count('renders')
+        self.memory.set(key, png)
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            path = self.path(key, fmt)
+            existed = os.path.exists(path)
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, 'wb') as f:
+                f.write(png)
+            os.replace(tmp_path, path)  # Readers never see a partial file
+        except OSError as e:
+            print(f"⚠️ Could not write QR image cache: {str(e)}")
+            return
+        
+        with self._lock:
+            known = self.disk_files is not None
+            if known and not existed:
+                self.disk_files += 1
+                self.disk_bytes += len(png)
+            over = self.disk_max_bytes and self.disk_bytes > self.disk_max_bytes
+        if not known or over:
+            self.sweep()
+    
+    def sweep(self):
+        """
+        Re-count the image folder and, when it is over disk_max_bytes,
+        delete the least recently used files until it is at 90% of the budget
+        
+        Other processes share the folder, so usage is always recounted here.
+        
+        Returns:
+            int: Files deleted
+        """
+        with self._sweep_lock:
+            files = []
+            try:
+                with os.scandir(self.directory) as entries:
+                    for entry in entries:
+                        if entry.is_file() and not entry.name.endswith('.tmp'):
+                            stat = entry.stat()
+                            files.append((stat.st_mtime, stat.st_size, entry.path))
+            except FileNotFoundError:
+                pass
+            
+            total = sum(size for _, size, _ in files)
+            count, removed = len(files), 0
+            if self.disk_max_bytes and total > self.disk_max_bytes:
+                target = self.disk_max_bytes * 0.9
+                for _, size, path in sorted(files):
+                    if total <= target:
+                        break
+                    try:
+                        os.remove(path)
+                        removed += 1
+                    except FileNotFoundError:
+                        pass  # Already evicted by another process
+                    except OSError:
+                        continue
+                    total -= size
+                    count -= 1
+            
+            with self._lock:
+                self.disk_files = count
+                self.disk_bytes = total
+                self.disk_evictions += removed
+            return removed
+    
+    def get_or_render(self, qr_content, fmt='png'):
+        """Cached image bytes, rendering and storing them on a miss"""
+        png = self.get(qr_content, fmt)
+        if png is None:
+            png = render_qr(qr_content, fmt, self.error_correction)
+            self.put(qr_content, png, fmt)
+        return png
+    
+    def stats(self):
+        """Hit ratio and byte usage (memory and disk) for monitoring"""
+        if self.disk_files is None:
+            self.sweep()
+        with self._lock:
+            lookups = self.memory_hits + self.disk_hits + self.renders
+            hits = self.memory_hits + self.disk_hits
+            return {
+                'memory': self.memory.stats(),
+                'disk': {
+                    'directory': self.directory,
+                    'files': self.disk_files,
+                    'bytes': self.disk_bytes,
+                    'max_bytes': self.disk_max_bytes,
+                    'evictions': self.disk_evictions
+                },
+                'memory_hits': self.memory_hits,
+                'disk_hits': self.disk_hits,
+                'renders': self.renders,
+                'hit_ratio': round(hits / lookups, 4) if lookups else 0.0
+            }
+    
+    def _count(self, counter):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
 
 
 class QRCodeService:
@@ -16,24 +285,94 @@ class QRCodeService:
     
     def __init__(self):
         """Initialize QR code service"""
+        self.key_id = Config.QR_KEY_ID
+        self.keys = {self.key_id: _derive_key(Config.SECRET_KEY)}
+        for entry in filter(None, (e.strip() for e in Config.QR_OLD_KEYS.split(','))):
+            key_id, _, secret = entry.partition(':')
+            if key_id and secret and key_id not in self.keys:
+                self.keys[key_id] = _derive_key(secret)
+        self.token_ttl = timedelta(days=Config.QR_TOKEN_TTL_DAYS)
+        self.allow_legacy_tokens = Config.QR_ALLOW_LEGACY_TOKENS
+        self.payload_mode = Config.QR_PAYLOAD
+        self.error_correction = Config.QR_ERROR_CORRECTION.upper()
+        if self.error_correction not in ERROR_CORRECTION:
+            raise ValueError(f"QR_ERROR_CORRECTION must be one of {', '.join(ERROR_CORRECTION)}")
+        self.image_cache = QRImageCache(
+            Config.QR_CACHE_DIR, Config.QR_CACHE_MAX_BYTES, self.error_correction, Config.QR_CACHE_DISK_MAX_BYTES
+        )
         print("✅ QR Code service initialized")
     
-    def generate_guest_token(self, guest_id, event_id):
+    def generate_guest_token(self, guest_id, event_id, expires_at=None):
         """
-        Generate a unique secure token for guest
+        Generate a signed token for guest
+        
+        Format: "<key id>.<base64url(guest_id, event_id, expiry, nonce, HMAC)>",
+        about 45 characters, so it fits the qr_token column. The nonce
+        makes every rotation produce a new token.
         
         Args:
             guest_id (int): Guest ID
             event_id (int): Event ID
+            expires_at (datetime): Expiry in UTC (defaults to QR_TOKEN_TTL_DAYS from now)
             
         Returns:
-            str: Secure token
+            str: Signed token
         """
-        data = f"{guest_id}:{event_id}:{datetime.utcnow().isoformat()}"
-        token = hashlib.sha256(data.encode()).hexdigest()
-        return token[:32]  # 32 character token
+        expires_at = expires_at or datetime.utcnow() + self.token_ttl
+        expiry = int((expires_at - datetime(1970, 1, 1)).total_seconds())
+        body = TOKEN_STRUCT.pack(guest_id, event_id, expiry, secrets.randbits(32))
+        return f"{self.key_id}.{_b64encode(body + self._sign(self.keys[self.key_id], body))}"
     
-    def generate_qr_code(self, guest_id, event_id, guest_name="Guest"):
+    def verify_guest_token(self, token, now=None):
+        """
+        Check a token's signature and expiry without touching the database
+        
+        Args:
+            token (str): Token from a QR code
+            now (float): Current unix time (optional, for testing)
+            
+        Returns:
+            dict: guest_id, event_id and expires_at, or None if forged,
+                  malformed or expired
+        """
+        try:
+            key_id, _, encoded = token.partition('.')
+            key = self.keys.get(key_id)
+            if key is None:
+                return None
+            raw = _b64decode(encoded)
+            body, signature = raw[:TOKEN_STRUCT.size], raw[TOKEN_STRUCT.size:]
+            if len(signature) != SIGNATURE_BYTES or not hmac.compare_digest(signature, self._sign(key, body)):
+                return None
+            guest_id, event_id, expiry, _ = TOKEN_STRUCT.unpack(body)
+        except (AttributeError, ValueError, struct.error):
+            return None
+        
+        if expiry < (now if now is not None else time.time()):
+            return None
+        return {'guest_id': guest_id, 'event_id': event_id, 'expires_at': expiry}
+    
+    @staticmethod
+    def _sign(key, body):
+        return hmac.new(key, body, hashlib.sha256).digest()[:SIGNATURE_BYTES]
+    
+    def reusable_token(self, guest):
+        """
+        The guest's current token if it is still usable, else None (issue a new one)
+        
+        Args:
+            guest: Guest (or row) with id, event_id and qr_token
+            
+        Returns:
+            str: Token that is signed, unexpired and issued for this guest and event
+        """
+        token = guest.qr_token
+        claims = self.verify_guest_token(token) if token else None
+        if claims is None or (claims['guest_id'], claims['event_id']) != (guest.id, guest.event_id):
+            return None
+        return token
+    
+    def generate_qr_code(self, guest_id, event_id, guest_name="Guest", token=None, fmt='data_uri'):
         """
         Generate QR code for guest check-in
         
@@ -41,62 +380,98 @@ class QRCodeService:
             guest_id (int): Guest ID
             event_id (int): Event ID
             guest_name (str): Guest name
+            token (str): Existing token to reuse (a new one is issued if omitted)
+            fmt (str): 'data_uri' (base64 PNG), 'png' or 'svg' (raw bytes)
             
         Returns:
-            str: Base64 encoded QR code image
+            tuple: (QR code image, token)
         """
         try:
             # Create secure token
-            token = self.generate_guest_token(guest_id, event_id)
-            
-            # Create QR data
-            qr_data = {
-                'guest_id': guest_id,
-                'event_id': event_id,
-                'token': token,
-                'name': guest_name,
-                'generated_at': datetime.utcnow().isoformat()
-            }
-            
-            # Convert to JSON string
-            qr_content = json.dumps(qr_data)
-            
-            # Generate QR code
-            qr = qrcode.QRCode(
-                version=1,
-                error_correction=qrcode.constants.ERROR_CORRECT_H,
-                box_size=10,
-                border=4,
-            )
-            qr.add_data(qr_content)
-            qr.make(fit=True)
-            
-            # Create image
-            img = qr.make_image(fill_color="black", back_color="white")
-            
-            # Convert to base64
-            buffer = io.BytesIO()
-            img.save(buffer, format='PNG')
-            buffer.seek(0)
-            img_base64 = base64.b64encode(buffer.getvalue()).decode()
-            
-            return f"data:image/png;base64,{img_base64}", token
+            token = token or self.generate_guest_token(guest_id, event_id)
+            return self.render_image(guest_id, event_id, token, guest_name, fmt), token
             
         except Exception as e:
             print(f"❌ Error generating QR code: {str(e)}")
             return None, None
     
+    def render_image(self, guest_id, event_id, token, guest_name="Guest", fmt='png'):
+        """
+        Render (or fetch from the image cache) a guest's QR code
+        
+        Args:
+            fmt (str): 'png', 'svg' or 'data_uri'
+            
+        Returns:
+            bytes or str: Image bytes, or a data URI string for 'data_uri'
+        """
+        image_fmt = 'png' if fmt == 'data_uri' else fmt
+        if image_fmt not in IMAGE_FORMATS:
+            raise ValueError(f"Unsupported QR format: {fmt}")
+        
+        image = self.image_cache.get_or_render(self.build_qr_content(guest_id, event_id, token, guest_name), image_fmt)
+        if fmt == 'data_uri':
+            return f"data:{IMAGE_FORMATS['png']};base64,{base64.b64encode(image).decode()}"
+        return image
+    
+    def build_qr_content(self, guest_id, event_id, token, guest_name="Guest"):
+        """
+        Text encoded in a guest's QR code
+        
+        With QR_PAYLOAD=compact (the default) a signed token is encoded on
+        its own as base45, which stays in the QR alphanumeric character
+        set and gives a version 3-4 code; ids and expiry are inside the
+        signed token. Otherwise (or for legacy tokens) a JSON object with
+        guest_id, event_id, token and name is encoded.
+        
+        Deterministic for a given token and name, so it can key the image cache.
+        
+        Returns:
+            str: QR code text
+        """
+        if self.payload_mode == 'compact' and not LEGACY_TOKEN.match(token):
+            return self.compact_payload(token)
+        return json.dumps({
+            'guest_id': guest_id,
+            'event_id': event_id,
+            'token': token,
+            'name': guest_name
+        })
+    
+    def compact_payload(self, token):
+        """Base45 form of a signed token: "<key id>." followed by the raw token bytes"""
+        key_id, _, encoded = token.partition('.')
+        return _b45encode(key_id.encode() + b'.' + _b64decode(encoded))
+    
+    def parse_compact_payload(self, payload):
+        """Signed token from a compact QR payload, or None"""
+        try:
+            key_id, _, raw = _b45decode(payload.strip('\r\n')).partition(b'.')
+            return f"{key_id.decode()}.{_b64encode(raw)}"
+        except (KeyError, ValueError, UnicodeDecodeError):
+            return None
+    
     def verify_qr_code(self, qr_data_json):
         """
         Verify and decode QR code data
         
+        Forged, tampered and expired codes are rejected here, before the
+        check-in touches the database.
+        
         Args:
-            qr_data_json (str): JSON string from QR code
+            qr_data_json (str): Text from the QR code (compact payload or JSON)
             
         Returns:
             dict: Decoded QR data or None if invalid
         """
         try:
+            if not qr_data_json.lstrip().startswith('{'):
+                token = self.parse_compact_payload(qr_data_json)
+                claims = self.verify_guest_token(token) if token else None
+                if claims is None:
+                    return None
+                return {'guest_id': claims['guest_id'], 'event_id': claims['event_id'], 'token': token, 'name': None}
+            
             qr_data = json.loads(qr_data_json)
             
             # Validate required fields
@@ -104,13 +479,23 @@ class QRCodeService:
             if not all(field in qr_data for field in required_fields):
                 return None
             
+            # Unsigned tokens from before signing can only be checked against the database
+            if self.allow_legacy_tokens and LEGACY_TOKEN.match(str(qr_data['token'])):
+                return qr_data
+            
+            # Signature, expiry and the ids the token was issued for
+            claims = self.verify_guest_token(qr_data['token'])
+            if (claims is None or claims['guest_id'] != int(qr_data['guest_id'])
+                    or claims['event_id'] != int(qr_data['event_id'])):
+                return None
+            
             return qr_data
             
         except Exception as e:
             print(f"❌ Error verifying QR code: {str(e)}")
             return None
     
-    def download_qr_code(self, guest_id, event_id, guest_name="Guest", file_path=None):
+    def download_qr_code(self, guest_id, event_id, guest_name="Guest", file_path=None, token=None):
         """
         Generate and save QR code as file
         
@@ -118,45 +503,25 @@ class QRCodeService:
             guest_id (int): Guest ID
             event_id (int): Event ID
             guest_name (str): Guest name
-            file_path (str): Path to save file (optional)
+            file_path (str): Path to save file, .png or .svg (optional)
+            token (str): Existing token to reuse (a new one is issued if omitted)
             
         Returns:
             str: File path or None
         """
         try:
             # Create secure token
-            token = self.generate_guest_token(guest_id, event_id)
-            
-            # Create QR data
-            qr_data = {
-                'guest_id': guest_id,
-                'event_id': event_id,
-                'token': token,
-                'name': guest_name,
-                'generated_at': datetime.utcnow().isoformat()
-            }
-            
-            # Convert to JSON string
-            qr_content = json.dumps(qr_data)
-            
-            # Generate QR code
-            qr = qrcode.QRCode(
-                version=1,
-                error_correction=qrcode.constants.ERROR_CORRECT_H,
-                box_size=10,
-                border=4,
-            )
-            qr.add_data(qr_content)
-            qr.make(fit=True)
-            
-            # Create image
-            img = qr.make_image(fill_color="black", back_color="white")
+            token = token or self.generate_guest_token(guest_id, event_id)
             
             # Save to file
             if not file_path:
                 file_path = f"static/qr_codes/guest_{guest_id}_event_{event_id}.png"
             
-            img.save(file_path)
+            fmt = 'svg' if file_path.lower().endswith('.svg') else 'png'
+            image = self.render_image(guest_id, event_id, token, guest_name, fmt)
+            
+            with open(file_path, 'wb') as f:
+                f.write(image)
             
             return file_path
             
@@ -185,6 +550,7 @@ if __name__ == '__main__':
         print(f"✅ QR Code generated successfully")
         print(f"Token: {token}")
         print(f"Image length: {len(qr_img)} characters")
+        print(f"Verified: {qr_service.verify_guest_token(token)}")
     else:
         print("❌ QR Code generation failed")
     
@@ -0,0 +1,49 @@
+"""
+Per-request SQL query budget guard
+Catch N+1 query regressions on list and JSON routes
+"""
+
+from functools import wraps
+from flask import g, current_app, has_request_context
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+
+class QueryBudgetExceeded(Exception):
+    """Raised in strict mode when a route issues more queries than allowed"""
+
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def _count_query(conn, cursor, statement, parameters, context, executemany):
+    if has_request_context() and g.get('query_count') is not None:
+        g.query_count += 1
+
+
+def query_budget(max_queries):
+    """
+    Limit the number of SQL statements a route may execute
+
+    The count does not depend on how many rows are rendered, so a lazy
+    load per row (an N+1 pattern) pushes the route over its budget.
+    With QUERY_BUDGET_STRICT enabled (tests, development) the request
+    fails; otherwise a warning is printed.
+
+    Args:
+        max_queries (int): Statements allowed per request
+    """
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            g.query_count = 0
+            response = f(*args, **kwargs)
+            count = g.query_count
+            g.query_count = None
+
+            if count > max_queries:
+                message = f"{f.__name__} ran {count} queries (budget {max_queries})"
+                if current_app.config.get('QUERY_BUDGET_STRICT'):
+                    raise QueryBudgetExceeded(message)
+                print(f"⚠️ Query budget exceeded: {message}")
+            return response
+        return decorated_function
+    return decorator
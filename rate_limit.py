@@ -0,0 +1,37 @@
+"""
+Rate limiting helpers for Event Management System
+"""
+
+import threading
+import time
+
+
+class RateLimiter:
+    """Thread-safe token bucket: on average at most `rate` operations per second"""
+
+    def __init__(self, rate, burst=None):
+        """
+        Args:
+            rate (float): Operations per second (0 or less disables limiting)
+            burst (float): Operations allowed back to back (defaults to one second's worth)
+        """
+        self.rate = rate
+        self.burst = burst or max(1, rate)
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, n=1):
+        """Block until n more operations are allowed"""
+        if self.rate <= 0:
+            return
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= n:
+                    self._tokens -= n
+                    return
+                wait = (n - self._tokens) / self.rate
+            time.sleep(wait)
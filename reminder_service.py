@@ -0,0 +1,194 @@
+"""
+Reminder Service for Event Management System
+Background scheduler that sends email/SMS reminders as events approach
+"""
+
+import threading
+from datetime import datetime, timedelta, time
+from sqlalchemy import select, or_
+from sqlalchemy.exc import IntegrityError
+from models import db, Event, Campaign, EventReminder
+from campaign_service import campaign_service
+
+
+events = Event.__table__
+campaigns = Campaign.__table__
+reminders = EventReminder.__table__
+
+
+class ReminderService:
+    """
+    Find events entering a reminder window (e.g. 24h and 2h before the
+    start) and send their reminders to accepted guests
+
+    Each tick claims the due (event, window) pairs by inserting into
+    event_reminders, whose unique key makes a pair fire at most once
+    across restarts and processes, together with one Reminder campaign
+    per channel. The campaigns then send in batches and record
+    per-guest delivery state, so an interrupted send resumes without
+    repeating guests already reminded.
+    """
+
+    def __init__(self):
+        self.app = None
+        self.interval = 0
+        self.windows = ()
+        self.channels = ()
+        self._thread = None
+        self._start_lock = threading.Lock()
+
+    def init_app(self, app, channels):
+        """
+        Args:
+            app: Flask app (the scheduler runs inside its app context)
+            channels (list): Channels that can send ('Email', 'SMS')
+        """
+        self.app = app
+        self.interval = app.config.get('REMINDER_INTERVAL', 60)
+        self.windows = tuple(sorted(
+            {int(hours) for hours in str(app.config.get('REMINDER_WINDOWS', '24,2')).split(',') if hours.strip()},
+            reverse=True
+        ))
+        wanted = [channel.strip() for channel in str(app.config.get('REMINDER_CHANNELS', 'Email,SMS')).split(',')]
+        self.channels = tuple(channel for channel in wanted if channel in channels)
+
+        app.before_request(self.start)
+
+    @property
+    def enabled(self):
+        return self.interval > 0 and bool(self.windows) and bool(self.channels)
+
+    def start(self):
+        """Start the scheduler thread (once per process)"""
+        if not self.enabled or self._thread is not None:
+            return
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._work, name='reminder-scheduler', daemon=True)
+                self._thread.start()
+                print(f"✅ Reminder scheduler started ({', '.join(f'{h}h' for h in self.windows)} "
+                      f"via {', '.join(self.channels)})")
+
+    def _work(self):
+        stop = threading.Event()
+        while not stop.wait(self.interval):
+            try:
+                with self.app.app_context():
+                    self.tick()
+            except Exception as e:
+                print(f"❌ Reminder scheduler error: {str(e)}")
+
+    def tick(self, now=None):
+        """
+        Claim the reminders that are due and send every unfinished reminder campaign
+
+        Args:
+            now (datetime): Local time to evaluate the windows at (default: now)
+
+        Returns:
+            list: IDs of the campaigns sent in this tick
+        """
+        now = now or datetime.now()
+        for event_id, windows in self.due(now).items():
+            self._claim(event_id, windows)
+
+        sent = []
+        for campaign_id in self._unfinished():
+            # run() takes the campaign's lease, so only one process sends it
+            try:
+                if campaign_service.run(campaign_id) is None:
+                    continue
+            except Exception as e:
+                print(f"❌ Reminder campaign {campaign_id} failed: {str(e)}")
+            sent.append(campaign_id)
+        return sent
+
+    def due(self, now):
+        """
+        Windows each upcoming event is inside of and not yet handled
+
+        Args:
+            now (datetime): Local time
+
+        Returns:
+            dict: {event_id: [window hours, widest first]}
+        """
+        if not self.windows:
+            return {}
+        horizon = now + timedelta(hours=self.windows[0])
+
+        # Range scan on the event_date index; event_time is checked per row
+        rows = db.session.execute(
+            select(events.c.id, events.c.event_date, events.c.event_time).where(
+                events.c.event_date.between(now.date(), horizon.date()),
+                or_(events.c.status.is_(None), events.c.status.notin_(('Completed', 'Cancelled')))
+            )
+        ).all()
+
+        due = {}
+        for row in rows:
+            start = datetime.combine(row.event_date, row.event_time or time.min)
+            windows = [hours for hours in self.windows if start - timedelta(hours=hours) <= now < start]
+            if windows:
+                due[row.id] = windows
+        if not due:
+            return {}
+
+        handled = set(db.session.execute(
+            select(reminders.c.event_id, reminders.c.window_hours).where(reminders.c.event_id.in_(list(due)))
+        ).all())
+        return {
+            event_id: [hours for hours in windows if (event_id, hours) not in handled]
+            for event_id, windows in due.items()
+            if (event_id, windows[-1]) not in handled
+        }
+
+    def _claim(self, event_id, windows):
+        """
+        Record the narrowest due window with its campaigns; wider windows due at
+        the same time are recorded as skipped so a guest gets one reminder
+        """
+        narrowest = windows[-1]
+        event = db.session.get(Event, event_id)
+        reminder = EventReminder(event_id=event_id, window_hours=narrowest)
+        try:
+            for channel in self.channels:
+                campaign = campaign_service.create(
+                    event,
+                    name=f'{narrowest}h reminder - {event.name}',
+                    kind='Reminder',
+                    rsvp_statuses=['Accepted'],
+                    channel=channel,
+                    commit=False
+                )
+                if channel == 'SMS':
+                    reminder.sms_campaign_id = campaign.id
+                else:
+                    reminder.email_campaign_id = campaign.id
+            db.session.add(reminder)
+            db.session.add_all(
+                EventReminder(event_id=event_id, window_hours=hours, skipped=True) for hours in windows[:-1]
+            )
+            db.session.commit()
+        except IntegrityError:
+            # Another process claimed it first
+            db.session.rollback()
+            return False
+
+        print(f"📦 {narrowest}h reminder queued for event {event_id}")
+        return True
+
+    def _unfinished(self):
+        """Reminder campaigns not sent yet, or cut off mid-send (their sender's lease expired)"""
+        return db.session.execute(
+            select(campaigns.c.id).where(
+                campaigns.c.status.in_(('Draft', 'Sending')),
+                campaign_service.claimable(),
+                or_(campaigns.c.id.in_(select(reminders.c.email_campaign_id)),
+                    campaigns.c.id.in_(select(reminders.c.sms_campaign_id)))
+            ).order_by(campaigns.c.id)
+        ).scalars().all()
+
+
+# Initialize global service instance
+reminder_service = ReminderService()
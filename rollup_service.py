@@ -0,0 +1,304 @@
+"""
+Rollup Service for Event Management System
+Keep per-event guest, RSVP, check-in and booking counters up to date
+"""
+
+from collections import defaultdict
+from decimal import Decimal
+from sqlalchemy import event, func, case, select, insert, update, delete, inspect, or_
+from models import db, Event, Guest, Booking, EventRollup
+
+
+rollups = EventRollup.__table__
+
+# Guest/booking columns whose values feed the rollup counters
+GUEST_FIELDS = ('event_id', 'rsvp_status', 'checked_in', 'guest_count')
+BOOKING_FIELDS = ('event_id', 'cost')
+
+RSVP_COLUMNS = {
+    'Accepted': 'rsvp_accepted',
+    'Pending': 'rsvp_pending',
+    'Declined': 'rsvp_declined'
+}
+
+
+def count_if(condition):
+    """Conditional count usable inside an aggregate SELECT"""
+    return func.coalesce(func.sum(case((condition, 1), else_=0)), 0)
+
+
+def guest_deltas(rsvp_status, checked_in, guest_count, sign=1):
+    """Counter changes caused by adding (sign=1) or removing (sign=-1) one guest"""
+    deltas = {'total_guests': sign, 'headcount': sign * (guest_count or 0)}
+    if rsvp_status in RSVP_COLUMNS:
+        deltas[RSVP_COLUMNS[rsvp_status]] = sign
+    if checked_in:
+        deltas['checked_in'] = sign
+    return deltas
+
+
+def booking_deltas(cost, sign=1):
+    """Counter changes caused by adding (sign=1) or removing (sign=-1) one booking"""
+    return {
+        'total_bookings': sign,
+        'total_cost': sign * Decimal(str(cost or 0))
+    }
+
+
+class CapacityExceeded(ValueError):
+    """Raised when adding guests would exceed an event's venue capacity"""
+
+    def __init__(self, event_id, requested, capacity, reserved):
+        self.event_id = event_id
+        self.requested = requested
+        self.capacity = capacity
+        self.reserved = reserved
+        super().__init__(
+            f'Adding {requested} guests would exceed venue capacity of {capacity}. '
+            f'Current guests: {reserved}'
+        )
+
+
+class RollupService:
+    """Maintain the event_rollups table in the same transaction as writes"""
+
+    def init_app(self, app):
+        """
+        Hook rollup maintenance into the ORM session
+
+        Every flush that inserts, updates or deletes guests or bookings
+        applies the matching counter changes before the transaction commits.
+        """
+        event.listen(db.session, 'before_flush', self._before_flush)
+        event.listen(db.session, 'after_flush', self._after_flush)
+
+        # Load previous values on assignment so edits can be diffed
+        for attr in GUEST_FIELDS:
+            event.listen(getattr(Guest, attr), 'set', _noop, active_history=True)
+        for attr in BOOKING_FIELDS:
+            event.listen(getattr(Booking, attr), 'set', _noop, active_history=True)
+
+    def apply(self, connection, deltas):
+        """
+        Apply counter changes to event_rollups
+
+        The headcount column doubles as the event's reserved-seat counter:
+        an increase is only applied while headcount + n stays within the
+        venue capacity, checked inside the same UPDATE so concurrent
+        writers cannot overbook.
+
+        Args:
+            connection: Connection inside the writing transaction
+            deltas (dict): event_id -> {column: change}
+
+        Raises:
+            CapacityExceeded: If a headcount increase does not fit the venue
+        """
+        for event_id, changes in deltas.items():
+            changes = {col: value for col, value in changes.items() if value}
+            if not changes:
+                continue
+
+            values = {col: getattr(rollups.c, col) + value for col, value in changes.items()}
+            stmt = update(rollups).where(rollups.c.event_id == event_id).values(**values)
+
+            seats = changes.get('headcount', 0)
+            if seats > 0:
+                capacity = select(Event.venue_capacity).where(Event.id == event_id).scalar_subquery()
+                stmt = stmt.where(or_(capacity.is_(None), rollups.c.headcount + seats <= capacity))
+
+            result = connection.execute(stmt)
+            if result.rowcount == 0:
+                self._resolve_missed_update(connection, event_id, seats)
+
+    def reserve_seats(self, connection, event_id, seats):
+        """
+        Atomically reserve seats for an event (constant-time admission check)
+
+        Raises:
+            CapacityExceeded: If the seats do not fit the venue
+        """
+        self.apply(connection, {event_id: {'headcount': seats}})
+
+    @staticmethod
+    def _seat_state(connection, event_id):
+        """(headcount, venue_capacity) row of an event's rollup, or None"""
+        return connection.execute(
+            select(rollups.c.headcount, Event.venue_capacity)
+            .select_from(rollups.join(Event, Event.id == rollups.c.event_id))
+            .where(rollups.c.event_id == event_id)
+        ).first()
+
+    def _resolve_missed_update(self, connection, event_id, seats):
+        """Work out why a rollup UPDATE matched no row"""
+        row = self._seat_state(connection, event_id)
+        if row is not None:
+            # Row exists, so the capacity condition rejected the update
+            raise CapacityExceeded(event_id, seats, row.venue_capacity, row.headcount)
+
+        # Missing row (e.g. event created before rollups existed): rebuild it
+        self.rebuild(connection, [event_id])
+        if seats > 0:
+            row = self._seat_state(connection, event_id)
+            if row is not None and row.venue_capacity is not None and row.headcount > row.venue_capacity:
+                raise CapacityExceeded(event_id, seats, row.venue_capacity, row.headcount - seats)
+
+    def rebuild(self, connection=None, event_ids=None):
+        """
+        Recompute rollups from the guests and bookings tables
+
+        Args:
+            connection: Connection to use (defaults to the session's)
+            event_ids (list): Only rebuild these events (optional)
+
+        Returns:
+            int: Number of rollup rows written
+        """
+        if connection is None:
+            connection = db.session.connection()
+
+        guest_query = select(
+            Guest.event_id.label('event_id'),
+            func.count(Guest.id).label('total_guests'),
+            count_if(Guest.rsvp_status == 'Accepted').label('rsvp_accepted'),
+            count_if(Guest.rsvp_status == 'Pending').label('rsvp_pending'),
+            count_if(Guest.rsvp_status == 'Declined').label('rsvp_declined'),
+            count_if(Guest.checked_in == True).label('checked_in'),
+            func.coalesce(func.sum(Guest.guest_count), 0).label('headcount'),
+        ).group_by(Guest.event_id)
+
+        booking_query = select(
+            Booking.event_id.label('event_id'),
+            func.count(Booking.id).label('total_bookings'),
+            func.coalesce(func.sum(Booking.cost), 0).label('total_cost'),
+        ).group_by(Booking.event_id)
+
+        clear = delete(rollups)
+
+        if event_ids is not None:
+            guest_query = guest_query.where(Guest.event_id.in_(event_ids))
+            booking_query = booking_query.where(Booking.event_id.in_(event_ids))
+            clear = clear.where(rollups.c.event_id.in_(event_ids))
+
+        g = guest_query.subquery()
+        b = booking_query.subquery()
+
+        source = select(
+            Event.id,
+            func.coalesce(g.c.total_guests, 0),
+            func.coalesce(g.c.rsvp_accepted, 0),
+            func.coalesce(g.c.rsvp_pending, 0),
+            func.coalesce(g.c.rsvp_declined, 0),
+            func.coalesce(g.c.checked_in, 0),
+            func.coalesce(g.c.headcount, 0),
+            func.coalesce(b.c.total_bookings, 0),
+            func.coalesce(b.c.total_cost, 0),
+        ).select_from(
+            Event.__table__
+        ).outerjoin(g, g.c.event_id == Event.id).outerjoin(b, b.c.event_id == Event.id)
+
+        if event_ids is not None:
+            source = source.where(Event.id.in_(event_ids))
+
+        connection.execute(clear)
+        result = connection.execute(insert(rollups).from_select([
+            'event_id', 'total_guests', 'rsvp_accepted', 'rsvp_pending', 'rsvp_declined',
+            'checked_in', 'headcount', 'total_bookings', 'total_cost'
+        ], source))
+        return result.rowcount
+
+    def ensure_populated(self):
+        """Build rollups on first start against an existing database"""
+        has_rollups = db.session.query(rollups.c.event_id).first() is not None
+        if not has_rollups and db.session.query(Event.id).first() is not None:
+            self.rebuild()
+            db.session.commit()
+
+    # ---- session hooks ----
+
+    def _before_flush(self, session, flush_context, instances):
+        """Record the old contribution of guests/bookings about to change"""
+        state = {'deltas': defaultdict(lambda: defaultdict(int)), 'changed': [], 'new_events': []}
+        session.info['rollups'] = state
+        deleted_events = [obj.id for obj in session.deleted if isinstance(obj, Event)]
+
+        with session.no_autoflush:
+            for obj in session.deleted:
+                if isinstance(obj, (Guest, Booking)):
+                    self._add(state['deltas'], obj, self._old_values(obj), -1)
+
+            for obj in session.dirty:
+                if isinstance(obj, (Guest, Booking)) and self._tracked_change(obj):
+                    self._add(state['deltas'], obj, self._old_values(obj), -1)
+                    state['changed'].append(obj)
+
+        state['changed'].extend(obj for obj in session.new if isinstance(obj, (Guest, Booking)))
+        state['new_events'] = [obj for obj in session.new if isinstance(obj, Event)]
+        state['deleted_events'] = deleted_events
+
+        # Drop rollups of deleted events before the events themselves go
+        if deleted_events:
+            session.connection().execute(
+                delete(rollups).where(rollups.c.event_id.in_(deleted_events))
+            )
+
+    def _after_flush(self, session, flush_context):
+        """Add the new contribution and write the counters"""
+        state = session.info.pop('rollups', None)
+        if state is None:
+            return
+
+        for obj in state['changed']:
+            values = {attr: getattr(obj, attr) for attr in self._fields(obj)}
+            self._add(state['deltas'], obj, values, 1)
+
+        connection = session.connection()
+        new_event_ids = [obj.id for obj in state['new_events']]
+        if new_event_ids:
+            connection.execute(insert(rollups), [{'event_id': event_id} for event_id in new_event_ids])
+
+        for event_id in state['deleted_events']:
+            state['deltas'].pop(event_id, None)
+
+        self.apply(connection, state['deltas'])
+
+    @staticmethod
+    def _fields(obj):
+        return GUEST_FIELDS if isinstance(obj, Guest) else BOOKING_FIELDS
+
+    def _tracked_change(self, obj):
+        obj_state = inspect(obj)
+        return any(obj_state.attrs[attr].history.has_changes() for attr in self._fields(obj))
+
+    def _old_values(self, obj):
+        """Values of the tracked columns as currently stored in the database"""
+        obj_state = inspect(obj)
+        values = {}
+        for attr in self._fields(obj):
+            history = obj_state.attrs[attr].load_history()
+            if history.deleted:
+                values[attr] = history.deleted[0]
+            elif history.unchanged:
+                values[attr] = history.unchanged[0]
+            else:
+                values[attr] = None
+        return values
+
+    @staticmethod
+    def _add(deltas, obj, values, sign):
+        if values['event_id'] is None:
+            return
+        if isinstance(obj, Guest):
+            changes = guest_deltas(values['rsvp_status'], values['checked_in'], values['guest_count'], sign)
+        else:
+            changes = booking_deltas(values['cost'], sign)
+        for col, value in changes.items():
+            deltas[values['event_id']][col] += value
+
+
+def _noop(target, value, oldvalue, initiator):
+    return value
+
+
+# Initialize global service instance
+rollup_service = RollupService()
@@ -0,0 +1,232 @@
+"""
+Search Service for Event Management System
+Full-text search over guests, events and bookings
+(SQLite FTS5 in sqlite mode, FULLTEXT indexes in MySQL mode)
+"""
+
+import re
+from sqlalchemy import text
+from models import db
+
+
+# Indexed columns per source table
+SEARCH_SOURCES = {
+    'guest': {'table': 'guests', 'columns': ('name', 'email', 'phone')},
+    'event': {'table': 'events', 'columns': ('name', 'location', 'description')},
+    'booking': {'table': 'bookings', 'columns': ('vendor_name', 'description')},
+}
+
+# Display columns returned for each kind: (title, detail, event_id)
+RESULT_COLUMNS = {
+    'guest': ('t.name', 'COALESCE(t.email, t.phone)', 't.event_id'),
+    'event': ('t.name', 't.location', 't.id'),
+    'booking': ('t.vendor_name', 't.booking_type', 't.event_id'),
+}
+
+MAX_QUERY_TERMS = 8
+
+# Fallbacks when the MySQL server settings cannot be read
+MYSQL_MIN_TOKEN_SIZE = 3
+
+
+class SearchService:
+    """Full-text search index kept in sync with the source tables"""
+
+    def __init__(self):
+        self._mysql_tokens = None
+
+    def install(self):
+        """
+        Create the search index if it does not exist yet
+
+        SQLite: one external-content FTS5 table per source table, kept in
+        sync by triggers so every write path (ORM or bulk SQL) is covered.
+        MySQL: FULLTEXT indexes, maintained by InnoDB itself.
+        """
+        if db.engine.dialect.name == 'sqlite':
+            self._install_sqlite()
+        elif db.engine.dialect.name == 'mysql':
+            self._install_mysql()
+        db.session.commit()
+
+    def rebuild(self):
+        """Re-index every row (repairs an index that has drifted)"""
+        if db.engine.dialect.name == 'sqlite':
+            for source in SEARCH_SOURCES.values():
+                fts = f"{source['table']}_fts"
+                db.session.execute(text(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')"))
+        elif db.engine.dialect.name == 'mysql':
+            for source in SEARCH_SOURCES.values():
+                db.session.execute(text(f"OPTIMIZE TABLE {source['table']}"))
+        db.session.commit()
+
+    def search(self, query, kinds=None, page=1, per_page=20):
+        """
+        Ranked full-text search with prefix matching
+
+        Every term must match (AND); each term also matches as a prefix,
+        so "rah sha" finds "Rahul Sharma".
+
+        Args:
+            query (str): Search text
+            kinds (list): Restrict to 'guest', 'event' and/or 'booking'
+            page (int): 1-based page number
+            per_page (int): Results per page
+
+        Returns:
+            tuple: (list of result dicts, has_next)
+        """
+        terms = re.findall(r'\w+', (query or '').lower())[:MAX_QUERY_TERMS]
+        kinds = [kind for kind in (kinds or SEARCH_SOURCES) if kind in SEARCH_SOURCES]
+        if not terms or not kinds:
+            return [], False
+
+        params = {}
+        if db.engine.dialect.name == 'sqlite':
+            match = ' '.join(f'"{term}"*' for term in terms)
+            selects = [self._sqlite_select(kind) for kind in kinds]
+        else:
+            # A required term the FULLTEXT index never stores (too short or a
+            # stopword) would make the whole boolean query match nothing, so
+            # those terms are matched with LIKE instead
+            min_size, stopwords = self._mysql_token_rules()
+            indexed = [term for term in terms if len(term) >= min_size and term not in stopwords]
+            unindexed = [term for term in terms if term not in indexed]
+            match = ' '.join(f'+{term}*' for term in indexed)
+            for i, term in enumerate(unindexed):
+                params[f'like{i}'] = '%' + term.replace('_', '\\_') + '%'  # \w+ may contain _
+            selects = [self._mysql_select(kind, bool(indexed), len(unindexed)) for kind in kinds]
+
+        sql = text(
+            f"SELECT kind, id, title, detail, event_id, score FROM ({' UNION ALL '.join(selects)}) AS hits "
+            f"ORDER BY score DESC, kind, id LIMIT :limit OFFSET :offset"
+        )
+        params.update({
+            'match': match,
+            'limit': per_page + 1,
+            'offset': (page - 1) * per_page
+        })
+        rows = db.session.execute(sql, params).fetchall()
+
+        results = [{
+            'type': row.kind,
+            'id': row.id,
+            'title': row.title,
+            'detail': row.detail,
+            'event_id': row.event_id,
+            'score': round(float(row.score), 4)
+        } for row in rows[:per_page]]
+        return results, len(rows) > per_page
+
+    # ---- SQLite FTS5 ----
+
+    def _install_sqlite(self):
+        for source in SEARCH_SOURCES.values():
+            table, columns = source['table'], source['columns']
+            fts = f"{table}_fts"
+            exists = db.session.execute(
+                text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+                {'name': fts}
+            ).first()
+
+            cols = ', '.join(columns)
+            new_cols = ', '.join(f'new.{c}' for c in columns)
+            old_cols = ', '.join(f'old.{c}' for c in columns)
+
+            db.session.execute(text(
+                f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5("
+                f"{cols}, content='{table}', content_rowid='id', prefix='2 3 4')"
+            ))
+            db.session.execute(text(
+                f"CREATE TRIGGER IF NOT EXISTS {table}_fts_insert AFTER INSERT ON {table} BEGIN "
+                f"INSERT INTO {fts}(rowid, {cols}) VALUES (new.id, {new_cols}); END"
+            ))
+            db.session.execute(text(
+                f"CREATE TRIGGER IF NOT EXISTS {table}_fts_delete AFTER DELETE ON {table} BEGIN "
+                f"INSERT INTO {fts}({fts}, rowid, {cols}) VALUES ('delete', old.id, {old_cols}); END"
+            ))
+            db.session.execute(text(
+                f"CREATE TRIGGER IF NOT EXISTS {table}_fts_update AFTER UPDATE OF {cols} ON {table} BEGIN "
+                f"INSERT INTO {fts}({fts}, rowid, {cols}) VALUES ('delete', old.id, {old_cols}); "
+                f"INSERT INTO {fts}(rowid, {cols}) VALUES (new.id, {new_cols}); END"
+            ))
+
+            # Index rows that existed before the search table was created
+            if not exists:
+                db.session.execute(text(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')"))
+
+    def _sqlite_select(self, kind):
+        fts = f"{SEARCH_SOURCES[kind]['table']}_fts"
+        title, detail, event_id = RESULT_COLUMNS[kind]
+        return (
+            f"SELECT '{kind}' AS kind, t.id AS id, {title} AS title, {detail} AS detail, "
+            f"{event_id} AS event_id, -bm25({fts}) AS score "
+            f"FROM {fts} JOIN {SEARCH_SOURCES[kind]['table']} t ON t.id = {fts}.rowid "
+            f"WHERE {fts} MATCH :match"
+        )
+
+    # ---- MySQL FULLTEXT ----
+
+    def _install_mysql(self):
+        for source in SEARCH_SOURCES.values():
+            table, columns = source['table'], source['columns']
+            index = f"ft_{table}"
+            exists = db.session.execute(text(
+                "SELECT 1 FROM information_schema.statistics "
+                "WHERE table_schema = DATABASE() AND table_name = :table AND index_name = :index"
+            ), {'table': table, 'index': index}).first()
+            if not exists:
+                db.session.execute(text(
+                    f"ALTER TABLE {table} ADD FULLTEXT INDEX {index} ({', '.join(columns)})"
+                ))
+
+    def _mysql_token_rules(self):
+        """
+        Minimum token size and stopwords of the server's FULLTEXT parser
+
+        Returns:
+            tuple: (min_token_size: int, stopwords: set)
+        """
+        if self._mysql_tokens is None:
+            row = db.session.execute(text(
+                "SELECT @@innodb_ft_min_token_size, @@innodb_ft_enable_stopword, "
+                "@@innodb_ft_server_stopword_table"
+            )).one()
+            min_size = int(row[0] or MYSQL_MIN_TOKEN_SIZE)
+
+            stopwords = set()
+            if row[1]:
+                if row[2]:
+                    schema, table = row[2].split('/', 1)
+                    source = f"`{schema}`.`{table}`"
+                else:
+                    source = "INFORMATION_SCHEMA.INNODB_FT_DEFAULT_STOPWORD"
+                stopwords = {value.lower() for value in
+                             db.session.execute(text(f"SELECT value FROM {source}")).scalars()}
+            self._mysql_tokens = (min_size, stopwords)
+        return self._mysql_tokens
+
+    def _mysql_select(self, kind, fulltext=True, like_terms=0):
+        """
+        Args:
+            kind (str): Source kind
+            fulltext (bool): Match :match against the FULLTEXT index
+            like_terms (int): Extra terms bound as :like0, :like1, ... that
+                              must each appear in one of the columns
+        """
+        table, columns = SEARCH_SOURCES[kind]['table'], SEARCH_SOURCES[kind]['columns']
+        title, detail, event_id = RESULT_COLUMNS[kind]
+        match = f"MATCH({', '.join(f't.{c}' for c in columns)}) AGAINST (:match IN BOOLEAN MODE)"
+
+        conditions = [match] if fulltext else []
+        for i in range(like_terms):
+            conditions.append('(' + ' OR '.join(f't.{c} LIKE :like{i}' for c in columns) + ')')
+        return (
+            f"SELECT '{kind}' AS kind, t.id AS id, {title} AS title, {detail} AS detail, "
+            f"{event_id} AS event_id, {match if fulltext else '0'} AS score "
+            f"FROM {table} t WHERE {' AND '.join(conditions)}"
+        )
+
+
+# Initialize global service instance
+search_service = SearchService()
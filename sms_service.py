@@ -0,0 +1,245 @@
+"""
+SMS Service for Event Management System
+Pluggable SMS providers (Twilio, local stub) with rate-limited bulk sending
+"""
+
+import random
+import threading
+from abc import ABC, abstractmethod
+import time
+import uuid
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from rate_limit import RateLimiter
+
+
+class SMSError(RuntimeError):
+    """Raised by a provider when a message could not be sent"""
+
+
+class SMSProvider(ABC):
+    """Interface every SMS provider implements"""
+
+    name = 'base'
+
+    @abstractmethod
+    def send(self, to, body):
+        """
+        Send one SMS
+
+        Args:
+            to (str): Phone number in E.164 format (+919876543210)
+            body (str): Message text
+
+        Returns:
+            str: Provider message ID
+
+        Raises:
+            SMSError: If the provider rejected or failed the message
+        """
+
+
+class TwilioSMSProvider(SMSProvider):
+    """Send through the Twilio REST API (needs the optional twilio package)"""
+
+    name = 'twilio'
+
+    def __init__(self, account_sid, auth_token, from_number):
+        try:
+            from twilio.rest import Client
+            from twilio.base.exceptions import TwilioRestException
+        except ImportError:
+            raise RuntimeError("Twilio provider needs the twilio package: pip install twilio")
+
+        self.client = Client(account_sid, auth_token)
+        self.from_number = from_number
+        self._errors = (TwilioRestException,)
+
+    def send(self, to, body):
+        try:
+            message = self.client.messages.create(body=body, from_=self.from_number, to=to)
+        except self._errors as e:
+            raise SMSError(e.msg or str(e))
+        return message.sid
+
+
+class StubSMSProvider(SMSProvider):
+    """Local stand-in for load tests and development: nothing leaves the machine"""
+
+    name = 'stub'
+
+    def __init__(self, latency=0.2, failure_rate=0.0, verbose=True, keep=100):
+        """
+        Args:
+            latency (float): Average seconds a send takes (varies +/- 50%)
+            failure_rate (float): Share of sends that fail, 0.0 - 1.0
+            verbose (bool): Print every message (handy to read OTPs locally)
+            keep (int): Recent messages kept in self.messages for inspection
+        """
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.verbose = verbose
+        self.messages = deque(maxlen=keep)
+        self.sent = 0
+        self.failed = 0
+        self._lock = threading.Lock()
+
+    def send(self, to, body):
+        if self.latency:
+            time.sleep(self.latency * random.uniform(0.5, 1.5))
+        if random.random() < self.failure_rate:
+            with self._lock:
+                self.failed += 1
+            raise SMSError('Simulated provider failure')
+
+        sid = f'STUB{uuid.uuid4().hex[:16]}'
+        with self._lock:
+            self.sent += 1
+            self.messages.append((sid, to, body))
+        if self.verbose:
+            print(f"📱 [stub SMS to {to}] {body}")
+        return sid
+
+
+class SMSService:
+    """SMS sending through the configured provider, shared rate limit and worker pool"""
+
+    def __init__(self):
+        self.provider = None
+        self.workers = 8
+        self.country_code = '+91'
+        self.limiter = RateLimiter(0)
+
+    def init_app(self, app):
+        """
+        Pick the provider from SMS_PROVIDER ('twilio', 'stub'; empty = Twilio if configured)
+
+        Args:
+            app: Flask app
+        """
+        config = app.config
+        provider = (config.get('SMS_PROVIDER') or '').lower()
+        twilio_ready = config.get('TWILIO_ENABLED') and config.get('TWILIO_ACCOUNT_SID') and config.get('TWILIO_AUTH_TOKEN')
+        if not provider and twilio_ready:
+            provider = 'twilio'
+
+        self.workers = config.get('SMS_WORKERS', 8)
+        self.country_code = config.get('SMS_COUNTRY_CODE', '+91')
+        self.limiter = RateLimiter(config.get('SMS_RATE', 10))
+
+        try:
+            if provider == 'twilio':
+                self.provider = TwilioSMSProvider(
+                    config.get('TWILIO_ACCOUNT_SID'), config.get('TWILIO_AUTH_TOKEN'), config.get('TWILIO_PHONE_NUMBER')
+                )
+            elif provider == 'stub':
+                self.provider = StubSMSProvider(
+                    latency=config.get('SMS_STUB_LATENCY', 0.2),
+                    failure_rate=config.get('SMS_STUB_FAILURE_RATE', 0.0)
+                )
+            elif provider:
+                raise RuntimeError(f"Unknown SMS provider: {provider}")
+        except RuntimeError as e:
+            print(f"❌ {str(e)}")
+            self.provider = None
+
+        if self.provider:
+            print(f"✅ SMS service initialized ({self.provider.name})")
+        else:
+            print("⚠️ SMS service not configured")
+
+    @property
+    def enabled(self):
+        return self.provider is not None
+
+    def generate_otp(self, length=6):
+        """Generate a random OTP"""
+        return ''.join([str(random.randint(0, 9)) for _ in range(length)])
+
+    def to_e164(self, phone):
+        """Local 10-digit numbers get SMS_COUNTRY_CODE; numbers with + are kept"""
+        phone = ''.join(ch for ch in str(phone) if ch.isdigit() or ch == '+')
+        return phone if phone.startswith('+') else f"{self.country_code}{phone}"
+
+    def deliver(self, phone, body):
+        """
+        Send one SMS under the provider rate limit
+
+        Returns:
+            str: Provider message ID
+
+        Raises:
+            SMSError: If sending failed
+        """
+        if not self.enabled:
+            raise SMSError('SMS service not configured')
+        self.limiter.acquire()
+        try:
+            return self.provider.send(self.to_e164(phone), body)
+        except SMSError:
+            raise
+        except Exception as e:
+            raise SMSError(str(e))
+
+    def send(self, phone, body):
+        """
+        Send one SMS
+
+        Returns:
+            tuple: (success: bool, message: str, message_sid: str or None)
+        """
+        try:
+            sid = self.deliver(phone, body)
+            return True, f"SMS sent successfully to {phone}", sid
+        except SMSError as e:
+            print(f"❌ SMS to {phone} failed: {str(e)}")
+            return False, f"Failed to send SMS: {str(e)}", None
+
+    def send_bulk(self, messages):
+        """
+        Send many SMS concurrently on SMS_WORKERS threads, within SMS_RATE
+
+        Args:
+            messages (list): (phone, body) pairs
+
+        Returns:
+            list: (message_sid or None, error or None) per message, in order
+        """
+        def send_one(item):
+            try:
+                return self.deliver(*item), None
+            except SMSError as e:
+                return None, str(e)
+
+        with ThreadPoolExecutor(max(1, self.workers)) as executor:
+            return list(executor.map(send_one, messages))
+
+    def send_otp(self, phone, otp, context=None):
+        """
+        Send an OTP code
+
+        Args:
+            phone (str): Recipient phone number
+            otp (str): OTP code
+            context (str): What the code is for (event name, "Login Verification")
+
+        Returns:
+            tuple: (success: bool, message: str, message_sid: str or None)
+        """
+        purpose = f" for {context}" if context else ""
+        return self.send(phone, f"Your Nexus Event OTP{purpose} is {otp}. Valid for 10 minutes. Do not share it.")
+
+    def send_event_reminder(self, phone, guest_name, event_name, event_date, event_time):
+        """
+        Send an event reminder to one guest
+
+        Returns:
+            tuple: (success: bool, message: str, message_sid: str or None)
+        """
+        return self.send(
+            phone, f"Hi {guest_name}, reminder: {event_name} is on {event_date} at {event_time}. See you there! - Nexus Event"
+        )
+
+
+# Initialize global service instance
+sms_service = SMSService()
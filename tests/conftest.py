@@ -0,0 +1,66 @@
+"""
+Shared pytest setup: the app on a throwaway SQLite database
+"""
+
+import os
+import sys
+import tempfile
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Configure before app.py is imported: no background workers, strict query budgets
+os.environ.update(
+    DB_TYPE='sqlite',
+    QUERY_BUDGET_STRICT='true',
+    DASHBOARD_CACHE_TTL='0',
+    OUTBOX_WORKERS='0',
+    REMINDER_INTERVAL='0',
+    PASSWORD_HASH_WORKERS='0'
+)
+
+import config  # noqa: E402
+
+_db_dir = tempfile.mkdtemp(prefix='event_tests_')
+config.Config.SQLALCHEMY_DATABASE_URI = f"sqlite:///{os.path.join(_db_dir, 'test.db')}"
+config.Config.SQLALCHEMY_ECHO = False
+
+from jinja2 import ChoiceLoader, DictLoader  # noqa: E402
+from app import app as flask_app  # noqa: E402
+from models import db  # noqa: E402
+
+# Stand-ins used only where the real templates are not available; they touch
+# the same relationships the list pages show, so lazy loads still count
+_ROWS = (
+    "{% for rows in [events, guests, bookings] %}{% for item in rows or [] %}"
+    "{{ item.name or item.vendor_name }}"
+    "{% if item.event_id is defined %}{{ item.event.name }}{% endif %}"
+    "{% if item.guest_count is defined and item.event_date is defined %}"
+    "{{ item.guest_count }} {{ item.booking_count }}{% endif %}"
+    "{% endfor %}{% endfor %}"
+)
+flask_app.jinja_loader = ChoiceLoader([flask_app.jinja_loader, DictLoader({
+    'events/list.html': _ROWS,
+    'events/detail.html': "{{ event.name }} {{ event.guest_count }} " + _ROWS,
+    'guests/list.html': _ROWS,
+    'bookings/list.html': _ROWS,
+})])
+
+
+@pytest.fixture
+def app():
+    flask_app.config.update(TESTING=True)
+    with flask_app.app_context():
+        yield flask_app
+        # Empty every table (the search index triggers follow the deletes)
+        db.session.rollback()
+        for table in reversed(db.metadata.sorted_tables):
+            db.session.execute(table.delete())
+        db.session.commit()
+        db.session.remove()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
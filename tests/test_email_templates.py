@@ -0,0 +1,41 @@
+"""
+Compiled emails: RFC 2045 line lengths and per-recipient content
+"""
+
+import email
+from email import policy
+
+from email_template_service import email_template_service, field
+
+
+def compile_campaign(body):
+    return email_template_service.compile(
+        'campaign', 'events@gmail.com',
+        subject=f"Hello {field('name')}",
+        fields=('name',),
+        context={'body': body}
+    )
+
+
+def test_encoded_lines_stay_within_76_characters():
+    body = ('Welcome to the annual conference, ' * 3) + field('name') + (' - see you at the main hall ' * 3)
+    compiled = compile_campaign(body)
+    msg = compiled.render('guest@gmail.com', {'name': 'Alexandra Konstantinopoulou-Vanderbilt ' * 4})
+
+    # RFC 2045: quoted-printable body lines; RFC 5322: folded header lines
+    head, _, body = msg.as_bytes().partition(b'\r\n\r\n')
+    assert max(len(line) for line in body.split(b'\r\n')) <= 76
+    assert max(len(line) for line in head.split(b'\r\n')) <= 78
+
+
+def test_rendered_text_decodes_to_the_field_value():
+    name = 'Zoë <b>& friends</b> ' * 5
+    compiled = compile_campaign(f"Dear {field('name')}, welcome!")
+    msg = email.message_from_bytes(compiled.render('guest@gmail.com', {'name': name}).as_bytes(),
+                                   policy=policy.default)
+
+    plain = msg.get_body(('plain',)).get_content()
+    html = msg.get_body(('html',)).get_content()
+    assert f'Dear {name}, welcome!' in plain
+    assert 'Zoë &lt;b&gt;&amp; friends&lt;/b&gt;' in html
+    assert msg['Subject'] == f'Hello {name}'
@@ -0,0 +1,94 @@
+"""
+Guest import: venue capacity and numeric cell validation
+"""
+
+import io
+from datetime import date
+
+import pytest
+
+from import_service import GuestImportService
+from models import db, Event, Guest, EventRollup
+from rollup_service import rollup_service, CapacityExceeded
+
+
+def make_event(capacity, guests=0):
+    event = Event(name='Launch', event_date=date(2030, 1, 1), venue_capacity=capacity)
+    db.session.add(event)
+    db.session.flush()
+    if guests:
+        db.session.add(Guest(event_id=event.id, name='Existing', guest_count=guests))
+    db.session.commit()
+    return event.id
+
+
+def csv_file(*rows):
+    lines = ['name,guest_count'] + [f'Guest {i},{count}' for i, count in enumerate(rows)]
+    return io.BytesIO('\n'.join(lines).encode())
+
+
+def headcount(event_id):
+    db.session.expire_all()
+    return db.session.get(EventRollup, event_id).headcount
+
+
+def test_import_stops_at_venue_capacity(app):
+    event_id = make_event(capacity=5, guests=3)
+
+    report = GuestImportService().import_guests(csv_file(2, 1), 'guests.csv', default_event_id=event_id)
+
+    assert report['imported'] == 1
+    assert report['failed'] == 1
+    assert report['errors'][0]['row'] == 3
+    assert 'exceed venue capacity of 5' in report['errors'][0]['errors'][0]
+    assert headcount(event_id) == 5
+    assert Guest.query.filter_by(event_id=event_id).count() == 2
+
+
+@pytest.mark.parametrize('cell', ['2.5', 'inf', '-inf', 'nan', '1e999', '0', '-1', 'two'])
+def test_import_rejects_bad_guest_count(app, cell):
+    event_id = make_event(capacity=None)
+
+    report = GuestImportService().import_guests(csv_file(cell), 'guests.csv', default_event_id=event_id)
+
+    assert report['imported'] == 0
+    assert report['errors'][0]['errors'] == ['Guest count must be a positive whole number']
+
+
+def test_import_accepts_whole_number_floats(app):
+    event_id = make_event(capacity=None)
+
+    report = GuestImportService().import_guests(csv_file('3.0'), 'guests.csv', default_event_id=event_id)
+
+    assert report['imported'] == 1
+    assert headcount(event_id) == 3
+
+
+def test_double_apply_cannot_overbook(app):
+    event_id = make_event(capacity=10)
+    connection = db.session.connection()
+
+    # Two writers that each checked 6 seats against an empty venue
+    rollup_service.apply(connection, {event_id: {'headcount': 6, 'total_guests': 1}})
+    with pytest.raises(CapacityExceeded) as exc:
+        rollup_service.apply(connection, {event_id: {'headcount': 6, 'total_guests': 1}})
+
+    assert (exc.value.capacity, exc.value.reserved) == (10, 6)
+    db.session.commit()
+    assert headcount(event_id) == 6
+
+
+def test_import_with_stale_capacity_check_is_rolled_back(app, monkeypatch):
+    event_id = make_event(capacity=10)
+    importer = GuestImportService()
+
+    # Another writer takes seats after the import read the headcount
+    monkeypatch.setattr(importer, '_load_capacity', lambda event_id: [10, 0])
+    rollup_service.reserve_seats(db.session.connection(), event_id, 8)
+    db.session.commit()
+
+    with pytest.raises(CapacityExceeded):
+        importer.import_guests(csv_file(2, 2), 'guests.csv', default_event_id=event_id)
+
+    assert headcount(event_id) == 8
+    assert Guest.query.filter_by(event_id=event_id).count() == 0
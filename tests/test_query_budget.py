@@ -0,0 +1,72 @@
+"""
+N+1 guard: list and JSON routes run the same number of queries for N and 10*N rows
+"""
+
+from datetime import date, timedelta
+
+import pytest
+from sqlalchemy import event
+
+from models import db, Event, Guest, Booking
+
+
+def seed(count):
+    """Add count events, each with one guest and one booking"""
+    start = db.session.query(Event).count()
+    for i in range(start, start + count):
+        e = Event(name=f'Event {i}', event_date=date.today() + timedelta(days=i + 1),
+                  location='Main Hall', venue_capacity=10000)
+        e.guests.append(Guest(name=f'Guest {i}', email=f'guest{i}@gmail.com', rsvp_status='Accepted',
+                              guest_count=1))
+        e.bookings.append(Booking(vendor_name=f'Vendor {i}', booking_type='Catering', cost=100,
+                                  booking_date=date.today()))
+        db.session.add(e)
+    db.session.commit()
+
+
+def count_queries(client, url):
+    """Statements executed while serving url"""
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(db.engine, 'before_cursor_execute', record)
+    try:
+        response = client.get(url)
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', record)
+    assert response.status_code == 200, response.data[:500]
+    return len(statements)
+
+
+@pytest.mark.parametrize('url', [
+    '/events?per_page=200',
+    '/guests?per_page=200',
+    '/bookings?per_page=200',
+    '/analytics/api/data',
+    '/search?q=guest&per_page=100',
+])
+def test_list_route_queries_do_not_grow_with_rows(client, url):
+    seed(5)
+    small = count_queries(client, url)
+
+    seed(45)
+    large = count_queries(client, url)
+
+    assert large == small, f"{url}: {small} queries for 5 rows, {large} for 50"
+
+
+def test_event_detail_queries_do_not_grow_with_guests(client):
+    seed(1)
+    event_id = db.session.query(Event.id).scalar()
+    small = count_queries(client, f'/events/{event_id}')
+
+    db.session.add_all(
+        Guest(event_id=event_id, name=f'Extra {i}', email=f'extra{i}@gmail.com', guest_count=1)
+        for i in range(50)
+    )
+    db.session.commit()
+    large = count_queries(client, f'/events/{event_id}')
+
+    assert large == small
@@ -0,0 +1,22 @@
+"""
+Input validation helpers shared by routes and bulk imports
+"""
+
+import re
+
+GMAIL_PATTERN = re.compile(r'^[a-zA-Z0-9._%+-]+@gmail\.com$')
+PHONE_PATTERN = re.compile(r'^[0-9]{10}$')
+
+
+def validate_gmail(email):
+    """Validate that email is a Gmail address"""
+    if not email:
+        return True  # Allow empty email
+    return GMAIL_PATTERN.match(email) is not None
+
+
+def validate_phone(phone):
+    """Validate that phone is exactly 10 digits"""
+    if not phone:
+        return True  # Allow empty phone
+    return PHONE_PATTERN.match(phone) is not None